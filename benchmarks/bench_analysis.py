@@ -0,0 +1,42 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014--, The Qiita Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+import qiita_db as qdb
+
+from .common import ScaleSuite, artifacts, count_queries, rolled_back
+
+
+class AnalysisBuildFilesSuite(ScaleSuite):
+    def setup(self, scale):
+        super().setup(scale)
+        self.analysis = qdb.analysis.Analysis.create(
+            self.user, "Benchmark analysis", "Benchmark analysis"
+        )
+        self.analysis.add_samples(
+            {a.id: a.prep_templates[0].keys() for a in artifacts(self.studies, "BIOM")},
+            overwrite_lock=True,
+        )
+
+    def teardown(self, scale):
+        qdb.analysis.Analysis.delete(self.analysis.id)
+
+    def _build_files(self):
+        # the files are named after the analysis, so each run overwrites them
+        with rolled_back():
+            self.analysis.build_files(False)
+
+    def time_build_files(self, scale):
+        self._build_files()
+
+    def peakmem_build_files(self, scale):
+        self._build_files()
+
+    def track_build_files_queries(self, scale):
+        return count_queries(self._build_files)
+
+    track_build_files_queries.unit = "queries"
@@ -0,0 +1,29 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014--, The Qiita Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from .common import ScaleSuite, artifacts, count_queries
+
+
+class DescendantsWithJobsSuite(ScaleSuite):
+    def setup(self, scale):
+        super().setup(scale)
+        self.roots = artifacts(self.studies, "FASTQ")
+
+    def _descendants_with_jobs(self):
+        return [a.descendants_with_jobs for a in self.roots]
+
+    def time_descendants_with_jobs(self, scale):
+        self._descendants_with_jobs()
+
+    def peakmem_descendants_with_jobs(self, scale):
+        self._descendants_with_jobs()
+
+    def track_descendants_with_jobs_queries(self, scale):
+        return count_queries(self._descendants_with_jobs)
+
+    track_descendants_with_jobs_queries.unit = "queries"
@@ -0,0 +1,110 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014--, The Qiita Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from uuid import uuid4
+
+import numpy as np
+
+import qiita_db as qdb
+
+from .common import SCALES, ScaleSuite, count_queries, rolled_back
+
+SampleTemplate = qdb.metadata_template.sample_template.SampleTemplate
+
+
+def _sample_template(scale, seed, prefix=None):
+    """Returns sample information with the size of `scale`"""
+    md = qdb.environment_manager._synthetic_sample_template(
+        np.random.RandomState(seed),
+        SCALES[scale]["n_samples"],
+        SCALES[scale]["n_columns"],
+    )
+    if prefix is not None:
+        md.index = ["%s.%s" % (prefix, s) for s in md.index]
+    return md
+
+
+class SampleTemplateSuite(ScaleSuite):
+    def setup(self, scale):
+        super().setup(scale)
+        self.template = SampleTemplate(self.studies[0].id)
+        # a study without sample information to benchmark create; the title
+        # is unique so a study left behind by an interrupted run can't clash
+        self.study = qdb.study.Study.create(
+            self.user,
+            "Benchmark study %s" % uuid4(),
+            {
+                "timeseries_type_id": 1,
+                "metadata_complete": True,
+                "mixs_compliant": True,
+                "study_alias": "benchmark",
+                "study_description": "Benchmark study",
+                "study_abstract": "Benchmark study",
+                "principal_investigator_id": qdb.study.StudyPerson(1),
+                "lab_person_id": None,
+            },
+        )
+        self.md = _sample_template(scale, 0)
+        self.md_extend = _sample_template(scale, 0, prefix="extended")
+        self.md_update = _sample_template(scale, 100)
+
+    def teardown(self, scale):
+        qdb.study.Study.delete(self.study.id)
+
+    def _create(self):
+        with rolled_back():
+            SampleTemplate.create(self.md, self.study)
+
+    def _extend(self):
+        with rolled_back():
+            self.template.extend(self.md_extend)
+
+    def _update(self):
+        with rolled_back():
+            self.template.update(self.md_update)
+
+    def time_create(self, scale):
+        self._create()
+
+    def peakmem_create(self, scale):
+        self._create()
+
+    def track_create_queries(self, scale):
+        return count_queries(self._create)
+
+    def time_extend(self, scale):
+        self._extend()
+
+    def peakmem_extend(self, scale):
+        self._extend()
+
+    def track_extend_queries(self, scale):
+        return count_queries(self._extend)
+
+    def time_update(self, scale):
+        self._update()
+
+    def peakmem_update(self, scale):
+        self._update()
+
+    def track_update_queries(self, scale):
+        return count_queries(self._update)
+
+    def time_to_dataframe(self, scale):
+        self.template.to_dataframe()
+
+    def peakmem_to_dataframe(self, scale):
+        self.template.to_dataframe()
+
+    def track_to_dataframe_queries(self, scale):
+        return count_queries(self.template.to_dataframe)
+
+    track_create_queries.unit = "queries"
+    track_extend_queries.unit = "queries"
+    track_update_queries.unit = "queries"
+    track_to_dataframe_queries.unit = "queries"
@@ -0,0 +1,44 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014--, The Qiita Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+import qiita_db as qdb
+
+from .common import ScaleSuite, artifacts, count_queries, rolled_back
+
+
+class ProcessingJobCreateSuite(ScaleSuite):
+    def setup(self, scale):
+        super().setup(scale)
+        software = qdb.software.Software.from_name_and_version(
+            *qdb.environment_manager.SYNTHETIC_SOFTWARE
+        )
+        command = software.get_command(qdb.environment_manager.SYNTHETIC_BIOM_CMD)
+        self.parameters = [
+            qdb.software.Parameters.from_default_params(
+                next(command.default_parameter_sets), {"input_data": a.id}
+            )
+            for a in artifacts(self.studies, "Demultiplexed")
+        ]
+
+    def _create(self):
+        with rolled_back():
+            for parameters in self.parameters:
+                qdb.processing_job.ProcessingJob.create(
+                    self.user, parameters, force=True
+                )
+
+    def time_create(self, scale):
+        self._create()
+
+    def peakmem_create(self, scale):
+        self._create()
+
+    def track_create_queries(self, scale):
+        return count_queries(self._create)
+
+    track_create_queries.unit = "queries"
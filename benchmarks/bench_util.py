@@ -0,0 +1,66 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014--, The Qiita Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+import qiita_db as qdb
+
+from .common import SCALES, ScaleSuite, artifacts, count_queries, populate
+
+
+class StudyListSuite(ScaleSuite):
+    def time_generate_study_list(self, scale):
+        qdb.util.generate_study_list(self.user, "user")
+
+    def peakmem_generate_study_list(self, scale):
+        qdb.util.generate_study_list(self.user, "user")
+
+    def track_generate_study_list_queries(self, scale):
+        return count_queries(qdb.util.generate_study_list, self.user, "user")
+
+    track_generate_study_list_queries.unit = "queries"
+
+
+class ArtifactsInformationSuite(ScaleSuite):
+    def setup(self, scale):
+        super().setup(scale)
+        self.artifact_ids = [a.id for a in artifacts(self.studies, "BIOM")]
+
+    def time_get_artifacts_information(self, scale):
+        qdb.util.get_artifacts_information(self.artifact_ids)
+
+    def peakmem_get_artifacts_information(self, scale):
+        qdb.util.get_artifacts_information(self.artifact_ids)
+
+    def track_get_artifacts_information_queries(self, scale):
+        return count_queries(qdb.util.get_artifacts_information, self.artifact_ids)
+
+    track_get_artifacts_information_queries.unit = "queries"
+
+
+class RedisStatsSuite(object):
+    """update_redis_stats summarizes the whole database
+
+    It runs with the data of all the scales, which are generated if needed so
+    the results don't depend on the suites that ran before.
+    """
+
+    timeout = 3600
+
+    def setup(self):
+        for scale in SCALES:
+            populate(scale)
+
+    def time_update_redis_stats(self):
+        qdb.meta_util.update_redis_stats()
+
+    def peakmem_update_redis_stats(self):
+        qdb.meta_util.update_redis_stats()
+
+    def track_update_redis_stats_queries(self):
+        return count_queries(qdb.meta_util.update_redis_stats)
+
+    track_update_redis_stats_queries.unit = "queries"
@@ -0,0 +1,120 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014--, The Qiita Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from contextlib import contextmanager
+
+import qiita_db as qdb
+from qiita_core.qiita_settings import qiita_config
+
+# The options passed to populate_synthetic_data for each data scale, each
+# scale has its own owner so the studies of a scale can be retrieved
+SCALES = {
+    "small": {
+        "n_studies": 5,
+        "n_samples": 50,
+        "n_columns": 20,
+        "n_features": 500,
+        "seed": 1,
+    },
+    "medium": {
+        "n_studies": 20,
+        "n_samples": 200,
+        "n_columns": 20,
+        "n_features": 2000,
+        "seed": 2,
+    },
+    "large": {
+        "n_studies": 50,
+        "n_samples": 1000,
+        "n_columns": 20,
+        "n_features": 5000,
+        "seed": 3,
+    },
+}
+
+
+def scale_user(scale):
+    """Returns the owner of the synthetic studies of `scale`"""
+    return qdb.user.User("benchmark.%s@foo.bar" % scale)
+
+
+def populate(scale):
+    """Adds the synthetic studies of `scale`, if not already present
+
+    Parameters
+    ----------
+    scale : str
+        One of SCALES
+
+    Returns
+    -------
+    list of qiita_db.study.Study
+        The studies of the scale, sorted by id
+    """
+    email = "benchmark.%s@foo.bar" % scale
+    if not qdb.user.User.exists(email):
+        qdb.user.User.create(email, "password")
+    studies = scale_user(scale).user_studies
+    if not studies:
+        studies = qdb.environment_manager.populate_synthetic_data(
+            user=email, **SCALES[scale]
+        )
+    return sorted(studies, key=lambda s: s.id)
+
+
+def artifacts(studies, artifact_type):
+    """Returns the artifacts of `artifact_type` in `studies`"""
+    return [a for s in studies for a in s.artifacts(artifact_type=artifact_type)]
+
+
+@contextmanager
+def rolled_back():
+    """Rolls back the changes done in the with block
+
+    Used to benchmark functions that modify the database so they can be
+    executed several times on the same data. Note that the files written to
+    disk are not removed.
+    """
+    with qdb.sql_connection.TRN:
+        try:
+            yield
+        finally:
+            qdb.sql_connection.TRN.rollback()
+
+
+def count_queries(func, *args, **kwargs):
+    """Returns the number of SQL statements executed by `func`
+
+    The profile is not stored, so the benchmarks don't fill the SQL profiles
+    shown to the admins
+    """
+    sql_profiling = qiita_config.sql_profiling
+    qiita_config.sql_profiling = True
+    try:
+        with qdb.sql_connection.profile_statements("benchmark", store=False) as profile:
+            func(*args, **kwargs)
+    finally:
+        qiita_config.sql_profiling = sql_profiling
+    return sum(s["calls"] for s in profile.statements.values())
+
+
+class ScaleSuite(object):
+    """Base class of the benchmarks that run at each data scale
+
+    The synthetic data of each scale is generated the first time that it's
+    needed and kept in the database for the next runs.
+    """
+
+    params = list(SCALES)
+    param_names = ["scale"]
+    # generating the large scale takes a while
+    timeout = 3600
+
+    def setup(self, scale):
+        self.studies = populate(scale)
+        self.user = scale_user(scale)
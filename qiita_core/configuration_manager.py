@@ -48,6 +48,9 @@ class ConfigurationManager(object):
     job_scheduler_dependency_q_cnt : int
         Hard upper-limit on the number of an artifact's concurrent validation
         processes.
+    job_scheduler_max_array_size : int
+        The max number of jobs submitted in a single job scheduler array, it
+        should not be larger than the MaxArraySize of the job scheduler
     user : str
         The postgres user
     password : str
@@ -126,6 +129,9 @@ class ConfigurationManager(object):
         The email address a user should write to when asking for help
     sysadmin_email : str
         The email address, Qiita sends internal notifications to a sys admin
+    sql_profiling : bool
+        Whether the SQL statements executed by each request and job are
+        profiled. Defaults to False
 
     Raises
     ------
@@ -282,6 +288,8 @@ class ConfigurationManager(object):
                 "are you sure this is OK?"
             )
 
+        self.sql_profiling = config.getboolean("main", "SQL_PROFILING", fallback=False)
+
     def _get_job_scheduler(self, config):
         """Get the configuration of the job_scheduler section"""
         self.job_scheduler_owner = config.get(
@@ -302,6 +310,10 @@ class ConfigurationManager(object):
                 self.job_scheduler_dependency_q_cnt
             )
 
+        self.job_scheduler_max_array_size = config.getint(
+            "job_scheduler", "JOB_SCHEDULER_MAX_ARRAY_SIZE", fallback=1000
+        )
+
     def _get_postgres(self, config):
         """Get the configuration of the postgres section"""
         self.user = config.get("postgres", "USER")
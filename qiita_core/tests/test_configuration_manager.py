@@ -58,11 +58,13 @@ class ConfigurationManagerTests(TestCase):
         self.assertEqual(obs.certificate_file, "/tmp/server.cert")
         self.assertEqual(obs.cookie_secret, "SECRET")
         self.assertEqual(obs.key_file, "/tmp/server.key")
+        self.assertFalse(obs.sql_profiling)
 
         # job_scheduler section
         self.assertEqual(obs.job_scheduler_owner, "user@somewhere.org")
         self.assertEqual(obs.job_scheduler_poll_val, 15)
         self.assertEqual(obs.job_scheduler_dependency_q_cnt, 2)
+        self.assertEqual(obs.job_scheduler_max_array_size, 1000)
 
         # Postgres section
         self.assertEqual(obs.user, "postgres")
@@ -186,6 +188,15 @@ class ConfigurationManagerTests(TestCase):
 
         self.assertEqual(obs.qiita_env, "")
 
+        # SQL_PROFILING is optional
+        conf_setter("VALID_UPLOAD_EXTENSION", "fastq")
+        conf_setter("SQL_PROFILING", "True")
+        obs._get_main(self.conf)
+        self.assertTrue(obs.sql_profiling)
+        self.conf.remove_option("main", "SQL_PROFILING")
+        obs._get_main(self.conf)
+        self.assertFalse(obs.sql_profiling)
+
     def test_help_email(self):
         obs = ConfigurationManager()
 
@@ -223,6 +234,11 @@ class ConfigurationManagerTests(TestCase):
         obs._get_job_scheduler(self.conf)
         self.assertEqual("", obs.job_scheduler_owner)
 
+        # the max array size is optional
+        self.conf.remove_option("job_scheduler", "JOB_SCHEDULER_MAX_ARRAY_SIZE")
+        obs._get_job_scheduler(self.conf)
+        self.assertEqual(obs.job_scheduler_max_array_size, 1000)
+
     def test_get_postgres(self):
         obs = ConfigurationManager()
 
@@ -356,6 +372,10 @@ HELP_EMAIL = foo@bar.com
 # The email address, Qiita sends internal notifications to a sys admin
 SYSADMIN_EMAIL = jeff@bar.com
 
+# Whether the SQL statements executed by each request and job are profiled,
+# the reports are available to the admins in /admin/sql_profiles/
+SQL_PROFILING = False
+
 # ----------------------------- SMTP settings -----------------------------
 [smtp]
 # The hostname to connect to
@@ -422,6 +442,9 @@ JOB_SCHEDULER_POLLING_VALUE = 15
 # Hard upper-limit on concurrently running validator jobs
 JOB_SCHEDULER_PROCESSING_QUEUE_COUNT = 2
 
+# The max number of jobs submitted in a single job array
+JOB_SCHEDULER_MAX_ARRAY_SIZE = 1000
+
 # ----------------------------- EBI settings -----------------------------
 [ebi]
 # The user to use when submitting to EBI
@@ -490,10 +490,9 @@ class Analysis(qdb.base.QiitaObject):
                      FROM qiita.analysis_artifact
                      WHERE analysis_id = %s"""
             qdb.sql_connection.TRN.add(sql, [self.id])
-            return [
-                qdb.artifact.Artifact(aid)
-                for aid in qdb.sql_connection.TRN.execute_fetchflatten()
-            ]
+            return qdb.artifact.Artifact.from_trusted_ids(
+                qdb.sql_connection.TRN.execute_fetchflatten()
+            )
 
     @property
     def mapping_file(self):
@@ -1179,64 +1178,137 @@ class Analysis(qdb.base.QiitaObject):
 
     def _build_mapping_file(self, samples, rename_dup_samples=False, categories=None):
         """Builds the combined mapping file for all samples
-        Code modified slightly from qiime.util.MetadataMap.__add__"""
+        Code modified slightly from qiime.util.MetadataMap.__add__
+
+        Notes
+        -----
+        Only the requested samples and categories are retrieved from the
+        DB, each sample and prep information is retrieved once, for all the
+        artifacts using it, and dropped once it's no longer needed; while the
+        mapping file is written one artifact at a time.
+        """
         with qdb.sql_connection.TRN:
-            all_ids = set()
-            to_concat = []
-            sample_infos = dict()
-            for aid, samps in samples.items():
-                artifact = qdb.artifact.Artifact(aid)
-                si = artifact.study.sample_template
-                if si not in sample_infos:
-                    si_df = si.to_dataframe()
-                    if categories is not None:
-                        si_df = si_df[list(set(categories) & set(si_df.columns))]
-                    sample_infos[si] = si_df
-                pt = artifact.prep_templates[0]
-                pt_df = pt.to_dataframe()
-                if categories is not None:
-                    pt_df = pt_df[list(set(categories) & set(pt_df.columns))]
+            aids = list(samples)
+            # the prep, study and study descriptive columns of all artifacts
+            sql = """SELECT artifact_id, prep_template_id, deprecated,
+                            study_id, study_title, study_alias,
+                            qu.name AS owner, sp.name AS pi
+                     FROM qiita.preparation_artifact
+                        JOIN qiita.prep_template USING (prep_template_id)
+                        JOIN qiita.study_artifact USING (artifact_id)
+                        JOIN qiita.study USING (study_id)
+                        JOIN qiita.qiita_user qu USING (email)
+                        JOIN qiita.study_person sp ON (
+                            principal_investigator_id = sp.study_person_id)
+                     WHERE artifact_id IN %s"""
+            qdb.sql_connection.TRN.add(sql, [tuple(aids)])
+            info = {
+                r["artifact_id"]: r for r in qdb.sql_connection.TRN.execute_fetchindex()
+            }
+
+            # the samples needed from each sample/prep info and the last
+            # artifact using them, so they can be released
+            needed = defaultdict(set)
+            last_use = {}
+            for aid in aids:
+                for key in (
+                    ("st", info[aid]["study_id"]),
+                    ("pt", info[aid]["prep_template_id"]),
+                ):
+                    needed[key].update(samples[aid])
+                    last_use[key] = aid
 
-                qm = pt_df.join(sample_infos[si], lsuffix="_prep")
+            def _columns(key):
+                columns = templates[key].categories + [
+                    "qiita_study_id" if key[0] == "st" else "qiita_prep_id"
+                ]
+                if categories is not None:
+                    columns = [c for c in columns if c in categories]
+                return columns
 
-                # if we are not going to merge the duplicated samples
-                # append the aid to the sample name
-                qm["qiita_artifact_id"] = aid
-                qm["qiita_prep_deprecated"] = pt.deprecated
+            # the columns of the final file; the prep/sample info are joined
+            # as empty frames so the column names match the per artifact ones
+            templates = {}
+            header = []
+            for aid in aids:
+                st_key = ("st", info[aid]["study_id"])
+                pt_key = ("pt", info[aid]["prep_template_id"])
+                if st_key not in templates:
+                    templates[st_key] = (
+                        qdb.metadata_template.sample_template.SampleTemplate(st_key[1])
+                    )
+                if pt_key not in templates:
+                    templates[pt_key] = (
+                        qdb.metadata_template.prep_template.PrepTemplate(pt_key[1])
+                    )
+                columns = (
+                    pd.DataFrame(columns=_columns(pt_key))
+                    .join(pd.DataFrame(columns=_columns(st_key)), lsuffix="_prep")
+                    .columns.tolist()
+                )
+                columns.extend(["qiita_artifact_id", "qiita_prep_deprecated"])
                 if rename_dup_samples:
-                    qm["original_SampleID"] = qm.index
-                    qm["#SampleID"] = "%d." % aid + qm.index
-                    samps = set(["%d.%s" % (aid, _id) for _id in samps])
-                    qm.set_index("#SampleID", inplace=True, drop=True)
-                else:
-                    samps = set(samps) - all_ids
-                    all_ids.update(samps)
-
-                # appending study metadata to the analysis
-                study = qdb.artifact.Artifact(aid).study
-                study_owner = study.owner
-                study_info = study.info
-                pi = study_info["principal_investigator"]
-                qm["qiita_study_title"] = study.title
-                qm["qiita_study_alias"] = study.info["study_alias"]
-                qm["qiita_owner"] = study_owner.info["name"]
-                qm["qiita_principal_investigator"] = pi.name
-
-                qm = qm.loc[list(samps)]
-                to_concat.append(qm)
-
-            merged_map = pd.concat(to_concat)
+                    columns.append("original_SampleID")
+                columns.extend(
+                    [
+                        "qiita_study_title",
+                        "qiita_study_alias",
+                        "qiita_owner",
+                        "qiita_principal_investigator",
+                    ]
+                )
+                header.extend(c for c in columns if c not in header)
 
             # Save the mapping file
             _, base_fp = qdb.util.get_mountpoint(self._table)[0]
             mapping_fp = join(base_fp, "%d_analysis_mapping.txt" % self._id)
-            merged_map.to_csv(
-                mapping_fp,
-                index_label="#SampleID",
-                na_rep="unknown",
-                sep="\t",
-                encoding="utf-8",
-            )
+            kwargs = {"na_rep": "unknown", "sep": "\t"}
+            all_ids = set()
+            frames = {}
+            with open(mapping_fp, "w", encoding="utf-8") as f:
+                pd.DataFrame(columns=header).to_csv(
+                    f, index_label="#SampleID", **kwargs
+                )
+                for aid in aids:
+                    ainfo = info[aid]
+                    samps = samples[aid]
+                    st_key = ("st", ainfo["study_id"])
+                    pt_key = ("pt", ainfo["prep_template_id"])
+                    for key in (st_key, pt_key):
+                        if key not in frames:
+                            frames[key] = templates[key].to_dataframe(
+                                samples=needed[key],
+                                columns=None if categories is None else _columns(key),
+                            )
+
+                    qm = frames[pt_key].join(frames[st_key], lsuffix="_prep")
+
+                    # if we are not going to merge the duplicated samples
+                    # append the aid to the sample name
+                    qm["qiita_artifact_id"] = aid
+                    qm["qiita_prep_deprecated"] = ainfo["deprecated"]
+                    if rename_dup_samples:
+                        qm["original_SampleID"] = qm.index
+                        qm["#SampleID"] = "%d." % aid + qm.index
+                        samps = set(["%d.%s" % (aid, _id) for _id in samps])
+                        qm.set_index("#SampleID", inplace=True, drop=True)
+                    else:
+                        samps = set(samps) - all_ids
+                        all_ids.update(samps)
+
+                    # appending study metadata to the analysis
+                    qm["qiita_study_title"] = ainfo["study_title"]
+                    qm["qiita_study_alias"] = ainfo["study_alias"]
+                    qm["qiita_owner"] = ainfo["owner"]
+                    qm["qiita_principal_investigator"] = ainfo["pi"]
+
+                    qm = qm.loc[list(samps)].reindex(columns=header)
+                    qm.to_csv(f, header=False, **kwargs)
+
+                    # releasing the info that is no longer needed
+                    for key in (st_key, pt_key):
+                        if last_use[key] == aid:
+                            del frames[key]
 
             self._add_file("%d_analysis_mapping.txt" % self._id, "plain_text")
 
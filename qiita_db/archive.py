@@ -5,6 +5,9 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
+from csv import writer as csv_writer
+from io import StringIO
+
 import qiita_db as qdb
 
 
@@ -16,6 +19,7 @@ class Archive(qdb.base.QiitaObject):
     insert_from_artifact
     get_merging_scheme_from_job
     retrieve_feature_values
+    iter_feature_values
     insert_features
 
     See Also
@@ -57,10 +61,31 @@ class Archive(qdb.base.QiitaObject):
             qdb.sql_connection.TRN.add(sql, [ms])
             amsi = qdb.sql_connection.TRN.execute_fetchlast()
 
-            vals = [[amsi, _id, val] for _id, val in features.items()]
-            qdb.sql_connection.TRN.add(
-                "SELECT archive_upsert(%s, %s, %s)", vals, many=True
-            )
+            # the features are staged with COPY and merged with a single
+            # statement, instead of one archive_upsert call per feature
+            buffr = StringIO()
+            csv_writer(buffr).writerows(features.items())
+            buffr.seek(0)
+            sql = """CREATE TEMP TABLE archive_feature_staging (
+                        archive_feature VARCHAR,
+                        archive_feature_value VARCHAR) ON COMMIT DROP"""
+            qdb.sql_connection.TRN.add(sql)
+            # csv writes empty strings as unquoted empty fields, which COPY
+            # would read as NULL
+            sql = """COPY archive_feature_staging FROM STDIN WITH (
+                        FORMAT csv,
+                        FORCE_NOT_NULL (archive_feature, archive_feature_value))"""
+            qdb.sql_connection.TRN.copy_expert(sql, buffr)
+            sql = """INSERT INTO qiita.archive_feature_value (
+                        archive_merging_scheme_id, archive_feature,
+                        archive_feature_value)
+                     SELECT %s, archive_feature, archive_feature_value
+                     FROM archive_feature_staging
+                     ON CONFLICT (archive_merging_scheme_id, archive_feature_hash)
+                     DO UPDATE SET
+                        archive_feature_value = EXCLUDED.archive_feature_value"""
+            qdb.sql_connection.TRN.add(sql, [amsi])
+            qdb.sql_connection.TRN.add("DROP TABLE archive_feature_staging")
             qdb.sql_connection.TRN.execute()
 
     @classmethod
@@ -177,17 +202,16 @@ class Archive(qdb.base.QiitaObject):
                 extras.append("""archive_merging_scheme = %s""")
                 vals.append(archive_merging_scheme)
             if features is not None:
-                extras.append("""archive_feature IN %s""")
+                # the features are looked up by their hash, see patch 100.sql
+                extras.append(
+                    """archive_feature_hash IN (
+                        SELECT md5(f)::uuid FROM unnest(%s::varchar[]) f)"""
+                )
                 # depending on the method calling test retrieve_feature_values
                 # the features elements can be string or bytes; making sure
                 # everything is string for SQL
                 vals.append(
-                    tuple(
-                        [
-                            f.decode("ascii") if isinstance(f, bytes) else f
-                            for f in features
-                        ]
-                    )
+                    [f.decode("ascii") if isinstance(f, bytes) else f for f in features]
                 )
 
             sql = """SELECT archive_feature, archive_feature_value
@@ -204,6 +228,35 @@ class Archive(qdb.base.QiitaObject):
 
             return dict(qdb.sql_connection.TRN.execute_fetchindex())
 
+    @classmethod
+    def iter_feature_values(cls, archive_merging_scheme, features, chunk_size=10000):
+        r"""Retrieves the features/values from the archive in chunks
+
+        Parameters
+        ----------
+        archive_merging_scheme : str
+            The name of the archive_merging_scheme to retrieve
+        features : list of str
+            List of features to retrieve information from the archive
+        chunk_size : int, optional
+            The number of features retrieved at once. Default 10000
+
+        Returns
+        -------
+        generator of dict, feature: value
+            The features found in each of the chunks of `features`
+
+        See Also
+        --------
+        retrieve_feature_values
+        """
+        features = list(features)
+        for i in range(0, len(features), chunk_size):
+            yield cls.retrieve_feature_values(
+                archive_merging_scheme=archive_merging_scheme,
+                features=features[i : i + chunk_size],
+            )
+
     @classmethod
     def insert_features(cls, merging_scheme, features):
         r"""Inserts new features to the database based on a given artifact
@@ -199,6 +199,7 @@ class Artifact(qdb.base.QiitaObject):
                         (data_type, mountpoint, subdirectory, active)
                         VALUES (%s, %s, %s, %s)"""
             qdb.sql_connection.TRN.add(sql, [name, mp, True, True])
+            qdb.util.invalidate_lookup_cache()
 
             # We are intersted in the dirpath
             create_nested_path(qdb.util.get_mountpoint(name)[0][1])
@@ -221,6 +222,11 @@ class Artifact(qdb.base.QiitaObject):
         qiita_db.artifact.Artifact
             A new instance of Artifact
         """
+        # the checksums are computed before opening the transaction as this
+        # can take a while for large files
+        filepaths = [(x["fp"], x["fp_type"]) for x in artifact.filepaths]
+        checksums = qdb.util.compute_checksums([fp for fp, _ in filepaths])
+
         with qdb.sql_connection.TRN:
             visibility_id = qdb.util.convert_to_id("sandbox", "visibility")
             atype = artifact.artifact_type
@@ -253,8 +259,9 @@ class Artifact(qdb.base.QiitaObject):
             qdb.sql_connection.TRN.add(sql, sql_args)
 
             # Associate the artifact with its filepaths
-            filepaths = [(x["fp"], x["fp_type"]) for x in artifact.filepaths]
-            fp_ids = qdb.util.insert_filepaths(filepaths, a_id, atype, copy=True)
+            fp_ids = qdb.util.insert_filepaths(
+                filepaths, a_id, atype, copy=True, checksums=checksums
+            )
             sql = """INSERT INTO qiita.artifact_filepath
                         (artifact_id, filepath_id)
                      VALUES (%s, %s)"""
@@ -432,6 +439,10 @@ class Artifact(qdb.base.QiitaObject):
             sql_args = [analysis_id, instance.id]
             qdb.sql_connection.perform_as_transaction(sql, sql_args)
 
+        # the checksums are computed before opening the transaction as this
+        # can take a while for large files
+        checksums = qdb.util.compute_checksums([fp for fp, _ in filepaths])
+
         with qdb.sql_connection.TRN:
             if parents:
                 dtypes = {p.data_type for p in parents}
@@ -537,6 +548,7 @@ class Artifact(qdb.base.QiitaObject):
                 artifact_type,
                 move_files=move_files,
                 copy=(not move_files),
+                checksums=checksums,
             )
             sql = """INSERT INTO qiita.artifact_filepath
                         (artifact_id, filepath_id)
@@ -547,6 +559,11 @@ class Artifact(qdb.base.QiitaObject):
             if name:
                 instance.name = name
 
+            qdb.util.invalidate_network_cache(artifact_ids=[instance.id])
+
+            # the merging scheme only depends on values set during creation
+            instance._update_merging_scheme()
+
         return instance
 
     @classmethod
@@ -642,6 +659,10 @@ class Artifact(qdb.base.QiitaObject):
                         "uses this artifact or one of it's children",
                     )
 
+            # the networks need to be invalidated while the artifacts are
+            # still linked to their preps/analyses
+            qdb.util.invalidate_network_cache(artifact_ids=all_ids)
+
             # We can now remove the artifacts
             filepaths = [f for a in all_artifacts for f in a.filepaths]
             study = instance.study
@@ -826,10 +847,12 @@ class Artifact(qdb.base.QiitaObject):
         ValueError
             If `value` contains more than 35 chars
         """
-        sql = """UPDATE qiita.artifact
-                 SET name = %s
-                 WHERE artifact_id = %s"""
-        qdb.sql_connection.perform_as_transaction(sql, [value, self.id])
+        with qdb.sql_connection.TRN:
+            sql = """UPDATE qiita.artifact
+                     SET name = %s
+                     WHERE artifact_id = %s"""
+            qdb.sql_connection.TRN.add(sql, [value, self.id])
+            qdb.util.invalidate_network_cache(artifact_ids=[self.id])
 
     @property
     def timestamp(self):
@@ -903,10 +926,12 @@ class Artifact(qdb.base.QiitaObject):
         else:
             ids = [self.id]
 
-        sql = """UPDATE qiita.artifact
-                 SET visibility_id = %s
-                 WHERE artifact_id IN %s"""
-        qdb.sql_connection.perform_as_transaction(sql, [vis_id, tuple(ids)])
+        with qdb.sql_connection.TRN:
+            sql = """UPDATE qiita.artifact
+                     SET visibility_id = %s
+                     WHERE artifact_id IN %s"""
+            qdb.sql_connection.TRN.add(sql, [vis_id, tuple(ids)])
+            qdb.util.invalidate_network_cache(artifact_ids=ids)
 
     @visibility.setter
     def visibility(self, value):
@@ -1269,9 +1294,9 @@ class Artifact(qdb.base.QiitaObject):
                      FROM qiita.parent_artifact
                      WHERE artifact_id = %s"""
             qdb.sql_connection.TRN.add(sql, [self.id])
-            return [
-                Artifact(p_id) for p_id in qdb.sql_connection.TRN.execute_fetchflatten()
-            ]
+            return Artifact.from_trusted_ids(
+                qdb.sql_connection.TRN.execute_fetchflatten()
+            )
 
     def _create_lineage_graph_from_edge_list(self, edge_list):
         """Generates an artifact graph from the given `edge_list`
@@ -1290,9 +1315,8 @@ class Artifact(qdb.base.QiitaObject):
         # In case the edge list is empty, only 'self' is present in the graph
         if edge_list:
             # By creating all the artifacts here we are saving DB calls
-            nodes = {
-                a_id: Artifact(a_id) for a_id in set(chain.from_iterable(edge_list))
-            }
+            a_ids = set(chain.from_iterable(edge_list))
+            nodes = dict(zip(a_ids, Artifact.from_trusted_ids(a_ids)))
 
             for parent, child in edge_list:
                 lineage.add_edge(nodes[parent], nodes[child])
@@ -1359,11 +1383,14 @@ class Artifact(qdb.base.QiitaObject):
             def _helper(sql_edges, edges, nodes):
                 for jid, pid, cid in sql_edges:
                     if jid not in nodes:
-                        nodes[jid] = ("job", qdb.processing_job.ProcessingJob(jid))
+                        nodes[jid] = (
+                            "job",
+                            qdb.processing_job.ProcessingJob.from_trusted_id(jid),
+                        )
                     if pid not in nodes:
-                        nodes[pid] = ("artifact", qdb.artifact.Artifact(pid))
+                        nodes[pid] = ("artifact", Artifact.from_trusted_id(pid))
                     if cid not in nodes:
-                        nodes[cid] = ("artifact", qdb.artifact.Artifact(cid))
+                        nodes[cid] = ("artifact", Artifact.from_trusted_id(cid))
                     edges.add((nodes[pid], nodes[jid]))
                     edges.add((nodes[jid], nodes[cid]))
 
@@ -1505,9 +1532,9 @@ class Artifact(qdb.base.QiitaObject):
                      FROM qiita.parent_artifact
                      WHERE parent_id = %s"""
             qdb.sql_connection.TRN.add(sql, [self.id])
-            return [
-                Artifact(c_id) for c_id in qdb.sql_connection.TRN.execute_fetchflatten()
-            ]
+            return Artifact.from_trusted_ids(
+                qdb.sql_connection.TRN.execute_fetchflatten()
+            )
 
     @property
     def youngest_artifact(self):
@@ -1533,7 +1560,7 @@ class Artifact(qdb.base.QiitaObject):
             # return an empty list, so the youngest artifact in the lineage is
             # the current artifact. On the other hand, if it has descendants,
             # the id of the youngest artifact will be in a_id[0][0]
-            result = Artifact(a_id[0][0]) if a_id else self
+            result = Artifact.from_trusted_id(a_id[0][0]) if a_id else self
 
         return result
 
@@ -1550,10 +1577,11 @@ class Artifact(qdb.base.QiitaObject):
                      FROM qiita.preparation_artifact
                      WHERE artifact_id = %s"""
             qdb.sql_connection.TRN.add(sql, [self.id])
-            templates = [
-                qdb.metadata_template.prep_template.PrepTemplate(pt_id)
-                for pt_id in qdb.sql_connection.TRN.execute_fetchflatten()
-            ]
+            templates = (
+                qdb.metadata_template.prep_template.PrepTemplate.from_trusted_ids(
+                    qdb.sql_connection.TRN.execute_fetchflatten()
+                )
+            )
 
         if len(templates) > 1:
             # We never expect an artifact to be associated with multiple
@@ -1598,9 +1626,8 @@ class Artifact(qdb.base.QiitaObject):
             res = qdb.sql_connection.TRN.execute_fetchindex()
             return qdb.analysis.Analysis(res[0][0]) if res else None
 
-    @property
-    def merging_scheme(self):
-        """The merging scheme of this artifact_type
+    def _generate_merging_scheme(self):
+        """Generates the merging scheme of this (non archived) artifact
 
         Returns
         -------
@@ -1608,60 +1635,153 @@ class Artifact(qdb.base.QiitaObject):
             The human readable merging scheme and the parent software
             information for this artifact
         """
-        vid = qdb.util.convert_to_id(self.visibility, "visibility")
-        if vid in qdb.util.artifact_visibilities_to_skip():
-            with qdb.sql_connection.TRN:
-                sql = f"""SELECT archive_data
-                          FROM qiita.{self._table}
-                          WHERE artifact_id = %s"""
-                qdb.sql_connection.TRN.add(sql, [self.id])
-                archive_data = qdb.sql_connection.TRN.execute_fetchlast()
-            merging_schemes = [archive_data["merging_scheme"][0]]
-            parent_softwares = [archive_data["merging_scheme"][1]]
-        else:
-            processing_params = self.processing_parameters
-            if processing_params is None:
-                return "", ""
-
-            cmd_name = processing_params.command.name
-            ms = processing_params.command.merging_scheme
-            afps = [x["fp"] for x in self.filepaths if x["fp"].endswith("biom")]
-
-            merging_schemes = []
-            parent_softwares = []
-            # this loop is necessary as in theory an artifact can be
-            # generated from multiple prep info files
-            for p in self.parents:
-                pparent = p.processing_parameters
-                # if parent is None, then is a direct upload; for example
-                # per_sample_FASTQ in shotgun data
-                if pparent is None:
-                    parent_cmd_name = None
-                    parent_merging_scheme = None
-                    parent_pp = None
-                    parent_software = "N/A"
-                else:
-                    parent_cmd_name = pparent.command.name
-                    parent_merging_scheme = pparent.command.merging_scheme
-                    parent_pp = pparent.values
-                    psoftware = pparent.command.software
-                    parent_software = "%s v%s" % (psoftware.name, psoftware.version)
-
-                merging_schemes.append(
-                    qdb.util.human_merging_scheme(
-                        cmd_name,
-                        ms,
-                        parent_cmd_name,
-                        parent_merging_scheme,
-                        processing_params.values,
-                        afps,
-                        parent_pp,
-                    )
+        processing_params = self.processing_parameters
+        if processing_params is None:
+            return "", ""
+
+        cmd_name = processing_params.command.name
+        ms = processing_params.command.merging_scheme
+        afps = [x["fp"] for x in self.filepaths if x["fp"].endswith("biom")]
+
+        merging_schemes = []
+        parent_softwares = []
+        # this loop is necessary as in theory an artifact can be
+        # generated from multiple prep info files
+        for p in self.parents:
+            pparent = p.processing_parameters
+            # if parent is None, then is a direct upload; for example
+            # per_sample_FASTQ in shotgun data
+            if pparent is None:
+                parent_cmd_name = None
+                parent_merging_scheme = None
+                parent_pp = None
+                parent_software = "N/A"
+            else:
+                parent_cmd_name = pparent.command.name
+                parent_merging_scheme = pparent.command.merging_scheme
+                parent_pp = pparent.values
+                psoftware = pparent.command.software
+                parent_software = "%s v%s" % (psoftware.name, psoftware.version)
+
+            merging_schemes.append(
+                qdb.util.human_merging_scheme(
+                    cmd_name,
+                    ms,
+                    parent_cmd_name,
+                    parent_merging_scheme,
+                    processing_params.values,
+                    afps,
+                    parent_pp,
                 )
-                parent_softwares.append(parent_software)
+            )
+            parent_softwares.append(parent_software)
 
         return ", ".join(merging_schemes), ", ".join(parent_softwares)
 
+    def _update_merging_scheme(self):
+        """Generates and stores the merging scheme of this artifact
+
+        Returns
+        -------
+        str, str
+            The human readable merging scheme and the parent software
+            information for this artifact
+        """
+        with qdb.sql_connection.TRN:
+            merging_scheme = self._generate_merging_scheme()
+            sql = """UPDATE qiita.artifact
+                     SET merging_scheme = %s
+                     WHERE artifact_id = %s"""
+            qdb.sql_connection.TRN.add(sql, [dumps(merging_scheme), self.id])
+            qdb.sql_connection.TRN.execute()
+        return merging_scheme
+
+    @classmethod
+    def update_merging_schemes(cls):
+        """Stores the merging schemes of the artifacts that don't have it
+
+        Returns
+        -------
+        int
+            The number of artifacts updated
+
+        Notes
+        -----
+        The stored merging schemes are reset by the database when the
+        merging scheme of a command or the name or version of a software
+        change, see patch 96.sql; this method generates them again. It's
+        executed after applying the patches and by `qiita-cron-job
+        update-merging-schemes`, for the changes done directly in the database
+        """
+        with qdb.sql_connection.TRN:
+            sql = """SELECT artifact_id
+                     FROM qiita.artifact
+                     WHERE merging_scheme IS NULL
+                        AND visibility_id NOT IN %s
+                     ORDER BY artifact_id"""
+            qdb.sql_connection.TRN.add(sql, [qdb.util.artifact_visibilities_to_skip()])
+            artifact_ids = qdb.sql_connection.TRN.execute_fetchflatten()
+            for aid in artifact_ids:
+                cls(aid)._update_merging_scheme()
+
+        return len(artifact_ids)
+
+    @classmethod
+    def merging_schemes(cls, artifact_ids):
+        """The merging schemes of multiple artifacts
+
+        Parameters
+        ----------
+        artifact_ids : iterable of int
+            The artifact ids. Non-existing ids will be ignored
+
+        Returns
+        -------
+        dict of {int: (str, str)}
+            The human readable merging scheme and the parent software
+            information, keyed by artifact id
+
+        Notes
+        -----
+        The merging schemes are stored in the database when the artifacts are
+        created. If the stored value was reset, because the merging scheme of
+        its command changed, it is generated on each request (without storing
+        it) until update_merging_schemes is executed
+        """
+        artifact_ids = tuple(artifact_ids)
+        if not artifact_ids:
+            return {}
+
+        with qdb.sql_connection.TRN:
+            sql = """SELECT artifact_id, visibility_id, merging_scheme,
+                            archive_data
+                     FROM qiita.artifact
+                     WHERE artifact_id IN %s"""
+            qdb.sql_connection.TRN.add(sql, [artifact_ids])
+            rows = qdb.sql_connection.TRN.execute_fetchindex()
+            vids = qdb.util.artifact_visibilities_to_skip()
+            results = {}
+            for aid, vid, ms, archive_data in rows:
+                if vid in vids:
+                    ms = archive_data["merging_scheme"]
+                elif ms is None:
+                    ms = cls(aid)._generate_merging_scheme()
+                results[aid] = tuple(ms)
+
+        return results
+
+    @property
+    def merging_scheme(self):
+        """The merging scheme of this artifact_type
+
+        Returns
+        -------
+        str, str
+            The human readable merging scheme and the parent software
+            information for this artifact
+        """
+        return self.merging_schemes([self.id])[self.id]
+
     @property
     def being_deleted_by(self):
         """The running job that is deleting this artifact
@@ -1756,10 +1876,9 @@ class Artifact(qdb.base.QiitaObject):
                 sql_args.append(False)
 
             qdb.sql_connection.TRN.add(sql, sql_args)
-            return [
-                qdb.processing_job.ProcessingJob(jid)
-                for jid in qdb.sql_connection.TRN.execute_fetchflatten()
-            ]
+            return qdb.processing_job.ProcessingJob.from_trusted_ids(
+                qdb.sql_connection.TRN.execute_fetchflatten()
+            )
 
     @property
     def get_commands(self):
@@ -45,6 +45,8 @@ class QiitaObject(object):
     create
     delete
     exists
+    from_trusted_id
+    from_trusted_ids
     _check_subclass
     _check_id
     __eq__
@@ -97,6 +99,52 @@ class QiitaObject(object):
         """
         raise qdb.exceptions.QiitaDBNotImplementedError()
 
+    @classmethod
+    def from_trusted_id(cls, id_):
+        r"""Instantiates the object `id_` without validating it
+
+        Parameters
+        ----------
+        id_ : int or str
+            The object identifier
+
+        Returns
+        -------
+        QiitaObject
+            The object
+
+        Notes
+        -----
+        The id is not checked to exist nor to be accessible in the current
+        portal, so this should only be used with ids just retrieved from the
+        database by a query that already guarantees both, e.g. the artifacts
+        of a study that has been instantiated.
+        """
+        cls._check_subclass()
+        obj = cls.__new__(cls)
+        obj._id = id_
+        return obj
+
+    @classmethod
+    def from_trusted_ids(cls, ids):
+        r"""Instantiates the objects of `ids` without validating them
+
+        Parameters
+        ----------
+        ids : iterable of int or str
+            The object identifiers
+
+        Returns
+        -------
+        list of QiitaObject
+            The objects, in the same order as `ids`
+
+        See Also
+        --------
+        from_trusted_id
+        """
+        return [cls.from_trusted_id(id_) for id_ in ids]
+
     @classmethod
     def _check_subclass(cls):
         r"""Check that we are not calling a function that needs to access the
@@ -7,14 +7,22 @@
 # -----------------------------------------------------------------------------
 
 import gzip
+import warnings
 from functools import partial
 from glob import glob
+from json import dumps
 from os import mkdir
 from os.path import abspath, basename, dirname, exists, join, splitext
-from shutil import copytree
+from shutil import copytree, rmtree
+from tempfile import mkdtemp
 from urllib.request import urlretrieve
 
+import numpy as np
+import pandas as pd
+from biom import Table
+from biom.util import biom_open
 from natsort import natsorted
+from scipy.sparse import random as sparse_random
 
 import qiita_db as qdb
 from qiita_core.exceptions import QiitaEnvironmentError
@@ -366,6 +374,7 @@ def drop_and_rebuild_tst_database(drop_labcontrol=False):
     """
     with qdb.sql_connection.TRN:
         r_client.flushdb()
+        qdb.util.invalidate_lookup_cache()
         # Drop the schema, note that we are also going to drop labman because
         # if not it will raise an error if you have both systems on your
         # computer due to foreing keys
@@ -453,7 +462,8 @@ def patch(patches_dir=PATCHES_DIR, verbose=False, test=False):
     create_mountpoints()
 
     patch_update_sql = "UPDATE settings SET current_patch = %s"
-    for sql_patch_fp in sql_patch_files[next_patch_index:]:
+    new_patches = sql_patch_files[next_patch_index:]
+    for sql_patch_fp in new_patches:
         sql_patch_filename = basename(sql_patch_fp)
 
         patch_prefix = splitext(basename(sql_patch_fp))[0]
@@ -474,6 +484,8 @@ def patch(patches_dir=PATCHES_DIR, verbose=False, test=False):
                     qdb.sql_connection.TRN.add(test_sql.read())
 
             qdb.sql_connection.TRN.execute()
+            # the patches can modify the tables behind the cached lookups
+            qdb.util.invalidate_lookup_cache()
 
             if exists(py_patch_fp):
                 if verbose:
@@ -486,5 +498,283 @@ def patch(patches_dir=PATCHES_DIR, verbose=False, test=False):
         # for the test Study (1) so a lot of the tests actually expect this.
         # Now, trying to regenerate directly in the populate_test_db might
         # require too many dev hours so the easiest is just do it here
+
+    # the patches can change the merging scheme of the commands, which resets
+    # the merging scheme stored in the artifacts (see 96.sql)
+    if new_patches:
+        qdb.artifact.Artifact.update_merging_schemes()
+
     if test:
         qdb.study.Study(1).sample_template.generate_files()
+
+
+# The software and commands used to generate the synthetic artifact lineages,
+# they are part of the test database
+SYNTHETIC_SOFTWARE = ("QIIME", "1.9.1")
+SYNTHETIC_DEMUX_CMD = "Split libraries FASTQ"
+SYNTHETIC_BIOM_CMD = "Pick closed-reference OTUs"
+SYNTHETIC_JOB_STATUSES = ["success", "error", "queued", "waiting", "in_construction"]
+SYNTHETIC_VISIBILITIES = ["sandbox", "private", "public"]
+SYNTHETIC_PREP_COLUMNS = {
+    "center_name": "ANL",
+    "primer": "GTGCCAGCMGCCGCGGTAA",
+    "platform": "Illumina",
+    "instrument_model": "Illumina MiSeq",
+    "library_construction_protocol": "synthetic",
+    "target_subfragment": "V4",
+    "target_gene": "16S rRNA",
+    "experiment_design_description": "synthetic",
+}
+
+
+def _random_sequences(rng, n, length):
+    """Returns `n` random DNA sequences of the given `length`"""
+    return ["".join(seq) for seq in rng.choice(list("ACGT"), size=(n, length))]
+
+
+def _synthetic_sample_template(rng, n_samples, n_columns):
+    """Returns the sample information of a synthetic study"""
+    samples = ["synthetic.%d" % i for i in range(n_samples)]
+    md = {
+        "description": ["Synthetic sample %d" % i for i in range(n_samples)],
+        "sample_type": rng.choice(["stool", "skin", "saliva"], n_samples),
+        "host_subject_id": ["subject.%d" % i for i in rng.randint(0, 50, n_samples)],
+        "scientific_name": "human gut metagenome",
+        "taxon_id": "408170",
+        "collection_timestamp": "2014-05-29 12:24:51",
+        "latitude": rng.uniform(-90, 90, n_samples).round(5),
+        "longitude": rng.uniform(-180, 180, n_samples).round(5),
+    }
+    # a mix of numeric and categorical columns, like in most studies
+    for i in range(n_columns):
+        if i % 2:
+            md["synthetic_column_%d" % i] = rng.normal(10, 3, n_samples).round(3)
+        else:
+            md["synthetic_column_%d" % i] = [
+                "category.%d" % c for c in rng.randint(0, 5, n_samples)
+            ]
+    return pd.DataFrame(md, index=samples).astype(str)
+
+
+def _synthetic_artifacts(rng, prep, out_dir, features, n_features, density):
+    """Creates the FASTQ -> Demultiplexed -> BIOM lineage of `prep`"""
+    software = qdb.software.Software.from_name_and_version(*SYNTHETIC_SOFTWARE)
+    prefix = join(out_dir, "prep_%d" % prep.id)
+    samples = sorted(prep.keys())
+
+    fastqs = []
+    for suffix, fp_type in [("R1", "raw_forward_seqs"), ("I1", "raw_barcodes")]:
+        fp = "%s_%s.fastq" % (prefix, suffix)
+        with open(fp, "w") as f:
+            for i, seq in enumerate(_random_sequences(rng, 10, 150)):
+                f.write("@synthetic.%d\n%s\n+\n%s\n" % (i, seq, "I" * len(seq)))
+        fastqs.append((fp, fp_type))
+    fastq = qdb.artifact.Artifact.create(
+        fastqs, "FASTQ", prep_template=prep, name="Synthetic FASTQ"
+    )
+
+    fp = "%s_seqs.fna" % prefix
+    with open(fp, "w") as f:
+        for sample in samples:
+            seq = _random_sequences(rng, 1, 150)[0]
+            f.write(">%s_0 synthetic\n%s\n" % (sample, seq))
+    params = qdb.software.Parameters.from_default_params(
+        next(software.get_command(SYNTHETIC_DEMUX_CMD).default_parameter_sets),
+        {"input_data": fastq.id},
+    )
+    demux = qdb.artifact.Artifact.create(
+        [(fp, "preprocessed_fasta")],
+        "Demultiplexed",
+        parents=[fastq],
+        processing_parameters=params,
+    )
+
+    obs_ids = [str(f) for f in rng.choice(features, n_features, replace=False)]
+    data = sparse_random(
+        n_features, len(samples), density=density, format="csr", random_state=rng
+    )
+    data.data = np.ceil(data.data * 100)
+    fp = "%s_otu_table.biom" % prefix
+    with biom_open(fp, "w") as f:
+        Table(data, obs_ids, samples).to_hdf5(f, "Qiita synthetic data")
+    params = qdb.software.Parameters.from_default_params(
+        next(software.get_command(SYNTHETIC_BIOM_CMD).default_parameter_sets),
+        {"input_data": demux.id},
+    )
+    biom = qdb.artifact.Artifact.create(
+        [(fp, "biom")], "BIOM", parents=[demux], processing_parameters=params
+    )
+
+    return demux, biom, obs_ids
+
+
+def populate_synthetic_data(
+    n_studies=10,
+    n_samples=100,
+    n_columns=20,
+    n_preps=1,
+    n_jobs=5,
+    n_features=1000,
+    density=0.1,
+    seed=0,
+    user="test@foo.bar",
+    verbose=False,
+):
+    """Adds synthetic studies to the test database for performance testing
+
+    Each study has a sample information file, `n_preps` preparations with a
+    FASTQ -> Demultiplexed -> BIOM artifact lineage each, processing jobs
+    and the features of its BIOM tables stored in the archive.
+
+    Parameters
+    ----------
+    n_studies : int, optional
+        The number of studies to create. Default: 10
+    n_samples : int, optional
+        The number of samples in each study. Default: 100
+    n_columns : int, optional
+        The number of extra columns in each sample information file.
+        Default: 20
+    n_preps : int, optional
+        The number of preparations in each study. Default: 1
+    n_jobs : int, optional
+        The number of processing jobs per preparation, their status is
+        randomly assigned. Default: 5
+    n_features : int, optional
+        The number of features in each BIOM table. Default: 1000
+    density : float, optional
+        The fraction of non-zero values in the BIOM tables. Default: 0.1
+    seed : int, optional
+        The seed of the random generator, the same seed and parameters always
+        generate the same metadata, files and features. Default: 0
+    user : str, optional
+        The email of the owner of the studies and jobs. Default: test@foo.bar
+    verbose : bool, optional
+        If true, print the current step. Default: False
+
+    Returns
+    -------
+    list of qiita_db.study.Study
+        The new studies
+
+    Raises
+    ------
+    RuntimeError
+        If not working in a test environment
+
+    Notes
+    -----
+    The data is generated using the objects in qiita_db so it's consistent
+    with the data added via the interface, but the job status and the
+    visibility are set directly in the database to avoid sending emails and
+    validating the information files.
+    """
+    # qiita_core.util imports this module, so it can't be imported at the top
+    from qiita_core.util import is_test_environment
+
+    if not is_test_environment():
+        raise RuntimeError(
+            "Working in a production environment. Not adding synthetic "
+            "data to keep the production database safe."
+        )
+
+    rng = np.random.RandomState(seed)
+    user = qdb.user.User(user)
+    software = qdb.software.Software.from_name_and_version(*SYNTHETIC_SOFTWARE)
+    job_cmd = software.get_command(SYNTHETIC_BIOM_CMD)
+    pi = qdb.study.StudyPerson.create(
+        "Synthetic PI", "synthetic@foo.bar", "Qiita synthetic data"
+    )
+    # the features are shared across studies, like in real deployments
+    features = _random_sequences(rng, max(n_features * 5, 1), 150)
+    barcodes = _random_sequences(rng, n_samples, 12)
+    status_sql = """UPDATE qiita.processing_job
+                    SET processing_job_status_id = %s
+                    WHERE processing_job_id = %s"""
+
+    # the titles need to be unique, so they are numbered after the last study
+    # and the same seed can be used more than once
+    with qdb.sql_connection.TRN:
+        qdb.sql_connection.TRN.add("SELECT COALESCE(MAX(study_id), 0) FROM qiita.study")
+        first = qdb.sql_connection.TRN.execute_fetchlast() + 1
+
+    out_dir = mkdtemp(prefix="synthetic_", dir=qiita_config.working_dir)
+    studies = []
+    try:
+        for i in range(n_studies):
+            if verbose:
+                print("Creating synthetic study %d of %d" % (i + 1, n_studies))
+            with qdb.sql_connection.TRN, warnings.catch_warnings():
+                # missing columns and similar warnings are expected
+                warnings.simplefilter("ignore")
+                info = {
+                    "timeseries_type_id": 1,
+                    "metadata_complete": True,
+                    "mixs_compliant": True,
+                    "study_alias": "synthetic_%d" % (first + i),
+                    "study_description": "Synthetic study %d" % (first + i),
+                    "study_abstract": "Synthetic study generated with seed %d" % seed,
+                    "principal_investigator_id": pi,
+                    "lab_person_id": pi,
+                }
+                study = qdb.study.Study.create(
+                    user, "Synthetic study %d (seed %d)" % (first + i, seed), info
+                )
+                md = _synthetic_sample_template(rng, n_samples, n_columns)
+                qdb.metadata_template.sample_template.SampleTemplate.create(md, study)
+
+                for j in range(n_preps):
+                    pmd = pd.DataFrame(
+                        dict(
+                            SYNTHETIC_PREP_COLUMNS,
+                            barcode=barcodes,
+                            run_prefix="synthetic_%d_%d" % (i, j),
+                        ),
+                        index=md.index,
+                    )
+                    prep = qdb.metadata_template.prep_template.PrepTemplate.create(
+                        pmd, study, "16S", name="Synthetic prep %d" % j
+                    )
+                    demux, biom, obs_ids = _synthetic_artifacts(
+                        rng, prep, out_dir, features, n_features, density
+                    )
+
+                    qdb.archive.Archive.insert_from_artifact(
+                        biom,
+                        {
+                            f: dumps({"synthetic": True, "value": float(v)})
+                            for f, v in zip(obs_ids, rng.uniform(size=len(obs_ids)))
+                        },
+                    )
+
+                    params = qdb.software.Parameters.from_default_params(
+                        next(job_cmd.default_parameter_sets),
+                        {"input_data": demux.id},
+                    )
+                    jobs = qdb.processing_job.ProcessingJob.create_many(
+                        user, [params] * n_jobs, force=True
+                    )
+                    if jobs:
+                        qdb.sql_connection.TRN.add(
+                            status_sql,
+                            [
+                                [
+                                    qdb.util.convert_to_id(
+                                        str(s), "processing_job_status"
+                                    ),
+                                    job.id,
+                                ]
+                                for s, job in zip(
+                                    rng.choice(SYNTHETIC_JOB_STATUSES, n_jobs), jobs
+                                )
+                            ],
+                            many=True,
+                        )
+
+                    biom._set_visibility(str(rng.choice(SYNTHETIC_VISIBILITIES)))
+                qdb.sql_connection.TRN.execute()
+            studies.append(study)
+    finally:
+        rmtree(out_dir)
+
+    return studies
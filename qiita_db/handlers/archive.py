@@ -6,16 +6,22 @@
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
 
-from json import loads
+from json import dumps, loads
+
+from tornado.gen import coroutine
 
 from qiita_db.archive import Archive
 from qiita_db.processing_job import ProcessingJob
 
 from .oauth2 import OauthBaseHandler, authenticate_oauth
 
+# number of features retrieved from the DB and written to the client at once
+FEATURES_CHUNK_SIZE = 10000
+
 
 class APIArchiveObservations(OauthBaseHandler):
     @authenticate_oauth
+    @coroutine
     def post(self):
         """Retrieves the archiving information
 
@@ -33,16 +39,26 @@ class APIArchiveObservations(OauthBaseHandler):
 
             Feature identifiers not found in the archive won't be included in
             the return dictionary.
+
+            The features are retrieved and written in chunks of
+            FEATURES_CHUNK_SIZE so large feature lists are not held in memory
+            at once.
         """
         job_id = self.get_argument("job_id")
         features = self.request.arguments["features"]
 
         ms = Archive.get_merging_scheme_from_job(ProcessingJob(job_id))
-        response = Archive.retrieve_feature_values(
-            archive_merging_scheme=ms, features=features
-        )
 
-        self.write(response)
+        self.set_header("Content-Type", "application/json; charset=UTF-8")
+        self.write("{")
+        first = True
+        for chunk in Archive.iter_feature_values(ms, features, FEATURES_CHUNK_SIZE):
+            if chunk:
+                # removing the braces of each chunk to merge them
+                self.write(("" if first else ", ") + dumps(chunk)[1:-1])
+                first = False
+                yield self.flush()
+        self.write("}")
 
     @authenticate_oauth
     def patch(self):
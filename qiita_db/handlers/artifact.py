@@ -9,12 +9,14 @@
 from collections import defaultdict
 from json import dumps, loads
 
+from tornado.gen import coroutine
 from tornado.web import HTTPError
 
 import qiita_db as qdb
 from qiita_core.qiita_settings import r_client
 
 from .oauth2 import OauthBaseHandler, authenticate_oauth
+from .util import get_page_arguments, job_cursor, stream_json_pages
 
 
 def _get_artifact(a_id):
@@ -167,6 +169,44 @@ class ArtifactHandler(OauthBaseHandler):
         self.finish()
 
 
+class ArtifactJobsHandler(OauthBaseHandler):
+    @authenticate_oauth
+    @coroutine
+    def get(self, artifact_id):
+        """Retrieves the jobs that used the artifact as input
+
+        Parameters
+        ----------
+        artifact_id : str
+            The id of the artifact
+        status : str, optional
+            Only return the jobs in this status
+        cursor : str, optional
+            The next_cursor returned by a previous request
+        limit : int, optional
+            The max number of jobs to return. Default: all
+
+        Returns
+        -------
+        dict
+            {'data': list of dict, 'next_cursor': str}, see
+            qiita_db.processing_job.ProcessingJob.jobs_page for the format
+            of each job
+        """
+        artifact = _get_artifact(artifact_id)
+        status = self.get_argument("status", None)
+        cursor, limit = get_page_arguments(self, job_cursor)
+
+        yield stream_json_pages(
+            self,
+            lambda c, n: qdb.processing_job.ProcessingJob.jobs_page(
+                artifact=artifact, status=status, cursor=c, limit=n
+            ),
+            cursor=cursor,
+            limit=limit,
+        )
+
+
 class ArtifactAPItestHandler(OauthBaseHandler):
     @authenticate_oauth
     def post(self):
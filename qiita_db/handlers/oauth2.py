@@ -10,7 +10,9 @@ import datetime
 import functools
 from base64 import urlsafe_b64decode
 from random import SystemRandom
+from re import compile as re_compile
 from string import ascii_letters, digits
+from time import time
 from traceback import format_exception
 
 from tornado.web import RequestHandler
@@ -23,6 +25,56 @@ from qiita_core.exceptions import (
 )
 from qiita_core.qiita_settings import r_client
 
+# Used to find the processing job that a request belongs to
+UUID_RE = re_compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+# Daily number of requests allowed for password style tokens
+DAILY_LIMIT = 5000
+# Max number of seconds that a validated token is kept in memory, the token
+# expiration in redis is always respected
+TOKEN_CACHE_TIMEOUT = 10
+# Max number of tokens kept in memory
+TOKEN_CACHE_SIZE = 1000
+
+# Redis script that validates the token in KEYS[1] and, for password style
+# tokens, applies the daily limit in KEYS[2], all in a single atomic round
+# trip. It returns nil if the token doesn't exist or [ttl in ms, token info,
+# remaining requests], where remaining requests is nil (false) if the limit
+# key was not given
+_VALIDATE_TOKEN = r_client.register_script("""
+local info = redis.call('HGETALL', KEYS[1])
+if #info == 0 then
+    return nil
+end
+local remaining = false
+if #KEYS > 1 then
+    if redis.call('EXISTS', KEYS[2]) == 0 then
+        redis.call('SETEX', KEYS[2], ARGV[1], ARGV[2])
+        remaining = tonumber(ARGV[2])
+    else
+        remaining = redis.call('DECR', KEYS[2])
+    end
+end
+return {redis.call('PTTL', KEYS[1]), info, remaining}
+""")
+
+# {token: (expiration timestamp, token info, daily limit key)}, the token
+# info is only used without checking redis for client tokens; password
+# tokens need to be counted towards the daily limit so only their limit key
+# is reused
+_TOKEN_CACHE = {}
+
+# the token validation counters of this process, shown in the admin SQL
+# profiles page
+AUTH_STATS = {
+    "requests": 0,
+    "cache_hits": 0,
+    "redis_calls": 0,
+    "failures": 0,
+    "total_seconds": 0.0,
+    "max_seconds": 0.0,
+}
+
 
 def _oauth_error(handler, error_msg, error):
     """Set expected status and error formatting for Oauth2 style error
@@ -49,6 +101,90 @@ def _oauth_error(handler, error_msg, error):
     handler.finish()
 
 
+def _validate_token(token):
+    """Validates the token and applies the daily limit of password tokens
+
+    Parameters
+    ----------
+    token : str
+        The access token
+
+    Returns
+    -------
+    dict of {bytes: bytes}, str
+        The token information and the error message, which is None if the
+        token is valid
+    """
+    limit_key = None
+    cached = _TOKEN_CACHE.get(token)
+    if cached is not None:
+        if cached[0] > time():
+            limit_key = cached[2]
+            if limit_key is None:
+                AUTH_STATS["cache_hits"] += 1
+                return cached[1], None
+        else:
+            del _TOKEN_CACHE[token]
+
+    keys = [token] if limit_key is None else [token, limit_key]
+    AUTH_STATS["redis_calls"] += 1
+    reply = _VALIDATE_TOKEN(keys=keys, args=[86400, DAILY_LIMIT])
+    if reply is None:
+        # token has timed out or never existed
+        return None, "Oauth2 error: token has timed out"
+
+    ttl, info, remaining = reply
+    db_token = dict(zip(info[::2], info[1::2]))
+    if db_token[b"grant_type"] == b"password" and limit_key is None:
+        # the first request of a password token doesn't know its limit key
+        limit_key = "%s_%s_daily_limit" % (
+            db_token[b"client_id"].decode("ascii"),
+            db_token[b"user"].decode("ascii"),
+        )
+        AUTH_STATS["redis_calls"] += 1
+        reply = _VALIDATE_TOKEN(keys=[token, limit_key], args=[86400, DAILY_LIMIT])
+        if reply is None:
+            return None, "Oauth2 error: token has timed out"
+        ttl, info, remaining = reply
+
+    # a negative ttl means that the token doesn't expire
+    timeout = TOKEN_CACHE_TIMEOUT if ttl < 0 else ttl / 1000
+    _cache_token(token, time() + min(TOKEN_CACHE_TIMEOUT, timeout), db_token, limit_key)
+
+    if remaining is not None and remaining <= 0:
+        return None, "Oauth2 error: daily request limit reached"
+
+    return db_token, None
+
+
+def _cache_token(token, expiration, db_token, limit_key):
+    """Keeps the token in memory, removing expired or old tokens if full"""
+    if token not in _TOKEN_CACHE and len(_TOKEN_CACHE) >= TOKEN_CACHE_SIZE:
+        current = time()
+        for t in [t for t, v in _TOKEN_CACHE.items() if v[0] <= current]:
+            del _TOKEN_CACHE[t]
+        # dicts keep the insertion order so this removes the oldest tokens
+        while len(_TOKEN_CACHE) >= TOKEN_CACHE_SIZE:
+            del _TOKEN_CACHE[next(iter(_TOKEN_CACHE))]
+    _TOKEN_CACHE[token] = (expiration, db_token, limit_key)
+
+
+def get_auth_stats():
+    """Returns the counters of the token validation
+
+    Returns
+    -------
+    dict
+        The number of requests, cache hits, redis calls and failures, and the
+        total, max and mean seconds spent validating tokens
+    """
+    stats = AUTH_STATS.copy()
+    stats["mean_seconds"] = (
+        stats["total_seconds"] / stats["requests"] if stats["requests"] else 0.0
+    )
+    return stats
+
+
 def authenticate_oauth(f):
     """Decorate methods to require valid Oauth2 Authorization header[1]
 
@@ -85,31 +221,16 @@ def authenticate_oauth(f):
             _oauth_error(handler, "Oauth2 error: invalid access token", "invalid_grant")
             return
 
-        token = token_info[1]
-        db_token = r_client.hgetall(token)
-        if not db_token:
-            # token has timed out or never existed
-            _oauth_error(handler, "Oauth2 error: token has timed out", "invalid_grant")
+        start = time()
+        _, error = _validate_token(token_info[1])
+        elapsed = time() - start
+        AUTH_STATS["requests"] += 1
+        AUTH_STATS["total_seconds"] += elapsed
+        AUTH_STATS["max_seconds"] = max(AUTH_STATS["max_seconds"], elapsed)
+        if error is not None:
+            AUTH_STATS["failures"] += 1
+            _oauth_error(handler, error, "invalid_grant")
             return
-        # Check daily rate limit for key if password style key
-        if db_token[b"grant_type"] == b"password":
-            limit_key = "%s_%s_daily_limit" % (
-                db_token[b"client_id"].decode("ascii"),
-                db_token[b"user"].decode("ascii"),
-            )
-            limiter = r_client.get(limit_key)
-            if limiter is None:
-                # Set limit to 5,000 requests per day
-                r_client.setex(limit_key, 86400, 5000)
-            else:
-                r_client.decr(limit_key)
-                if int(r_client.get(limit_key)) <= 0:
-                    _oauth_error(
-                        handler,
-                        "Oauth2 error: daily request limit reached",
-                        "invalid_grant",
-                    )
-                    return
 
         return f(handler, *args, **kwargs)
 
@@ -117,6 +238,23 @@ def authenticate_oauth(f):
 
 
 class OauthBaseHandler(RequestHandler):
+    def prepare(self):
+        """Starts profiling the SQL statements executed by the request
+
+        Notes
+        -----
+        The requests done by the plugins on behalf of a job have its id in
+        the path, so the profile is also aggregated per processing job
+        """
+        job_id = next((a for a in self.path_args if UUID_RE.match(str(a))), None)
+        self._sql_profile = qdb.sql_connection.start_profile(
+            "%s %s" % (self.request.method, self.request.path), job_id
+        )
+
+    def on_finish(self):
+        """Stores the SQL profile of the request, if any"""
+        qdb.sql_connection.stop_profile(getattr(self, "_sql_profile", None))
+
     def write_error(self, status_code, **kwargs):
         """Overriding the default write error in tornado RequestHandler
 
@@ -238,8 +376,8 @@ class TokenAuthHandler(OauthBaseHandler):
             limit_key = "%s_%s_daily_limit" % (client_id, user)
             limiter = r_client.get(limit_key)
             if limiter is None:
-                # Set limit to 5,000 requests per day
-                r_client.setex(limit_key, 86400, 5000)
+                # Set limit to DAILY_LIMIT requests per day
+                r_client.setex(limit_key, 86400, DAILY_LIMIT)
 
         self.write(
             {"access_token": token, "token_type": "Bearer", "expires_in": timeout}
@@ -179,6 +179,37 @@ class ArtifactHandlerTests(OauthTestingBase):
         self.assertIn("No such file or directory", obs.reason)
 
 
+class ArtifactJobsHandlerTests(OauthTestingBase):
+    def test_get_artifact_does_not_exist(self):
+        obs = self.get("/qiita_db/artifacts/100/jobs/", headers=self.header)
+        self.assertEqual(obs.code, 404)
+
+    def test_get(self):
+        obs = self.get("/qiita_db/artifacts/1/jobs/", headers=self.header)
+        self.assertEqual(obs.code, 200)
+        obs = loads(obs.body)
+        self.assertIsNone(obs["next_cursor"])
+        exp = [j.id for j in qdb.artifact.Artifact(1).jobs()]
+        self.assertCountEqual([j["id"] for j in obs["data"]], exp)
+
+        # paginating
+        obs = self.get("/qiita_db/artifacts/1/jobs/?limit=1", headers=self.header)
+        obs = loads(obs.body)
+        self.assertEqual(len(obs["data"]), 1)
+        self.assertIsNotNone(obs["next_cursor"])
+        page = self.get(
+            "/qiita_db/artifacts/1/jobs/?cursor=%s" % obs["next_cursor"],
+            headers=self.header,
+        )
+        page = loads(page.body)
+        self.assertCountEqual([j["id"] for j in obs["data"] + page["data"]], exp)
+
+    def test_get_invalid_arguments(self):
+        for args in ("cursor=1|2", "limit=one", "limit=-1"):
+            obs = self.get("/qiita_db/artifacts/1/jobs/?%s" % args, headers=self.header)
+            self.assertEqual(obs.code, 400)
+
+
 class ArtifactAPItestHandlerTests(OauthTestingBase):
     def setUp(self):
         super(ArtifactAPItestHandlerTests, self).setUp()
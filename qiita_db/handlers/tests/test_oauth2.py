@@ -6,9 +6,11 @@
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
 from json import loads
+from time import time
 from unittest import main
 
 from qiita_core.qiita_settings import r_client
+from qiita_db.handlers.oauth2 import _TOKEN_CACHE, TOKEN_CACHE_SIZE, get_auth_stats
 from qiita_pet.test.tornado_test_base import TestHandlerBase
 
 
@@ -67,6 +69,67 @@ class OAuth2BaseHandlerTests(TestHandlerBase):
         }
         self.assertEqual(loads(obs.body), exp)
 
+    def test_authenticate_header_client_cached(self):
+        _TOKEN_CACHE.pop(self.client_token, None)
+        stats = get_auth_stats()
+        for _ in range(3):
+            obs = self.get(
+                "/qiita_db/artifacts/1/",
+                headers={"Authorization": "Bearer " + self.client_token},
+            )
+            self.assertEqual(obs.code, 200)
+        self.assertIn(self.client_token, _TOKEN_CACHE)
+
+        obs = get_auth_stats()
+        self.assertEqual(obs["requests"] - stats["requests"], 3)
+        self.assertEqual(obs["redis_calls"] - stats["redis_calls"], 1)
+        self.assertEqual(obs["cache_hits"] - stats["cache_hits"], 2)
+        self.assertGreater(obs["mean_seconds"], 0)
+
+        # password tokens are always validated as they count towards the
+        # limit, only their limit key is kept
+        _TOKEN_CACHE.pop(self.user_token, None)
+        stats = get_auth_stats()
+        for _ in range(2):
+            obs = self.get(
+                "/qiita_db/artifacts/1/",
+                headers={"Authorization": "Bearer " + self.user_token},
+            )
+            self.assertEqual(obs.code, 200)
+        self.assertEqual(_TOKEN_CACHE[self.user_token][2], self.user_rate_key)
+        self.assertEqual(int(r_client.get(self.user_rate_key)), 0)
+        obs = get_auth_stats()
+        self.assertEqual(obs["redis_calls"] - stats["redis_calls"], 3)
+        self.assertEqual(obs["cache_hits"] - stats["cache_hits"], 0)
+
+    def test_token_cache_size(self):
+        _TOKEN_CACHE.clear()
+        for i in range(TOKEN_CACHE_SIZE - 1):
+            _TOKEN_CACHE["token%d" % i] = (time() + 10, {}, None)
+        _TOKEN_CACHE["expired"] = (time() - 1, {}, None)
+        self.assertEqual(len(_TOKEN_CACHE), TOKEN_CACHE_SIZE)
+
+        # the expired tokens are removed first
+        obs = self.get(
+            "/qiita_db/artifacts/1/",
+            headers={"Authorization": "Bearer " + self.client_token},
+        )
+        self.assertEqual(obs.code, 200)
+        self.assertEqual(len(_TOKEN_CACHE), TOKEN_CACHE_SIZE)
+        self.assertNotIn("expired", _TOKEN_CACHE)
+        self.assertIn(self.client_token, _TOKEN_CACHE)
+
+        # and then the oldest
+        obs = self.get(
+            "/qiita_db/artifacts/1/",
+            headers={"Authorization": "Bearer " + self.user_token},
+        )
+        self.assertEqual(obs.code, 200)
+        self.assertEqual(len(_TOKEN_CACHE), TOKEN_CACHE_SIZE)
+        self.assertNotIn("token0", _TOKEN_CACHE)
+        self.assertIn(self.user_token, _TOKEN_CACHE)
+        _TOKEN_CACHE.clear()
+
     def test_authenticate_header_missing(self):
         obs = self.get("/qiita_db/artifacts/100/")
         self.assertEqual(obs.code, 400)
@@ -6,6 +6,10 @@
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
 
+from json import dumps
+from uuid import UUID
+
+from tornado.gen import coroutine
 from tornado.web import HTTPError
 
 import qiita_db as qdb
@@ -43,3 +47,109 @@ def _get_instance(klass, oid, reason):
         raise HTTPError(500, reason=reason + ", id=%s: %s" % (oid, str(e)))
 
     return object
+
+
+def job_cursor(cursor):
+    """Validates a cursor returned by ProcessingJob.jobs_page
+
+    Parameters
+    ----------
+    cursor : str
+        The cursor
+
+    Returns
+    -------
+    str
+        The cursor
+
+    Raises
+    ------
+    ValueError
+        If the cursor is not a job id
+    """
+    return str(UUID(cursor))
+
+
+def get_page_arguments(handler, cursor_type=int):
+    """Returns the cursor and limit arguments of a paginated request
+
+    Parameters
+    ----------
+    handler : tornado.web.RequestHandler
+        The handler of the request
+    cursor_type : callable, optional
+        Function that validates and converts the cursor, raising ValueError
+        if it's not valid. Default: int
+
+    Returns
+    -------
+    cursor, int
+        The cursor and the limit, None if they were not provided
+
+    Raises
+    ------
+    HTTPError
+        If the cursor or the limit are not valid, with error code 400
+    """
+    cursor = handler.get_argument("cursor", None)
+    limit = handler.get_argument("limit", None)
+    if cursor is not None:
+        try:
+            cursor = cursor_type(cursor)
+        except ValueError:
+            raise HTTPError(400, reason="Invalid cursor: %s" % cursor)
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = -1
+        if limit < 0:
+            raise HTTPError(
+                400, reason="Invalid limit: %s" % handler.get_argument("limit")
+            )
+
+    return cursor, limit
+
+
+@coroutine
+def stream_json_pages(handler, get_page, cursor=None, limit=None, page_size=1000):
+    """Writes paginated results as a JSON object, one page at a time
+
+    Parameters
+    ----------
+    handler : tornado.web.RequestHandler
+        The handler to write to
+    get_page : callable
+        Function that takes a cursor and a page size and returns a list of
+        JSON serializable dicts and the cursor of the next page, None if
+        there are no more pages
+    cursor : str or int, optional
+        The cursor where to start. Default: the first page
+    limit : int, optional
+        The max number of elements to write. Default: all
+    page_size : int, optional
+        The number of elements retrieved and flushed at once. Default 1000
+
+    Notes
+    -----
+    The written object is {"data": [...], "next_cursor": cursor}, where
+    next_cursor can be used to request the elements after `limit`. As each
+    page is flushed to the client once written, the memory used doesn't
+    depend on the number of elements.
+    """
+    handler.set_header("Content-Type", "application/json; charset=UTF-8")
+    handler.write('{"data": [')
+    first = True
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        elements, cursor = get_page(cursor, size)
+        for element in elements:
+            handler.write(("" if first else ",") + dumps(element, default=str))
+            first = False
+        if remaining is not None:
+            remaining -= len(elements)
+        yield handler.flush()
+        if cursor is None:
+            break
+    handler.write('], "next_cursor": %s}' % dumps(cursor))
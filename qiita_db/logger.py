@@ -66,6 +66,56 @@ class LogEntry(qdb.base.QiitaObject):
 
             return [cls(i) for i in qdb.sql_connection.TRN.execute_fetchflatten()]
 
+    @classmethod
+    def records_page(cls, cursor=None, limit=100):
+        """Returns a page of log records, newest first
+
+        Parameters
+        ----------
+        cursor : int, optional
+            The cursor returned with the previous page. Default: start from
+            the newest record
+        limit : int, optional
+            The max number of records to return. Default 100
+
+        Returns
+        -------
+        list of dict, int
+            The records, with the keys: id, time, severity, msg and info, and
+            the cursor of the next page, None if there are no more records
+
+        Notes
+        -----
+        The records are paginated by id (keyset pagination) so retrieving
+        any page costs the same, independently of the number of records
+        """
+        sql = """SELECT logging_id, time, severity, msg, information
+                 FROM qiita.{0}
+                    JOIN qiita.severity USING (severity_id)
+                 {1}
+                 ORDER BY logging_id DESC
+                 LIMIT %s""".format(
+            cls._table, "" if cursor is None else "WHERE logging_id < %s"
+        )
+        args = [limit + 1] if cursor is None else [cursor, limit + 1]
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql, args)
+            rows = qdb.sql_connection.TRN.execute_fetchindex()
+
+        records = [
+            {
+                "id": lid,
+                "time": time,
+                "severity": severity,
+                "msg": msg,
+                "info": loads(info) if info else {},
+            }
+            for lid, time, severity, msg, info in rows[:limit]
+        ]
+        next_cursor = records[-1]["id"] if len(rows) > limit else None
+
+        return records, next_cursor
+
     @classmethod
     def create(cls, severity, msg, info=None):
         """Creates a new LogEntry object
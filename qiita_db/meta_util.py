@@ -14,6 +14,8 @@ Methods
     :toctree: generated/
 
     get_lat_longs
+    verify_filepaths_integrity
+    get_filepaths_integrity_problems
 """
 
 # -----------------------------------------------------------------------------
@@ -25,17 +27,19 @@ Methods
 # -----------------------------------------------------------------------------
 from base64 import b64encode
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from hashlib import md5
 from io import BytesIO
 from json import dump, dumps, loads
-from os import stat
-from os.path import basename, join, relpath
+from os import stat, walk
+from os.path import basename, exists, getsize, isdir, join, relpath
 from re import sub
 from shutil import move
 from tarfile import TarInfo
 from tarfile import open as topen
-from time import localtime, strftime
+from threading import Lock
+from time import localtime, monotonic, sleep, strftime
 from urllib.parse import quote
 
 import matplotlib as mpl
@@ -45,7 +49,9 @@ import qiita_db as qdb
 from qiita_core.configuration_manager import ConfigurationManager
 from qiita_core.qiita_settings import qiita_config, r_client
 from qiita_db.util import (
+    compute_checksum,
     create_nested_path,
+    get_db_files_base_dir,
     resource_allocation_plot,
     retrieve_resource_data,
 )
@@ -384,6 +390,193 @@ def update_redis_stats():
     return missing_files
 
 
+# redis keys used by verify_filepaths_integrity to store its progress (the
+# last verified filepath_id), the time of the last complete pass over the
+# qiita.filepath table and the problems found as {filepath_id: json}
+INTEGRITY_PROGRESS_KEY = "filepath-integrity:last_filepath_id"
+INTEGRITY_FULL_PASS_KEY = "filepath-integrity:last_full_pass"
+INTEGRITY_PROBLEMS_KEY = "filepath-integrity:problems"
+
+
+def _read_size(fp):
+    """Returns the number of bytes read to compute the checksum of fp"""
+    if isdir(fp):
+        return sum(getsize(join(d, f)) for d, _, files in walk(fp) for f in files)
+    return getsize(fp) if exists(fp) else 0
+
+
+def _verify_filepath(fp, checksum, size, nbytes, throttle):
+    """Returns the integrity status of the file fp
+
+    Parameters
+    ----------
+    fp : str
+        The full path of the file
+    checksum : str
+        The checksum stored in the DB
+    size : int
+        The size stored in the DB
+    nbytes : int
+        The number of bytes read to compute the checksum, see _read_size
+    throttle : callable
+        Function that receives the number of bytes about to be read and
+        blocks until they are allowed by the I/O budget
+
+    Returns
+    -------
+    str
+        'ok', 'missing' or 'corrupted'
+    """
+    if not exists(fp):
+        return "missing"
+    # the stored size of a folder is the size of the folder entry itself, so
+    # we can only compare the sizes of regular files
+    if not isdir(fp) and size is not None and getsize(fp) != size:
+        return "corrupted"
+    throttle(nbytes)
+    if str(compute_checksum(fp, cache=False)) != str(checksum):
+        return "corrupted"
+    return "ok"
+
+
+def verify_filepaths_integrity(
+    max_files=1000, max_bytes=None, bytes_per_second=None, workers=4
+):
+    """Verifies the size and checksum of the files stored in qiita.filepath
+
+    Parameters
+    ----------
+    max_files : int, optional
+        The maximum number of filepaths to verify in this run. Default 1000
+    max_bytes : int, optional
+        The maximum number of bytes to read in this run. Note that at least
+        one filepath is always verified. Default: no limit
+    bytes_per_second : int, optional
+        The maximum read rate across all workers. Default: no limit
+    workers : int, optional
+        The number of files verified in parallel. Default 4
+
+    Returns
+    -------
+    dict of {str: list of (int, str)}
+        The filepath ids and paths verified in this run that are missing,
+        corrupted or ok, keyed by status
+
+    Notes
+    -----
+    The filepaths are verified in filepath_id order starting after the last
+    filepath verified in the previous run, so consecutive runs go over the
+    full table; once its end is reached it starts again from the beginning.
+    The problems found are kept in redis until the filepath is verified
+    again or removed from the DB, and filepaths that are not linked to an
+    artifact but live in a subdirectory mountpoint are skipped as those are
+    removed by purge_filepaths. The byte limits use the size of the files
+    on disk, including all the files of a folder.
+    """
+    last_id = int(r_client.get(INTEGRITY_PROGRESS_KEY) or 0)
+
+    with qdb.sql_connection.TRN:
+        sql = """SELECT filepath_id, filepath, checksum, fp_size,
+                        mountpoint, subdirectory, artifact_id
+                 FROM qiita.filepath
+                    JOIN qiita.data_directory USING (data_directory_id)
+                    LEFT JOIN qiita.artifact_filepath USING (filepath_id)
+                 WHERE filepath_id > %s AND checksum_algorithm_id = 1
+                 ORDER BY filepath_id
+                 LIMIT %s"""
+        qdb.sql_connection.TRN.add(sql, [last_id, max_files])
+        rows = qdb.sql_connection.TRN.execute_fetchindex()
+        fps = qdb.util.filepath_ids_to_rel_paths(
+            [r[0] for r in rows if not (r[5] and r[6] is None)]
+        )
+
+        # the problems of the filepaths removed from the DB are not going to
+        # be verified again
+        problem_ids = [int(k) for k in r_client.hkeys(INTEGRITY_PROBLEMS_KEY)]
+        removed_ids = []
+        if problem_ids:
+            sql = """SELECT filepath_id
+                     FROM qiita.filepath
+                     WHERE filepath_id IN %s"""
+            qdb.sql_connection.TRN.add(sql, [tuple(problem_ids)])
+            removed_ids = set(problem_ids) - set(
+                qdb.sql_connection.TRN.execute_fetchflatten()
+            )
+
+    db_dir = get_db_files_base_dir()
+    to_verify = []
+    total_bytes = 0
+    for fpid, _, checksum, size, _, _, _ in rows:
+        fp = fps.get(fpid)
+        nbytes = 0 if fp is None else _read_size(join(db_dir, fp))
+        if max_bytes is not None and to_verify and total_bytes + nbytes > max_bytes:
+            break
+        last_id = fpid
+        if fp is None:
+            continue
+        total_bytes += nbytes
+        to_verify.append((fpid, join(db_dir, fp), checksum, size, nbytes))
+
+    # the I/O budget is shared across the workers by reserving the time
+    # slot needed to read each file at bytes_per_second
+    lock = Lock()
+    next_slot = [monotonic()]
+
+    def throttle(nbytes):
+        if not bytes_per_second:
+            return
+        with lock:
+            start = max(monotonic(), next_slot[0])
+            next_slot[0] = start + nbytes / bytes_per_second
+        delay = start - monotonic()
+        if delay > 0:
+            sleep(delay)
+
+    def verify(args):
+        fpid, fp, checksum, size, nbytes = args
+        return fpid, fp, _verify_filepath(fp, checksum, size, nbytes, throttle)
+
+    results = {"ok": [], "missing": [], "corrupted": []}
+    with ThreadPoolExecutor(max(workers, 1)) as executor:
+        for fpid, fp, status in executor.map(verify, to_verify):
+            results[status].append((fpid, fp))
+
+    tnow = datetime.now().strftime("%m-%d-%y %H:%M:%S")
+    pipe = r_client.pipeline()
+    solved_ids = [fpid for fpid, _ in results["ok"]] + list(removed_ids)
+    if solved_ids:
+        pipe.hdel(INTEGRITY_PROBLEMS_KEY, *solved_ids)
+    for status in ("missing", "corrupted"):
+        for fpid, fp in results[status]:
+            pipe.hset(
+                INTEGRITY_PROBLEMS_KEY,
+                fpid,
+                dumps({"filepath": fp, "status": status, "time": tnow}),
+            )
+    if len(rows) < max_files and (not rows or last_id == rows[-1][0]):
+        # we reached the end of the table, next run starts from the top
+        pipe.set(INTEGRITY_PROGRESS_KEY, 0)
+        pipe.set(INTEGRITY_FULL_PASS_KEY, tnow)
+    else:
+        pipe.set(INTEGRITY_PROGRESS_KEY, last_id)
+    pipe.execute()
+
+    return results
+
+
+def get_filepaths_integrity_problems():
+    """Returns the problems found by verify_filepaths_integrity
+
+    Returns
+    -------
+    dict of {int: dict}
+        The filepath, status and time of the problem, keyed by filepath_id
+    """
+    return {
+        int(k): loads(v) for k, v in r_client.hgetall(INTEGRITY_PROBLEMS_KEY).items()
+    }
+
+
 def get_lat_longs():
     """Retrieve the latitude and longitude of all the public samples in the DB
 
@@ -394,7 +587,7 @@ def get_lat_longs():
     """
     with qdb.sql_connection.TRN:
         # getting all the public studies
-        studies = qdb.study.Study.get_by_status("public")
+        studies = qdb.study.Study.get_ids_by_status("public")
 
         results = []
         if studies:
@@ -409,7 +602,7 @@ def get_lat_longs():
                       sample_values->>'longitude' != 'NaN' AND
                       isnumeric(sample_values->>'latitude') AND
                       isnumeric(sample_values->>'longitude')"""
-            sql = [sql_query.format(s.id) for s in studies]
+            sql = [sql_query.format(s) for s in studies]
             sql = " UNION ".join(sql)
             qdb.sql_connection.TRN.add(sql)
 
@@ -441,11 +634,15 @@ def generate_biom_and_metadata_release(study_status="public"):
         # [0] latest is first, [1] only getting the filepath
         sample_fp = relpath(s.sample_template.get_filepaths()[0][1], bdir)
 
-        for a in s.artifacts(artifact_type="BIOM"):
+        artifacts = s.artifacts(artifact_type="BIOM")
+        all_merging_schemes = qdb.artifact.Artifact.merging_schemes(
+            [a.id for a in artifacts]
+        )
+        for a in artifacts:
             if a.processing_parameters is None or a.visibility != study_status:
                 continue
 
-            merging_schemes, parent_softwares = a.merging_scheme
+            merging_schemes, parent_softwares = all_merging_schemes[a.id]
             software = a.processing_parameters.command.software
             software = "%s v%s" % (software.name, software.version)
 
@@ -1084,6 +1084,31 @@ class MetadataTemplate(qdb.base.QiitaObject):
         """
         return key in self._get_sample_ids()
 
+    def existing_samples(self, sample_ids):
+        r"""Returns which of the given sample ids are in the metadata template
+
+        Parameters
+        ----------
+        sample_ids : iterable of str
+            The sample ids to check
+
+        Returns
+        -------
+        set of str
+            The subset of `sample_ids` present in the metadata template
+        """
+        sample_ids = tuple(sample_ids)
+        if not sample_ids:
+            return set()
+        with qdb.sql_connection.TRN:
+            sql = """SELECT sample_id
+                     FROM qiita.{0}
+                     WHERE {1} = %s AND sample_id IN %s""".format(
+                self._table, self._id_column
+            )
+            qdb.sql_connection.TRN.add(sql, [self._id, sample_ids])
+            return set(qdb.sql_connection.TRN.execute_fetchflatten())
+
     def keys(self):
         r"""Iterator over the sorted sample ids
 
@@ -1215,7 +1240,7 @@ class MetadataTemplate(qdb.base.QiitaObject):
                 fp, index_label="sample_name", na_rep="", sep="\t", encoding="utf-8"
             )
 
-    def _common_to_dataframe_steps(self, samples=None):
+    def _common_to_dataframe_steps(self, samples=None, columns=None):
         """Perform the common to_dataframe steps
 
         Returns
@@ -1224,19 +1249,30 @@ class MetadataTemplate(qdb.base.QiitaObject):
             The metadata in the template,indexed on sample id
         samples list of string, optional
             A list of the sample names we actually want to retrieve
+        columns list of string, optional
+            A list of the columns we actually want to retrieve
         """
         with qdb.sql_connection.TRN:
             # Retrieve all the information from the database
-            sql = """SELECT sample_id, sample_values
-                     FROM qiita.{0}
-                     WHERE sample_id != '{1}'""".format(
-                self._table_name(self._id), QIITA_COLUMN_NAME
-            )
-            if samples is None:
-                qdb.sql_connection.TRN.add(sql)
+            if columns is None:
+                values = "sample_values"
+                args = []
             else:
+                # only the requested columns are sent back by the DB
+                values = """(SELECT COALESCE(jsonb_object_agg(key, value),
+                                             '{}'::jsonb)
+                             FROM jsonb_each(sample_values)
+                             WHERE key = ANY(%s))"""
+                args = [list(columns)]
+            sql = """SELECT sample_id, {0}
+                     FROM qiita.{1}
+                     WHERE sample_id != '{2}'""".format(
+                values, self._table_name(self._id), QIITA_COLUMN_NAME
+            )
+            if samples is not None:
                 sql += " AND sample_id IN %s"
-                qdb.sql_connection.TRN.add(sql, [tuple(samples)])
+                args.append(tuple(samples))
+            qdb.sql_connection.TRN.add(sql, args)
 
             data = qdb.sql_connection.TRN.execute_fetchindex()
             df = pd.DataFrame(
@@ -1247,7 +1283,8 @@ class MetadataTemplate(qdb.base.QiitaObject):
             id_column_name = "qiita_%sid" % (self._table_prefix)
             if id_column_name == "qiita_sample_id":
                 id_column_name = "qiita_study_id"
-            df[id_column_name] = str(self.id)
+            if columns is None or id_column_name in columns:
+                df[id_column_name] = str(self.id)
 
             return df
 
@@ -75,6 +75,24 @@ class PrepSample(BaseSample):
         if not isinstance(md_template, PrepTemplate):
             raise IncompetentQiitaDeveloperError()
 
+    def setitem(self, column, value):
+        """Sets `value` as value for the given `column`
+
+        Parameters
+        ----------
+        column : str
+            The column to update
+        value : str
+            The value to set
+
+        See Also
+        --------
+        qiita_db.metadata_template.base_metadata_template.BaseSample.setitem
+        """
+        with qdb.sql_connection.TRN:
+            super().setitem(column, value)
+            self._md_template._update_summary()
+
 
 class PrepTemplate(MetadataTemplate):
     r"""Represent the PrepTemplate of a raw data. Provides access to the
@@ -318,6 +336,11 @@ class PrepTemplate(MetadataTemplate):
                      WHERE prep_template_id = %s"""
             qdb.sql_connection.TRN.add(sql, args)
 
+            # Delete the prep template summary
+            sql = """DELETE FROM qiita.prep_template_summary
+                     WHERE prep_template_id = %s"""
+            qdb.sql_connection.TRN.add(sql, args)
+
             # Drop the prep_X table
             sql = "DROP TABLE qiita.{0}".format(table_name)
             qdb.sql_connection.TRN.add(sql)
@@ -622,6 +645,7 @@ class PrepTemplate(MetadataTemplate):
             The columns that were added/updated
         """
         with qdb.sql_connection.TRN:
+            self._update_summary()
             # figuring out the filepath of the prep template
             _id, fp = qdb.util.get_mountpoint("templates")[0]
             # update timestamp in the DB first
@@ -643,6 +667,29 @@ class PrepTemplate(MetadataTemplate):
             fp_id = qdb.util.convert_to_id("prep_template", "filepath_type")
             self.add_filepath(fp, fp_id=fp_id)
 
+    def _update_summary(self):
+        """Updates the values of the prep in qiita.prep_template_summary"""
+        sql = "SELECT qiita.update_prep_template_summary(%s)"
+        qdb.sql_connection.perform_as_transaction(sql, [self._id])
+
+    def update_category(self, category, samples_and_values):
+        """Update an existing column
+
+        Parameters
+        ----------
+        category : str
+            The category to update
+        samples_and_values : dict
+            A mapping of {sample_id: value}
+
+        See Also
+        --------
+        qiita_db.metadata_template.MetadataTemplate.update_category
+        """
+        with qdb.sql_connection.TRN:
+            super().update_category(category, samples_and_values)
+            self._update_summary()
+
     @property
     def status(self):
         """The status of the prep template
@@ -779,15 +826,19 @@ class PrepTemplate(MetadataTemplate):
                  WHERE prep_template_id = %s"""
         qdb.sql_connection.perform_as_transaction(sql, [value, self.id])
 
-    def to_dataframe(self, add_ebi_accessions=False):
+    def to_dataframe(self, add_ebi_accessions=False, samples=None, columns=None):
         """Returns the metadata template as a dataframe
 
         Parameters
         ----------
         add_ebi_accessions : bool, optional
             If this should add the ebi accessions
+        samples list of string, optional
+            A list of the sample names we actually want to retrieve
+        columns list of string, optional
+            A list of the columns we actually want to retrieve
         """
-        df = self._common_to_dataframe_steps()
+        df = self._common_to_dataframe_steps(samples=samples, columns=columns)
 
         if add_ebi_accessions:
             accessions = self.ebi_experiment_accessions
@@ -341,6 +341,59 @@ class SampleTemplate(MetadataTemplate):
         """
         self._update_accession_numbers("ebi_sample_accession", value)
 
+    def samples_details(self, sample_ids):
+        """Returns the accession and preparation details of the given samples
+
+        Parameters
+        ----------
+        sample_ids : iterable of str
+            The sample ids to retrieve
+
+        Returns
+        -------
+        dict of {str: (str, list of (int, str, str, str))}
+            The EBI sample accession and the list of preparations, as
+            (prep template id, EBI experiment accession, prep status, data
+            type) ordered by prep template id, keyed by sample id. Samples
+            not present in the sample template are not included.
+        """
+        sample_ids = tuple(sample_ids)
+        if not sample_ids:
+            return {}
+        with qdb.sql_connection.TRN:
+            sql = """SELECT ss.sample_id, ss.ebi_sample_accession,
+                            pts.prep_template_id, pts.ebi_experiment_accession,
+                            dt.data_type, v.visibility
+                     FROM qiita.study_sample ss
+                        LEFT JOIN (
+                            qiita.prep_template_sample pts
+                            JOIN qiita.study_prep_template spt
+                                USING (prep_template_id)
+                            JOIN qiita.prep_template pt USING (prep_template_id)
+                            JOIN qiita.data_type dt USING (data_type_id))
+                            ON (ss.sample_id = pts.sample_id
+                                AND spt.study_id = ss.study_id)
+                        LEFT JOIN qiita.artifact a ON (
+                            pt.artifact_id = a.artifact_id
+                            AND a.visibility_id NOT IN %s)
+                        LEFT JOIN qiita.visibility v USING (visibility_id)
+                     WHERE ss.study_id = %s AND ss.sample_id IN %s
+                     ORDER BY ss.sample_id, pts.prep_template_id"""
+            qdb.sql_connection.TRN.add(
+                sql,
+                [qdb.util.artifact_visibilities_to_skip(), self._id, sample_ids],
+            )
+            result = {}
+            for row in qdb.sql_connection.TRN.execute_fetchindex():
+                sid, sacc, ptid, ptacc, dtype, visibility = row
+                _, preps = result.setdefault(sid, (sacc, []))
+                if ptid is not None:
+                    status = qdb.util.infer_status(
+                        [[visibility]] if visibility is not None else []
+                    )
+                    preps.append((ptid, ptacc, status, dtype))
+        return result
+
     @property
     def biosample_accessions(self):
         """The biosample accessions for the samples in the sample template
@@ -368,7 +421,7 @@ class SampleTemplate(MetadataTemplate):
         """
         self._update_accession_numbers("biosample_accession", value)
 
-    def to_dataframe(self, add_ebi_accessions=False, samples=None):
+    def to_dataframe(self, add_ebi_accessions=False, samples=None, columns=None):
         """Returns the metadata template as a dataframe
 
         Parameters
@@ -377,8 +430,10 @@ class SampleTemplate(MetadataTemplate):
             If this should add the ebi accessions
         samples list of string, optional
             A list of the sample names we actually want to retrieve
+        columns list of string, optional
+            A list of the columns we actually want to retrieve
         """
-        df = self._common_to_dataframe_steps(samples=samples)
+        df = self._common_to_dataframe_steps(samples=samples, columns=columns)
 
         if add_ebi_accessions:
             accessions = self.ebi_sample_accessions
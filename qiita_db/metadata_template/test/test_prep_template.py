@@ -971,6 +971,19 @@ class TestPrepTemplate(TestCase):
             obs.qiita_ebi_experiment_accessions.to_dict(),
         )
 
+        # test retrieving only some samples and columns
+        obs = self.tester.to_dataframe(
+            samples=["1.SKB8.640193", "1.SKD8.640184"],
+            columns=["barcode", "platform", "not_a_column"],
+        )
+        self.assertEqual(set(obs.index), {"1.SKB8.640193", "1.SKD8.640184"})
+        self.assertEqual(set(obs.columns), {"barcode", "platform"})
+        self.assertEqual(obs.loc["1.SKB8.640193", "barcode"], "AGCGCTCACATC")
+        obs = self.tester.to_dataframe(
+            samples=["1.SKB8.640193"], columns=["platform", "qiita_prep_id"]
+        )
+        self.assertEqual(set(obs.columns), {"platform", "qiita_prep_id"})
+
     def test_clean_validate_template_error_bad_chars(self):
         """Raises an error if there are invalid characters in the sample names"""
         self.metadata.index = ["o()xxxx[{::::::::>", "sample.1", "sample.3"]
@@ -1647,6 +1660,22 @@ class TestPrepTemplate(TestCase):
         self.assertEqual(self.tester["1.SKB8.640193"]["center_name"], "FOO")
         self.assertEqual(self.tester["1.SKD8.640184"]["center_name"], "BAR")
 
+        # the prep summary is kept up to date
+        sql = """SELECT num_samples, platform
+                 FROM qiita.prep_template_summary
+                 WHERE prep_template_id = %s"""
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql, [self.tester.id])
+            self.assertEqual(
+                qdb.sql_connection.TRN.execute_fetchindex(), [[27, "Illumina"]]
+            )
+        self.tester.update_category("platform", {"1.SKB8.640193": "FOO"})
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql, [self.tester.id])
+            self.assertEqual(
+                qdb.sql_connection.TRN.execute_fetchindex(), [[27, "FOO, Illumina"]]
+            )
+
     def test_qiime_map_fp(self):
         pt = qdb.metadata_template.prep_template.PrepTemplate(1)
         exp = join(
@@ -2529,6 +2529,27 @@ class TestSampleTemplate(TestCase):
         }
         self.assertEqual(obs, exp)
 
+    def test_samples_details(self):
+        obs = self.tester.samples_details(["1.SKD7.640191", "doesnotexist"])
+        exp = {
+            "1.SKD7.640191": (
+                "ERS000021",
+                [
+                    (1, "ERX0000021", "private", "18S"),
+                    (2, "ERX0000021", "private", "18S"),
+                ],
+            )
+        }
+        self.assertEqual(obs, exp)
+        self.assertEqual(self.tester.samples_details([]), {})
+
+    def test_existing_samples(self):
+        obs = self.tester.existing_samples(
+            ["1.SKD7.640191", "1.SKB8.640193", "doesnotexist"]
+        )
+        self.assertEqual(obs, {"1.SKD7.640191", "1.SKB8.640193"})
+        self.assertEqual(self.tester.existing_samples([]), set())
+
     def test_ebi_sample_accessions_setter(self):
         with self.assertRaises(qdb.exceptions.QiitaDBError):
             self.tester.ebi_sample_accessions = {
@@ -100,7 +100,10 @@ class Portal(qdb.base.QiitaObject):
                     VALUES (aid, pid);
                 END LOOP;
             END $do$;"""
-        qdb.sql_connection.perform_as_transaction(sql, [portal, desc])
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql, [portal, desc])
+            qdb.sql_connection.TRN.execute()
+            qdb.util.invalidate_lookup_cache()
 
         return cls(portal)
 
@@ -169,6 +172,7 @@ class Portal(qdb.base.QiitaObject):
                 END $do$;"""
             qdb.sql_connection.TRN.add(sql, [portal_id] * 2)
             qdb.sql_connection.TRN.execute()
+            qdb.util.invalidate_lookup_cache()
 
     @staticmethod
     def exists(portal):
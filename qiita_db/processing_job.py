@@ -6,7 +6,7 @@
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
 
-from collections import Iterable, defaultdict
+from collections import defaultdict
 from datetime import datetime, timedelta
 from itertools import chain
 from json import dumps, loads
@@ -14,8 +14,9 @@ from multiprocessing import Event, Process, Queue
 from os import environ
 from os.path import join
 from re import findall, search
+from shlex import quote
 from subprocess import PIPE, Popen
-from time import sleep
+from time import sleep, time
 from uuid import UUID
 
 import networkx as nx
@@ -24,9 +25,32 @@ from humanize import naturalsize
 from numpy import log as nlog  # noqa
 
 import qiita_db as qdb
-from qiita_core.qiita_settings import qiita_config
+from qiita_core.qiita_settings import qiita_config, r_client
 from qiita_db.util import create_nested_path
 
+# redis channel where the status changes of each job are published so other
+# processes can wait on them, see ProcessingJob.release_validators
+JOB_STATUS_CHANNEL = "processing_job_status_%s"
+# max number of seconds to wait for a status change notification before
+# checking the database again, just in case a notification was lost
+JOB_STATUS_WAIT_TIMEOUT = 60
+
+# redis hashes where the heartbeats and steps of the jobs are buffered before
+# they are written to the database, see ProcessingJob.flush_heartbeats
+HEARTBEAT_BUFFER_KEY = "processing_job_heartbeat_buffer"
+STEP_BUFFER_KEY = "processing_job_step_buffer"
+# the buffers are flushed at most every HEARTBEAT_FLUSH_INTERVAL seconds
+HEARTBEAT_FLUSH_KEY = "processing_job_heartbeat_flush"
+HEARTBEAT_FLUSH_INTERVAL = 30
+# removes the buffered values that didn't change while they were flushed
+_HDEL_IF_UNCHANGED = r_client.register_script("""
+for i = 1, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+""")
+
 
 class Watcher(Process):
     # TODO: Qiita will need a proper mapping of these states to Qiita states
@@ -303,6 +327,76 @@ def launch_job_scheduler(
     return job_id
 
 
+def launch_job_scheduler_array(
+    env_script, start_script, url, job_ids, job_dirs, resource_params, max_running=None
+):
+    """Submits several jobs as a single job scheduler array
+
+    Parameters
+    ----------
+    env_script : str
+        The environment script of the jobs' plugin
+    start_script : str
+        The start script of the jobs' plugin
+    url : str
+        The portal URL
+    job_ids : list of str
+        Qiita's UUID of the jobs
+    job_dirs : list of str
+        The working directory of each of the jobs
+    resource_params : str
+        The resources requested for each of the jobs in the array
+    max_running : int, optional
+        The max number of jobs of the array running at the same time
+
+    Returns
+    -------
+    list of str
+        The job scheduler id of each of the jobs, in the same order
+    """
+    lines = [
+        "#!/bin/bash",
+        "#SBATCH --output /dev/null",
+    ]
+    epilogue = environ.get("QIITA_JOB_SCHEDULER_EPILOGUE", "")
+    if epilogue:
+        lines.append(f"#SBATCH --epilog {epilogue}")
+    lines.extend(
+        [
+            "JOB_IDS=(%s)" % " ".join(job_ids),
+            "JOB_DIRS=(%s)" % " ".join(quote(d) for d in job_dirs),
+            "JOB_ID=${JOB_IDS[$SLURM_ARRAY_TASK_ID]}",
+            "JOB_DIR=${JOB_DIRS[$SLURM_ARRAY_TASK_ID]}",
+            'exec > "$JOB_DIR/slurm-output.txt" 2> "$JOB_DIR/slurm-error.txt"',
+            "echo $SLURM_JOBID",
+            "source ~/.bash_profile",
+            env_script,
+            f'{start_script} {url} "$JOB_ID" "$JOB_DIR"',
+        ]
+    )
+
+    # writing the script file, in the folder of the first job
+    for job_dir in job_dirs:
+        create_nested_path(job_dir)
+    fp = join(job_dirs[0], "%s_array.txt" % job_ids[0])
+    with open(fp, "w") as job_file:
+        job_file.write("\n".join(lines))
+
+    array = "0-%d" % (len(job_ids) - 1)
+    if max_running:
+        array = "%s%%%d" % (array, max_running)
+    sbatch_cmd = ["sbatch", "--array", array, resource_params, quote(fp)]
+
+    stdout, stderr, return_value = _system_call(" ".join(sbatch_cmd))
+
+    if return_value != 0:
+        raise AssertionError(f"Error submitting job: {sbatch_cmd} :: {stderr}")
+
+    array_id = stdout.strip("\n").split(" ")[-1]
+
+    return ["%s_%d" % (array_id, i) for i in range(len(job_ids))]
+
+
 def _system_call(cmd):
     """Execute the command `cmd`
 
@@ -607,7 +701,9 @@ class ProcessingJob(qdb.base.QiitaObject):
         with TTRN:
             command = parameters.command
             if not force:
-                # check if a job with the same parameters already exists
+                # check if a job with the same parameters already exists,
+                # see qiita.parameters_fingerprint for how the parameters
+                # are compared
                 sql = """SELECT processing_job_id, email,
                         processing_job_status, COUNT(aopj.artifact_id)
                      FROM qiita.processing_job
@@ -615,39 +711,14 @@ class ProcessingJob(qdb.base.QiitaObject):
                         USING (processing_job_status_id)
                      LEFT JOIN qiita.artifact_output_processing_job aopj
                         USING (processing_job_id)
-                     WHERE command_id = %s AND processing_job_status IN (
-                        'success', 'waiting', 'running', 'in_construction') {0}
+                     WHERE command_id = %s
+                        AND parameters_fingerprint =
+                            qiita.parameters_fingerprint(%s)
+                        AND processing_job_status IN (
+                            'success', 'waiting', 'running', 'in_construction')
                      GROUP BY processing_job_id, email,
                         processing_job_status"""
-
-                # we need to use ILIKE because of booleans as they can be
-                # false or False
-                params = []
-                for k, v in parameters.values.items():
-                    # this is necessary in case we have an Iterable as a value
-                    # but that is string
-                    if isinstance(v, Iterable) and not isinstance(v, str):
-                        for vv in v:
-                            params.extend([k, str(vv)])
-                    else:
-                        params.extend([k, str(v)])
-
-                if params:
-                    # divided by 2 as we have key-value pairs
-                    len_params = int(len(params) / 2)
-                    sql = sql.format(
-                        " AND "
-                        + " AND ".join(
-                            ["command_parameters->>%s ILIKE %s"] * len_params
-                        )
-                    )
-                    params = [command.id] + params
-                    TTRN.add(sql, params)
-                else:
-                    # the sql variable expects the list of parameters but if
-                    # there is no param we need to replace the {0} with an
-                    # empty string
-                    TTRN.add(sql.format(""), [command.id])
+                TTRN.add(sql, [command.id, parameters.dump()])
 
                 # checking that if the job status is success, it has children
                 # [2] status, [3] children count
@@ -704,9 +775,416 @@ class ProcessingJob(qdb.base.QiitaObject):
                 TTRN.add(sql, [dumps(pending), job_id])
 
             TTRN.execute()
+            qdb.util.invalidate_network_cache(job_ids=[job_id])
 
             return cls(job_id)
 
+    @classmethod
+    def create_many(cls, user, parameters, force=False):
+        """Creates several new jobs in the system in a single transaction
+
+        Parameters
+        ----------
+        user : qiita_db.user.User
+            The user executing the jobs
+        parameters : list of qiita_db.software.Parameters
+            The parameters of each of the jobs being executed
+        force : bool
+            Force creation on duplicated parameters
+
+        Returns
+        -------
+        list of qiita_db.processing_job.ProcessingJob
+            The newly created jobs, in the same order as `parameters`
+
+        See Also
+        --------
+        create
+        """
+        with qdb.sql_connection.TRN:
+            return [cls.create(user, p, force) for p in parameters]
+
+    @classmethod
+    def backfill_parameters_fingerprint(cls, batch_size=10000):
+        """Sets the parameters fingerprint of the jobs that don't have one
+
+        Parameters
+        ----------
+        batch_size : int, optional
+            The number of jobs updated per transaction. Default 10000
+
+        Returns
+        -------
+        int
+            The number of jobs updated
+
+        Notes
+        -----
+        New jobs get their fingerprint on insertion, this is only needed for
+        the jobs created before the fingerprint was introduced, see
+        python_patches/98.py
+        """
+        sql = """UPDATE qiita.processing_job
+                 SET parameters_fingerprint = qiita.parameters_fingerprint(
+                    command_parameters)
+                 WHERE processing_job_id IN (
+                    SELECT processing_job_id
+                    FROM qiita.processing_job
+                    WHERE parameters_fingerprint IS NULL
+                    LIMIT %s)
+                 RETURNING processing_job_id"""
+        total = 0
+        while True:
+            with qdb.sql_connection.TRN:
+                qdb.sql_connection.TRN.add(sql, [batch_size])
+                updated = len(qdb.sql_connection.TRN.execute_fetchflatten())
+            total += updated
+            if updated < batch_size:
+                break
+        return total
+
+    @classmethod
+    def list_jobs(
+        cls,
+        command_id=None,
+        user=None,
+        ignore_status=None,
+        show_hidden=False,
+        max_heartbeat_age=None,
+        search=None,
+        offset=0,
+        limit=None,
+    ):
+        """Returns the information of the jobs matching the filters
+
+        Parameters
+        ----------
+        command_id : int, optional
+            Only return jobs of this command. Note that the jobs of all the
+            commands with the same name are returned, as different versions
+            of the same plugin have different command ids
+        user : qiita_db.user.User, optional
+            Only return jobs of this user
+        ignore_status : list of str, optional
+            Don't return jobs that have one of these status
+        show_hidden : bool, optional
+            If true, return all jobs, including the hidden ones
+        max_heartbeat_age : int, optional
+            Only return jobs whose last heartbeat is newer than this number of
+            days or that don't have a heartbeat
+        search : str, optional
+            Only return jobs whose id, command, status, message or user
+            contains this string (case insensitive)
+        offset : int, optional
+            The number of jobs to skip. Default 0
+        limit : int, optional
+            The max number of jobs to return. Default: all
+
+        Returns
+        -------
+        int, int, list of dict
+            The number of jobs matching all the filters but `search`, the
+            number of jobs also matching `search` and the information of the
+            jobs in the requested page, with the keys: id, command_id,
+            command, status, message, step, log, outputs, validator_jobs,
+            heartbeat, parameters, external_id, user,
+            processing_job_workflow_id and hidden. The parameters include the
+            default values of the parameters missing in the job.
+
+        Notes
+        -----
+        The jobs are sorted by status (in_construction, running, queued,
+        waiting, error, success) and then by heartbeat, newest first. All
+        the information is retrieved in a single query.
+        """
+        filters = []
+        args = []
+        if command_id is not None:
+            filters.append("""command_id IN (
+                SELECT command_id FROM qiita.software_command
+                WHERE name IN (SELECT name FROM qiita.software_command
+                               WHERE command_id = %s))""")
+            args.append(command_id)
+        if user is not None:
+            filters.append("email = %s")
+            args.append(user.id)
+        if ignore_status:
+            filters.append("processing_job_status NOT IN %s")
+            args.append(tuple(ignore_status))
+        if not show_hidden:
+            filters.append("hidden = false")
+        if max_heartbeat_age is not None:
+            filters.append(
+                "(heartbeat > current_date - %s * interval '1' day "
+                "OR heartbeat IS NULL)"
+            )
+            args.append(max_heartbeat_age)
+
+        search_filter = "true"
+        search_args = []
+        if search:
+            search_filter = """(processing_job_id::text ILIKE %s
+                OR command ILIKE %s OR status ILIKE %s
+                OR COALESCE(step, '') ILIKE %s OR COALESCE(log, '') ILIKE %s
+                OR email ILIKE %s)"""
+            # escaping the ILIKE wildcards so they match literally
+            for c in ("\\", "%", "_"):
+                search = search.replace(c, "\\" + c)
+            search_args = ["%%%s%%" % search] * 6
+        # the search filter is used for the counts and the page
+        args.extend(search_args * 2)
+
+        sql = """WITH base AS (
+                    SELECT processing_job_id, command_id, sc.name AS command,
+                           processing_job_status AS status,
+                           CASE processing_job_status
+                                WHEN 'in_construction' THEN 1
+                                WHEN 'running' THEN 2
+                                WHEN 'queued' THEN 3
+                                WHEN 'waiting' THEN 4
+                                WHEN 'error' THEN 5
+                                WHEN 'success' THEN 6
+                           END AS status_order,
+                           step, l.msg AS log, heartbeat, command_parameters,
+                           external_job_id, email, hidden
+                    FROM qiita.processing_job
+                        JOIN qiita.processing_job_status
+                            USING (processing_job_status_id)
+                        JOIN qiita.software_command sc USING (command_id)
+                        LEFT JOIN qiita.logging l USING (logging_id)
+                    WHERE {0}),
+                 counts AS (
+                    SELECT COUNT(*) AS total,
+                           COUNT(*) FILTER (WHERE {1}) AS total_filtered
+                    FROM base),
+                 page AS (
+                    SELECT *
+                    FROM base
+                    WHERE {1}
+                    ORDER BY status_order, heartbeat DESC, processing_job_id
+                    LIMIT %s OFFSET %s)
+                 SELECT processing_job_id, command_id, command, status, step,
+                        log, heartbeat, command_parameters, external_job_id,
+                        email, hidden, total, total_filtered,
+                        ARRAY(SELECT json_build_array(name, artifact_id)
+                              FROM qiita.artifact_output_processing_job aopj
+                                JOIN qiita.command_output
+                                    USING (command_output_id)
+                              WHERE aopj.processing_job_id =
+                                    page.processing_job_id
+                              ORDER BY name) AS outputs,
+                        ARRAY(SELECT validator_id::text
+                              FROM qiita.processing_job_validator pjv
+                              WHERE pjv.processing_job_id =
+                                    page.processing_job_id
+                              ORDER BY validator_id) AS validator_jobs,
+                        (SELECT processing_job_workflow_id
+                         FROM qiita.processing_job_workflow_root
+                         WHERE processing_job_id IN (
+                            SELECT qiita.get_processing_workflow_roots(
+                                page.processing_job_id))
+                         LIMIT 1) AS processing_job_workflow_id
+                 FROM counts
+                    LEFT JOIN page ON true
+                 ORDER BY status_order, heartbeat DESC, processing_job_id""".format(
+            " AND ".join(filters) if filters else "true", search_filter
+        )
+        args.extend([limit, offset])
+
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql, args)
+            rows = qdb.sql_connection.TRN.execute_fetchindex()
+
+        # the counts are always returned, even if the page is empty
+        total, total_filtered = rows[0]["total"], rows[0]["total_filtered"]
+        rows = [row for row in rows if row["processing_job_id"] is not None]
+        if not rows:
+            return total, total_filtered, []
+
+        buffered = cls._get_buffered_heartbeats_and_steps(
+            [row["processing_job_id"] for row in rows]
+        )
+        # the parameters missing in the job take the default value of the
+        # command, as in ProcessingJob.parameters
+        defaults = {}
+        for cid in {row["command_id"] for row in rows}:
+            defaults[cid] = {
+                k: v[1]
+                for k, v in qdb.software.Command(cid).optional_parameters.items()
+            }
+
+        jobs = []
+        for row, (bhb, bstep) in zip(rows, buffered):
+            heartbeat = row["heartbeat"] if bhb is None else bhb
+            step = row["step"] if bstep is None else bstep
+            status = row["status"]
+            message = ""
+            if status == "error":
+                message = row["log"]
+            elif status == "running":
+                message = step
+            jobs.append(
+                {
+                    "id": row["processing_job_id"],
+                    "command_id": row["command_id"],
+                    "command": row["command"],
+                    "status": status,
+                    "message": message,
+                    "step": step,
+                    "log": row["log"],
+                    "outputs": row["outputs"] if status == "success" else [],
+                    "validator_jobs": row["validator_jobs"],
+                    "heartbeat": heartbeat,
+                    "parameters": {
+                        **defaults[row["command_id"]],
+                        **row["command_parameters"],
+                    },
+                    "external_id": row["external_job_id"],
+                    "user": row["email"],
+                    "processing_job_workflow_id": row["processing_job_workflow_id"],
+                    "hidden": row["hidden"],
+                }
+            )
+
+        return total, total_filtered, jobs
+
+    @classmethod
+    def jobs_page(
+        cls,
+        user=None,
+        artifact=None,
+        command=None,
+        status=None,
+        show_hidden=False,
+        cursor=None,
+        limit=100,
+    ):
+        """Returns a page of jobs, sorted by id
+
+        Parameters
+        ----------
+        user : qiita_db.user.User, optional
+            Only return jobs of this user
+        artifact : qiita_db.artifact.Artifact, optional
+            Only return jobs that used this artifact as input
+        command : qiita_db.software.Command, optional
+            Only return jobs that executed this command
+        status : str, optional
+            Only return jobs in this status
+        show_hidden : bool, optional
+            If true, return also the hidden jobs
+        cursor : str, optional
+            The cursor returned with the previous page, the id of the last
+            job returned. Default: start from the first job
+        limit : int, optional
+            The max number of jobs to return. Default 100
+
+        Returns
+        -------
+        list of dict, str
+            The jobs, with the keys: id, command_id, command, status, step,
+            heartbeat, external_id and user, and the cursor of the next page,
+            None if there are no more jobs
+
+        Notes
+        -----
+        The jobs are paginated by id (keyset pagination) so retrieving any
+        page costs the same, independently of the number of jobs. The
+        heartbeat is not used as it changes while the jobs run (and can be
+        buffered in redis, see update_heartbeat_state), which would skip or
+        repeat jobs between pages.
+        """
+        filters = []
+        args = []
+        if user is not None:
+            filters.append("email = %s")
+            args.append(user.id)
+        if artifact is not None:
+            filters.append("""processing_job_id IN (
+                SELECT processing_job_id
+                FROM qiita.artifact_processing_job
+                WHERE artifact_id = %s)""")
+            args.append(artifact.id)
+        if command is not None:
+            filters.append("command_id = %s")
+            args.append(command.id)
+        if status is not None:
+            filters.append("processing_job_status = %s")
+            args.append(status)
+        if not show_hidden:
+            filters.append("hidden = false")
+        if cursor is not None:
+            filters.append("processing_job_id > %s")
+            args.append(cursor)
+
+        sql = """SELECT processing_job_id, command_id, sc.name,
+                        processing_job_status, step, heartbeat,
+                        external_job_id, email
+                 FROM qiita.processing_job
+                    JOIN qiita.processing_job_status
+                        USING (processing_job_status_id)
+                    JOIN qiita.software_command sc USING (command_id)
+                 WHERE {0}
+                 ORDER BY processing_job_id
+                 LIMIT %s""".format(" AND ".join(filters) if filters else "true")
+        args.append(limit + 1)
+
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql, args)
+            rows = qdb.sql_connection.TRN.execute_fetchindex()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1][0]
+
+        buffered = cls._get_buffered_heartbeats_and_steps([r[0] for r in rows])
+        jobs = []
+        for row, (bhb, bstep) in zip(rows, buffered):
+            jid, cid, cname, jstatus, step, heartbeat, eid, email = row
+            jobs.append(
+                {
+                    "id": jid,
+                    "command_id": cid,
+                    "command": cname,
+                    "status": jstatus,
+                    "step": step if bstep is None else bstep,
+                    "heartbeat": heartbeat if bhb is None else bhb,
+                    "external_id": eid,
+                    "user": email,
+                }
+            )
+
+        return jobs, next_cursor
+
+    @staticmethod
+    def _get_buffered_heartbeats_and_steps(job_ids):
+        """Returns the heartbeats and steps of the jobs still buffered in redis
+
+        Parameters
+        ----------
+        job_ids : list of str
+            The job ids
+
+        Returns
+        -------
+        list of (datetime, str)
+            The buffered heartbeat and step of each job, None if not buffered
+        """
+        if not job_ids:
+            return []
+        pipe = r_client.pipeline(transaction=False)
+        pipe.hmget(HEARTBEAT_BUFFER_KEY, job_ids)
+        pipe.hmget(STEP_BUFFER_KEY, job_ids)
+        heartbeats, steps = pipe.execute()
+        return [
+            (
+                None if hb is None else datetime.fromisoformat(hb.decode("ascii")),
+                None if step is None else step.decode("utf-8"),
+            )
+            for hb, step in zip(heartbeats, steps)
+        ]
+
     @property
     def user(self):
         """The user that launched the job
@@ -775,10 +1253,9 @@ class ProcessingJob(qdb.base.QiitaObject):
                      WHERE processing_job_id = %s
                      ORDER BY artifact_id"""
             qdb.sql_connection.TRN.add(sql, [self.id])
-            return [
-                qdb.artifact.Artifact(aid)
-                for aid in qdb.sql_connection.TRN.execute_fetchflatten()
-            ]
+            return qdb.artifact.Artifact.from_trusted_ids(
+                qdb.sql_connection.TRN.execute_fetchflatten()
+            )
 
     @property
     def status(self):
@@ -946,6 +1423,10 @@ class ProcessingJob(qdb.base.QiitaObject):
                      SET processing_job_status_id = %s
                      WHERE processing_job_id = %s"""
             qdb.sql_connection.TRN.add(sql, [new_status, self.id])
+            qdb.util.invalidate_network_cache(job_ids=[self.id])
+            qdb.sql_connection.TRN.add_post_commit_func(
+                r_client.publish, JOB_STATUS_CHANNEL % self.id, value
+            )
             qdb.sql_connection.TRN.execute()
 
     @property
@@ -1194,6 +1675,120 @@ class ProcessingJob(qdb.base.QiitaObject):
         if job_id is not None:
             self.external_id = job_id
 
+    @classmethod
+    def submit_many(cls, jobs, max_running=None):
+        """Submits several jobs to execution
+
+        Parameters
+        ----------
+        jobs : list of qiita_db.processing_job.ProcessingJob
+            The jobs to submit
+        max_running : int, optional
+            The max number of the jobs running at the same time, only used
+            when the jobs are submitted as a job scheduler array
+
+        Raises
+        ------
+        QiitaDBOperationNotPermittedError
+            If any of the jobs is not in 'waiting' or 'in_construction' status
+
+        Notes
+        -----
+        When using the job scheduler launcher, the jobs of the same plugin and
+        with the same resource allocation are submitted as a single job
+        array, split in arrays of at most `job_scheduler_max_array_size` jobs;
+        otherwise, the jobs are submitted one by one via submit. If an array
+        can't be submitted, all its jobs are set to 'error'.
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return
+
+        launcher = qiita_config.plugin_launcher
+        groups = defaultdict(list)
+        single = []
+        with qdb.sql_connection.TRN:
+            sql = """SELECT processing_job_id::text, processing_job_status
+                     FROM qiita.processing_job
+                        JOIN qiita.processing_job_status
+                            USING (processing_job_status_id)
+                     WHERE processing_job_id IN %s"""
+            qdb.sql_connection.TRN.add(sql, [tuple(j.id for j in jobs)])
+            statuses = dict(qdb.sql_connection.TRN.execute_fetchindex())
+            for job in jobs:
+                status = statuses[job.id]
+                if status not in {"in_construction", "waiting"}:
+                    raise qdb.exceptions.QiitaDBOperationNotPermittedError(
+                        "Can't submit job, not in 'in_construction' or "
+                        "'waiting' status. Current status: %s" % status
+                    )
+
+            for job in jobs:
+                software = job.command.software
+                # only the jobs submitted to the job scheduler without the
+                # special ENVIRONMENT case (see submit) can be grouped
+                if (
+                    launcher != "qiita-plugin-launcher-slurm"
+                    or "ENVIRONMENT" in software.environment_script
+                ):
+                    single.append(job)
+                    continue
+                try:
+                    resource_params = job.resource_allocation_info
+                except qdb.exceptions.QiitaDBUnknownIDError as e:
+                    job._set_error(str(e))
+                    continue
+                job._set_status("queued")
+                key = (
+                    software.environment_script,
+                    software.start_script,
+                    resource_params,
+                )
+                groups[key].append(job)
+            # At this point we are going to involve other processes. We need
+            # to commit the changes to the DB or the other processes will not
+            # see these changes
+            qdb.sql_connection.TRN.commit()
+
+        url = "%s%s" % (qiita_config.base_url, qiita_config.portal_dir)
+        work_dir = qdb.util.get_work_base_dir()
+        # the job scheduler rejects arrays larger than its max array size
+        size = qiita_config.job_scheduler_max_array_size
+        arrays = [
+            (key, group[i : i + size])
+            for key, group in groups.items()
+            for i in range(0, len(group), size)
+        ]
+        for (env_script, start_script, resource_params), group in arrays:
+            job_ids = [j.id for j in group]
+            try:
+                external_ids = launch_job_scheduler_array(
+                    env_script,
+                    start_script,
+                    url,
+                    job_ids,
+                    [join(work_dir, jid) for jid in job_ids],
+                    resource_params,
+                    max_running,
+                )
+            except Exception as e:
+                # the jobs were already committed as 'queued', so they need
+                # to be flagged or they will never leave that status
+                for job in group:
+                    job._set_error(str(e))
+                continue
+            sql = """UPDATE qiita.processing_job
+                     SET external_job_id = %s
+                     WHERE processing_job_id = %s"""
+            with qdb.sql_connection.TRN:
+                qdb.sql_connection.TRN.add(
+                    sql, list(zip(external_ids, job_ids)), many=True
+                )
+                qdb.sql_connection.TRN.execute()
+
+        for job in single:
+            job.submit()
+
     def release(self):
         """Releases the job from the waiting status and creates the artifact
 
@@ -1291,39 +1886,66 @@ class ProcessingJob(qdb.base.QiitaObject):
                 "Only artifact transformation and private jobs can release validators"
             )
 
-        # Check if all the validators are completed. Validator jobs can be
-        # in two states when completed: 'waiting' in case of success
-        # or 'error' otherwise
+        # Validator jobs can be in two states when completed: 'waiting' in
+        # case of success or 'error' otherwise. Instead of polling, we wait
+        # for the validators to publish their status changes and then check
+        # all their statuses at once. Note that we subscribe before the first
+        # check so we don't miss any change.
+        sql = """SELECT validator_id, processing_job_status, external_job_id
+                 FROM qiita.processing_job_validator pjv
+                 JOIN qiita.processing_job pj
+                     ON pjv.validator_id = pj.processing_job_id
+                 JOIN qiita.processing_job_status USING (
+                    processing_job_status_id)
+                 WHERE pjv.processing_job_id = %s"""
+        pubsub = r_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            validators = []
+            remaining = None
+            while True:
+                with qdb.sql_connection.TRN:
+                    qdb.sql_connection.TRN.add(sql, [self.id])
+                    validators = qdb.sql_connection.TRN.execute_fetchindex()
+                if not pubsub.subscribed and validators:
+                    pubsub.subscribe(
+                        *[JOB_STATUS_CHANNEL % vid for vid, _, _ in validators]
+                    )
+                    continue
 
-        validator_ids = [
-            "%s [%s]" % (j.id, j.external_id)
-            for j in self.validator_jobs
-            if j.status not in ["waiting", "error"]
-        ]
+                # we fail as soon as we see one errored validator, there is
+                # no need to wait for the rest of them
+                if any(status == "error" for _, status, _ in validators):
+                    break
 
-        # Active polling - wait until all validator jobs are completed
-        # TODO: As soon as we see one errored validator, we should kill
-        # the other jobs and exit early. Don't wait for all of the jobs
-        # to complete.
-        while validator_ids:
-            jids = ", ".join(validator_ids)
-            self.step = "Validating outputs (%d remaining) via job(s) %s" % (
-                len(validator_ids),
-                jids,
-            )
-            sleep(10)
-            validator_ids = [
-                "%s [%s]" % (j.id, j.external_id)
-                for j in self.validator_jobs
-                if j.status not in ["waiting", "error"]
-            ]
-
-        # Check if any of the validators errored
-        errored = [j for j in self.validator_jobs if j.status == "error"]
+                running = [
+                    "%s [%s]" % (vid, eid)
+                    for vid, status, eid in validators
+                    if status != "waiting"
+                ]
+                if not running:
+                    break
+                if len(running) != remaining:
+                    remaining = len(running)
+                    self.step = "Validating outputs (%d remaining) via job(s) %s" % (
+                        remaining,
+                        ", ".join(running),
+                    )
+
+                # wait until any of the validators changes its status
+                deadline = time() + JOB_STATUS_WAIT_TIMEOUT
+                while time() < deadline:
+                    if pubsub.get_message(timeout=deadline - time()) is not None:
+                        break
+        finally:
+            pubsub.close()
+
+        errored = [
+            ProcessingJob(vid) for vid, status, _ in validators if status == "error"
+        ]
         if errored:
             # At least one of the validators failed, Set the rest of the
             # validators and the current job as failed
-            waiting = [j.id for j in self.validator_jobs if j.status == "waiting"]
+            pending = [vid for vid, status, _ in validators if status != "error"]
 
             common_error = "\n".join(
                 ["Validator %s error message: %s" % (j.id, j.log.msg) for j in errored]
@@ -1333,7 +1955,7 @@ class ProcessingJob(qdb.base.QiitaObject):
                 len(errored),
                 common_error,
             )
-            for j in waiting:
+            for j in pending:
                 ProcessingJob(j)._set_error(val_error)
 
             self._set_error(
@@ -1599,25 +2221,15 @@ class ProcessingJob(qdb.base.QiitaObject):
             # Link all the validator jobs with the current job
             self._set_validator_jobs(validator_jobs)
 
-            # Submit m validator jobs as n lists of jobs
+            # Submit the m validator jobs at once; the scheduler runs at most
+            # as many of them at the same time as the n lists of jobs that
+            # were used to be submitted as dependency chains
             n = qiita_config.job_scheduler_dependency_q_cnt
             if n is None:
                 n = 2
-
-            # taken from:
-            # https://www.geeksforgeeks.org/break-list-chunks-size-n-python/
-            lists = [
-                validator_jobs[i * n : (i + 1) * n]
-                for i in range((len(validator_jobs) + n - 1) // n)
-            ]
-
-            for sub_list in lists:
-                # each sub_list will always have at least a lead_job
-                lead_job = sub_list.pop(0)
-                if not sub_list:
-                    # sub_list is now empty
-                    sub_list = None
-                lead_job.submit(dependent_jobs_list=sub_list)
+            ProcessingJob.submit_many(
+                validator_jobs, max_running=(len(validator_jobs) + n - 1) // n
+            )
 
             # Submit the job that will release all the validators
             plugin = qdb.software.Software.from_name_and_version("Qiita", "alpha")
@@ -1749,6 +2361,10 @@ class ProcessingJob(qdb.base.QiitaObject):
         datetime
             The last heartbeat timestamp
         """
+        heartbeat = r_client.hget(HEARTBEAT_BUFFER_KEY, self.id)
+        if heartbeat is not None:
+            return datetime.fromisoformat(heartbeat.decode("ascii"))
+
         with qdb.sql_connection.TRN:
             sql = """SELECT heartbeat
                      FROM qiita.processing_job
@@ -1766,6 +2382,11 @@ class ProcessingJob(qdb.base.QiitaObject):
         ------
         QiitaDBOperationNotPermittedError
             If the job is already completed
+
+        Notes
+        -----
+        The heartbeat is buffered in redis and written to the database by
+        flush_heartbeats
         """
         with qdb.sql_connection.TRN:
             status = self.status
@@ -1775,11 +2396,8 @@ class ProcessingJob(qdb.base.QiitaObject):
                 raise qdb.exceptions.QiitaDBOperationNotPermittedError(
                     "Can't execute heartbeat on job: already completed"
                 )
-            sql = """UPDATE qiita.processing_job
-                     SET heartbeat = %s
-                     WHERE processing_job_id = %s"""
-            qdb.sql_connection.TRN.add(sql, [datetime.now(), self.id])
-            qdb.sql_connection.TRN.execute()
+        r_client.hset(HEARTBEAT_BUFFER_KEY, self.id, datetime.now().isoformat())
+        self._flush_heartbeats_if_due()
 
     @property
     def step(self):
@@ -1790,6 +2408,10 @@ class ProcessingJob(qdb.base.QiitaObject):
         str
             The current step of the job
         """
+        step = r_client.hget(STEP_BUFFER_KEY, self.id)
+        if step is not None:
+            return step.decode("utf-8")
+
         with qdb.sql_connection.TRN:
             sql = """SELECT step
                      FROM qiita.processing_job
@@ -1810,15 +2432,76 @@ class ProcessingJob(qdb.base.QiitaObject):
         ------
         qiita_db.exceptions.QiitaDBOperationNotPermittedError
             If the status of the job is not 'running'
+
+        Notes
+        -----
+        The step is buffered in redis and written to the database by
+        flush_heartbeats
         """
         if self.status != "running":
             raise qdb.exceptions.QiitaDBOperationNotPermittedError(
                 "Cannot change the step of a job whose status is not 'running'"
             )
-        sql = """UPDATE qiita.processing_job
-                 SET step = %s
-                 WHERE processing_job_id = %s"""
-        qdb.sql_connection.perform_as_transaction(sql, [value, self.id])
+        r_client.hset(STEP_BUFFER_KEY, self.id, value)
+        self._flush_heartbeats_if_due()
+
+    @classmethod
+    def _flush_heartbeats_if_due(cls):
+        """Flushes the heartbeats and steps if the flush interval has passed"""
+        if r_client.set(HEARTBEAT_FLUSH_KEY, 1, nx=True, ex=HEARTBEAT_FLUSH_INTERVAL):
+            cls.flush_heartbeats()
+
+    @classmethod
+    def flush_heartbeats(cls):
+        """Writes the heartbeats and steps buffered in redis to the database
+
+        Returns
+        -------
+        int
+            The number of heartbeats and steps written
+
+        Notes
+        -----
+        Each buffer is written in a single UPDATE and the buffered values are
+        only removed from redis if they didn't change while being written
+        """
+        pipe = r_client.pipeline()
+        pipe.hgetall(HEARTBEAT_BUFFER_KEY)
+        pipe.hgetall(STEP_BUFFER_KEY)
+        heartbeats, steps = pipe.execute()
+        if not heartbeats and not steps:
+            return 0
+
+        sql = """UPDATE qiita.processing_job pj
+                 SET {0} = v.value
+                 FROM (SELECT unnest(%s::uuid[]) AS processing_job_id,
+                              unnest(%s::{1}[]) AS value) v
+                 WHERE pj.processing_job_id = v.processing_job_id"""
+        with qdb.sql_connection.TRN:
+            for column, ctype, values in (
+                ("heartbeat", "timestamp", heartbeats),
+                ("step", "varchar", steps),
+            ):
+                if values:
+                    qdb.sql_connection.TRN.add(
+                        sql.format(column, ctype),
+                        [
+                            [k.decode("ascii") for k in values],
+                            [v.decode("utf-8") for v in values.values()],
+                        ],
+                    )
+            qdb.sql_connection.TRN.execute()
+
+        for key, values in (
+            (HEARTBEAT_BUFFER_KEY, heartbeats),
+            (STEP_BUFFER_KEY, steps),
+        ):
+            if values:
+                _HDEL_IF_UNCHANGED(
+                    keys=[key], args=list(chain.from_iterable(values.items()))
+                )
+
+        return len(heartbeats) + len(steps)
 
     @property
     def children(self):
@@ -1834,8 +2517,9 @@ class ProcessingJob(qdb.base.QiitaObject):
                      FROM qiita.parent_processing_job
                      WHERE parent_id = %s"""
             qdb.sql_connection.TRN.add(sql, [self.id])
-            for jid in qdb.sql_connection.TRN.execute_fetchflatten():
-                yield ProcessingJob(jid)
+            yield from ProcessingJob.from_trusted_ids(
+                qdb.sql_connection.TRN.execute_fetchflatten()
+            )
 
     @property
     def validator_jobs(self):
@@ -1927,13 +2611,9 @@ class ProcessingJob(qdb.base.QiitaObject):
         """
         ready = self._update_children(mapping)
         # Submit all the children that already have all the input parameters
-        for c in ready:
-            if c.status in {"in_construction", "waiting"}:
-                c.submit()
-                # some jobs create several children jobs/validators and this
-                # can clog the submission process; giving it a second to
-                # avoid this
-                sleep(1)
+        ProcessingJob.submit_many(
+            [c for c in ready if c.status in {"in_construction", "waiting"}]
+        )
 
     @property
     def outputs(self):
@@ -2036,6 +2716,7 @@ class ProcessingJob(qdb.base.QiitaObject):
                      SET hidden = %s
                      WHERE processing_job_id = %s"""
             qdb.sql_connection.TRN.add(sql, [True, self.id])
+            qdb.util.invalidate_network_cache(job_ids=[self.id])
             qdb.sql_connection.TRN.execute()
 
     @property
@@ -2475,9 +3156,8 @@ class ProcessingWorkflow(qdb.base.QiitaObject):
             edges = qdb.sql_connection.TRN.execute_fetchindex()
             nodes = {}
             if edges:
-                nodes = {
-                    jid: ProcessingJob(jid) for jid in set(chain.from_iterable(edges))
-                }
+                jids = set(chain.from_iterable(edges))
+                nodes = dict(zip(jids, ProcessingJob.from_trusted_ids(jids)))
                 edges = [(nodes[s], nodes[d]) for s, d in edges]
                 g.add_edges_from(edges)
             # It is possible that there are root jobs that doesn't have any
@@ -2490,10 +3170,9 @@ class ProcessingWorkflow(qdb.base.QiitaObject):
                 sql += " AND processing_job_id NOT IN %s"
                 sql_args.append(tuple(nodes))
             qdb.sql_connection.TRN.add(sql, sql_args)
-            nodes = [
-                ProcessingJob(jid)
-                for jid in qdb.sql_connection.TRN.execute_fetchflatten()
-            ]
+            nodes = ProcessingJob.from_trusted_ids(
+                qdb.sql_connection.TRN.execute_fetchflatten()
+            )
             g.add_nodes_from(nodes)
 
         return g
@@ -2609,6 +3288,9 @@ class ProcessingWorkflow(qdb.base.QiitaObject):
                          VALUES (%s, %s)"""
                 sql_args = [[s.id, new_job.id] for s in connections]
                 qdb.sql_connection.TRN.add(sql, sql_args, many=True)
+                # the job was not linked to the workflow on creation so
+                # its network couldn't be found at that point
+                qdb.util.invalidate_network_cache(job_ids=[new_job.id])
                 qdb.sql_connection.TRN.execute()
             else:
                 # The new job doesn't depend on any previous job in the
@@ -2661,6 +3343,10 @@ class ProcessingWorkflow(qdb.base.QiitaObject):
                     for c in children:
                         self.remove(c, cascade=True)
 
+            # the job still needs to be linked to its inputs to find the
+            # networks it belongs to
+            qdb.util.invalidate_network_cache(job_ids=[job.id])
+
             # Remove any edges (it can only appear as a child)
             sql = """DELETE FROM qiita.parent_processing_job
                      WHERE child_id = %s"""
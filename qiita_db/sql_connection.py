@@ -18,6 +18,19 @@ Classes
    :toctree: generated/
 
    Transaction
+   QueryProfile
+
+Methods
+-------
+
+.. autosummary::
+   :toctree: generated/
+
+   start_profile
+   stop_profile
+   profile_statements
+   get_profiles
+   sql_profiles_report
 """
 
 # -----------------------------------------------------------------------------
@@ -28,15 +41,314 @@ Classes
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
 from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import wraps
 from itertools import chain
+from json import dumps, loads
+from os.path import sep
+from re import compile as re_compile
+from sys import _getframe
+from time import perf_counter, time
 
 from psycopg2 import Error as PostgresError
 from psycopg2 import OperationalError, ProgrammingError, connect, errorcodes
 from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 from psycopg2.extras import DictCursor
 
-from qiita_core.qiita_settings import qiita_config
+from qiita_core.qiita_settings import qiita_config, r_client
+
+# redis list with the latest stored SQL profiles, newest first
+SQL_PROFILES_KEY = "qiita_sql_profiles"
+SQL_PROFILES_MAX = 1000
+# statements taking longer than this (in seconds) are reported as slow
+SQL_SLOW_QUERY_SECONDS = 0.5
+# statements executed at least this number of times while profiling a single
+# request or job are reported as possible N+1 queries
+SQL_N_PLUS_ONE_CALLS = 20
+
+# the profile of the request or job running in the current context, if any
+_PROFILE = ContextVar("qiita_sql_profile", default=None)
+# the literals and the ids in the dynamic table names are removed so all the
+# executions of the same statement share the same fingerprint
+_FINGERPRINT_SUBS = [
+    (re_compile(r"'(?:[^']|'')*'"), "?"),
+    (re_compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re_compile(r"\b(qiita\.(?:sample|prep)_)\d+\b"), r"\1N"),
+    (re_compile(r"\s+"), " "),
+]
+
+
+def fingerprint(sql):
+    """Normalizes `sql` so all the executions of a statement can be grouped
+
+    Parameters
+    ----------
+    sql : str
+        The SQL statement
+
+    Returns
+    -------
+    str
+        The statement without literals and extra white space
+    """
+    sql = str(sql)
+    for regex, repl in _FINGERPRINT_SUBS:
+        sql = regex.sub(repl, sql)
+    return sql.strip()
+
+
+def _call_site():
+    """Returns where the statement being executed was added"""
+    frame = _getframe(1)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return "%s:%d %s" % (
+        "/".join(frame.f_code.co_filename.split(sep)[-2:]),
+        frame.f_lineno,
+        frame.f_code.co_name,
+    )
+
+
+class QueryProfile(object):
+    """The SQL statements executed while profiling a request or job
+
+    Parameters
+    ----------
+    name : str
+        What is being profiled, e.g. the HTTP method and path of a request
+    job_id : str, optional
+        The processing job this profile belongs to
+
+    Attributes
+    ----------
+    statements : dict of {str: dict}
+        The number of calls, the total and max duration (in seconds), the
+        number of rows and the call sites of each statement, keyed by its
+        fingerprint
+    """
+
+    def __init__(self, name, job_id=None):
+        self.name = name
+        self.job_id = job_id
+        self.started = time()
+        self.duration = None
+        self.statements = {}
+        self._token = None
+
+    def record(self, sql, duration, rows):
+        """Records an execution of `sql`
+
+        Parameters
+        ----------
+        sql : str
+            The executed SQL statement
+        duration : float
+            The execution time in seconds
+        rows : int
+            The number of rows returned or affected by the statement
+        """
+        fp = fingerprint(sql)
+        stmt = self.statements.get(fp)
+        if stmt is None:
+            stmt = self.statements[fp] = {
+                "calls": 0,
+                "duration": 0,
+                "max_duration": 0,
+                "rows": 0,
+                "call_sites": {},
+            }
+        stmt["calls"] += 1
+        stmt["duration"] += duration
+        stmt["max_duration"] = max(stmt["max_duration"], duration)
+        stmt["rows"] += max(rows, 0)
+        site = _call_site()
+        stmt["call_sites"][site] = stmt["call_sites"].get(site, 0) + 1
+
+    def to_dict(self):
+        """Returns the profile as a JSON serializable dict"""
+        return {
+            "name": self.name,
+            "job_id": self.job_id,
+            "started": self.started,
+            "duration": self.duration,
+            "queries": sum(s["calls"] for s in self.statements.values()),
+            "statements": self.statements,
+        }
+
+
+def start_profile(name, job_id=None):
+    """Starts profiling the statements executed in the current context
+
+    Parameters
+    ----------
+    name : str
+        What is being profiled, e.g. the HTTP method and path of a request
+    job_id : str, optional
+        The processing job being profiled
+
+    Returns
+    -------
+    QueryProfile or None
+        The new profile, None if SQL_PROFILING is not enabled in the
+        configuration file
+
+    Notes
+    -----
+    The profile is kept in a context variable so the statements of
+    concurrent tornado requests are not mixed.
+    """
+    if not qiita_config.sql_profiling:
+        return None
+    profile = QueryProfile(name, job_id)
+    profile._token = _PROFILE.set(profile)
+    return profile
+
+
+def stop_profile(profile, store=True):
+    """Stops `profile` and stores it so it's part of the reports
+
+    Parameters
+    ----------
+    profile : QueryProfile or None
+        The profile returned by start_profile
+    store : bool, optional
+        Whether to store the profile so it's part of the reports.
+        Default: True
+    """
+    if profile is None or profile.duration is not None:
+        return
+    profile.duration = time() - profile.started
+    try:
+        _PROFILE.reset(profile._token)
+    except ValueError:
+        # the request finished in a different context than it started
+        _PROFILE.set(None)
+    if store:
+        r_client.lpush(SQL_PROFILES_KEY, dumps(profile.to_dict()))
+        r_client.ltrim(SQL_PROFILES_KEY, 0, SQL_PROFILES_MAX - 1)
+
+
+@contextmanager
+def profile_statements(name, job_id=None, store=True):
+    """Profiles the statements executed inside the with block
+
+    Parameters
+    ----------
+    name : str
+        What is being profiled
+    job_id : str, optional
+        The processing job being profiled
+    store : bool, optional
+        Whether to store the profile so it's part of the reports.
+        Default: True
+    """
+    profile = start_profile(name, job_id)
+    try:
+        yield profile
+    finally:
+        stop_profile(profile, store)
+
+
+def get_profiles():
+    """Returns the stored SQL profiles
+
+    Returns
+    -------
+    list of dict
+        The profiles, as returned by QueryProfile.to_dict, newest first
+    """
+    return [loads(p) for p in r_client.lrange(SQL_PROFILES_KEY, 0, -1)]
+
+
+def sql_profiles_report(
+    slow_seconds=SQL_SLOW_QUERY_SECONDS, n_plus_one_calls=SQL_N_PLUS_ONE_CALLS
+):
+    """Summarizes the stored SQL profiles
+
+    Parameters
+    ----------
+    slow_seconds : float, optional
+        Statements with an execution longer than this are reported as slow
+    n_plus_one_calls : int, optional
+        Statements executed at least this number of times in a single
+        profile are reported as possible N+1 queries
+
+    Returns
+    -------
+    dict
+        - profiles: the profiles, without their statements, sorted by
+          number of queries
+        - slow_queries: the slow statements, grouped by fingerprint across
+          all the profiles, sorted by max duration
+        - n_plus_one: the statements executed too many times per profile,
+          sorted by number of calls
+        - jobs: the number of requests, queries and the time spent in the
+          database per processing job
+    """
+    profiles = []
+    slow = {}
+    n_plus_one = []
+    jobs = {}
+    for profile in get_profiles():
+        statements = profile.pop("statements")
+        db_time = sum(s["duration"] for s in statements.values())
+        profile["db_duration"] = db_time
+        profiles.append(profile)
+
+        if profile["job_id"] is not None:
+            job = jobs.setdefault(
+                profile["job_id"],
+                {
+                    "job_id": profile["job_id"],
+                    "requests": 0,
+                    "queries": 0,
+                    "db_duration": 0,
+                },
+            )
+            job["requests"] += 1
+            job["queries"] += profile["queries"]
+            job["db_duration"] += db_time
+
+        for fp, stmt in statements.items():
+            if stmt["max_duration"] >= slow_seconds:
+                s = slow.setdefault(
+                    fp,
+                    {
+                        "fingerprint": fp,
+                        "calls": 0,
+                        "duration": 0,
+                        "max_duration": 0,
+                        "call_sites": set(),
+                    },
+                )
+                s["calls"] += stmt["calls"]
+                s["duration"] += stmt["duration"]
+                s["max_duration"] = max(s["max_duration"], stmt["max_duration"])
+                s["call_sites"].update(stmt["call_sites"])
+            if stmt["calls"] >= n_plus_one_calls:
+                n_plus_one.append(
+                    {
+                        "name": profile["name"],
+                        "fingerprint": fp,
+                        "calls": stmt["calls"],
+                        "duration": stmt["duration"],
+                        "call_sites": sorted(stmt["call_sites"]),
+                    }
+                )
+
+    for s in slow.values():
+        s["call_sites"] = sorted(s["call_sites"])
+
+    return {
+        "profiles": sorted(profiles, key=lambda p: p["queries"], reverse=True),
+        "slow_queries": sorted(
+            slow.values(), key=lambda s: s["max_duration"], reverse=True
+        ),
+        "n_plus_one": sorted(n_plus_one, key=lambda s: s["calls"], reverse=True),
+        "jobs": sorted(jobs.values(), key=lambda j: j["queries"], reverse=True),
+    }
 
 
 def _checker(func):
@@ -264,8 +576,11 @@ class Transaction(object):
         that we catch any exception that happens in here and we rollback the
         transaction
         """
+        profile = _PROFILE.get()
         with self._get_cursor() as cur:
             for sql, sql_args in self._queries:
+                if profile is not None:
+                    start = perf_counter()
                 # Execute the current SQL command
                 try:
                     cur.execute(sql, sql_args)
@@ -289,6 +604,9 @@ class Transaction(object):
                     # query, so we need to rollback
                     self._raise_execution_error(sql, sql_args, e)
 
+                if profile is not None:
+                    profile.record(sql, perf_counter() - start, cur.rowcount)
+
                 # Store the results of the current query
                 self._results.append(res)
 
@@ -330,6 +648,39 @@ class Transaction(object):
             self.rollback()
             raise
 
+    @_checker
+    def copy_expert(self, sql, file):
+        """Executes a COPY statement using `file` as its STDIN or STDOUT
+
+        Parameters
+        ----------
+        sql : str
+            The COPY ... FROM STDIN or COPY ... TO STDOUT statement
+        file : file-like object
+            The file to read the data from or to write the data to
+
+        Raises
+        ------
+        RuntimeError
+            If invoked outside a context
+
+        Notes
+        -----
+        The queries already added to the transaction are executed first, so
+        the COPY happens after them. As with execute, the transaction is not
+        committed.
+        """
+        self.execute()
+        profile = _PROFILE.get()
+        with self._get_cursor() as cur:
+            start = perf_counter()
+            try:
+                cur.copy_expert(sql, file)
+            except Exception as e:
+                self._raise_execution_error(sql, None, e)
+            if profile is not None:
+                profile.record(sql, perf_counter() - start, cur.rowcount)
+
     @_checker
     def execute_fetchlast(self):
         """Executes the transaction and returns the last result
@@ -466,6 +817,11 @@ class Transaction(object):
     def index(self):
         return len(self._queries) + len(self._results)
 
+    @property
+    def in_context(self):
+        """Whether the transaction has been entered and not yet exited"""
+        return self._contexts_entered > 0
+
     @_checker
     def add_post_commit_func(self, func, *args, **kwargs):
         """Adds a post commit function
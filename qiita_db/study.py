@@ -143,18 +143,20 @@ class Study(qdb.base.QiitaObject):
 
     @property
     def status(self):
-        r"""The status is inferred by the status of its artifacts"""
+        r"""The status is inferred by the status of its artifacts
+
+        Notes
+        -----
+        The inferred status is kept up to date in qiita.study_visibility, see
+        patch 101.sql
+        """
         with qdb.sql_connection.TRN:
-            # Get the status of all its artifacts
-            sql = """SELECT DISTINCT visibility
-                     FROM qiita.visibility
-                        JOIN qiita.artifact USING (visibility_id)
-                        JOIN qiita.study_artifact USING (artifact_id)
-                     WHERE study_id = %s and visibility_id NOT IN %s"""
-            qdb.sql_connection.TRN.add(
-                sql, [self._id, qdb.util.artifact_visibilities_to_skip()]
-            )
-            return qdb.util.infer_status(qdb.sql_connection.TRN.execute_fetchindex())
+            sql = """SELECT visibility
+                     FROM qiita.study_visibility
+                        JOIN qiita.visibility USING (visibility_id)
+                     WHERE study_id = %s"""
+            qdb.sql_connection.TRN.add(sql, [self._id])
+            return qdb.sql_connection.TRN.execute_fetchlast()
 
     @staticmethod
     def all_data_types():
@@ -181,33 +183,18 @@ class Study(qdb.base.QiitaObject):
 
         Returns
         -------
-        set of qiita_db.study.Study
-            All studies in the database that match the given status
+        set of int
+            The ids of all studies in the database that match the given status
         """
         with qdb.sql_connection.TRN:
-            sql = """SELECT DISTINCT study_id
-                     FROM qiita.study_artifact
-                        JOIN qiita.artifact USING (artifact_id)
+            sql = """SELECT study_id
+                     FROM qiita.study_visibility
                         JOIN qiita.visibility USING (visibility_id)
                         JOIN qiita.study_portal USING (study_id)
                         JOIN qiita.portal_type USING (portal_type_id)
-                      WHERE visibility = %s AND portal = %s"""
+                     WHERE visibility = %s AND portal = %s"""
             qdb.sql_connection.TRN.add(sql, [status, qiita_config.portal])
-            sids = set(qdb.sql_connection.TRN.execute_fetchflatten())
-            # If status is sandbox, all the studies that are not present in the
-            # study_artifact table are also sandbox
-            if status == "sandbox":
-                sql = """SELECT study_id
-                         FROM qiita.study
-                            JOIN qiita.study_portal USING (study_id)
-                            JOIN qiita.portal_type USING (portal_type_id)
-                         WHERE portal = %s AND study_id NOT IN (
-                                SELECT study_id
-                                FROM qiita.study_artifact)"""
-                qdb.sql_connection.TRN.add(sql, [qiita_config.portal])
-                sids = sids.union(qdb.sql_connection.TRN.execute_fetchflatten())
-
-            return sids
+            return set(qdb.sql_connection.TRN.execute_fetchflatten())
 
     @classmethod
     def get_by_status(cls, status):
@@ -1117,10 +1104,9 @@ class Study(qdb.base.QiitaObject):
             sql_args.append(qdb.util.artifact_visibilities_to_skip())
 
             qdb.sql_connection.TRN.add(sql, sql_args)
-            return [
-                qdb.artifact.Artifact(aid)
-                for aid in qdb.sql_connection.TRN.execute_fetchflatten()
-            ]
+            return qdb.artifact.Artifact.from_trusted_ids(
+                qdb.sql_connection.TRN.execute_fetchflatten()
+            )
 
     def prep_templates(self, data_type=None):
         """Return list of prep template ids
@@ -1148,10 +1134,102 @@ class Study(qdb.base.QiitaObject):
                      WHERE study_id = %s{0}
                      ORDER BY prep_template_id""".format(spec_data)
             qdb.sql_connection.TRN.add(sql, args)
-            return [
-                qdb.metadata_template.prep_template.PrepTemplate(ptid)
-                for ptid in qdb.sql_connection.TRN.execute_fetchflatten()
-            ]
+            return qdb.metadata_template.prep_template.PrepTemplate.from_trusted_ids(
+                qdb.sql_connection.TRN.execute_fetchflatten()
+            )
+
+    def prep_overview(self):
+        """Summary of all the prep templates of the study in a single query
+
+        Returns
+        -------
+        list of dict
+            One dict per prep template, sorted by creation timestamp, with the
+            keys: prep_template_id, name, data_type, artifact_id,
+            creation_timestamp, modification_timestamp, visibility,
+            total_samples, ebi_experiment, artifact_name, artifact_type,
+            num_artifact_children, youngest_artifact_id,
+            youngest_artifact_name and youngest_artifact_type
+
+        Notes
+        -----
+        The youngest artifact follows Artifact.youngest_artifact, so if the
+        prep's artifact has no (non archived) descendants the youngest
+        artifact is the prep's artifact itself. All the artifact related
+        values are None if the prep has no artifact.
+        """
+        with qdb.sql_connection.TRN:
+            sql = """WITH preps AS (
+                        SELECT prep_template_id, pt.name, data_type,
+                               pt.artifact_id, creation_timestamp,
+                               modification_timestamp, visibility,
+                               a.name AS artifact_name, artifact_type
+                        FROM qiita.study_prep_template
+                            JOIN qiita.prep_template pt
+                                USING (prep_template_id)
+                            JOIN qiita.data_type dt
+                                ON (dt.data_type_id = pt.data_type_id)
+                            LEFT JOIN qiita.artifact a
+                                ON (a.artifact_id = pt.artifact_id)
+                            LEFT JOIN qiita.visibility v
+                                ON (v.visibility_id = a.visibility_id)
+                            LEFT JOIN qiita.artifact_type at
+                                ON (at.artifact_type_id = a.artifact_type_id)
+                        WHERE study_id = %s),
+                     samples AS (
+                        SELECT prep_template_id,
+                               COUNT(sample_id) AS total_samples,
+                               COUNT(sample_id) FILTER (
+                                    WHERE ebi_experiment_accession != '')
+                                    AS ebi_experiment
+                        FROM qiita.prep_template_sample
+                        WHERE prep_template_id IN (
+                            SELECT prep_template_id FROM preps)
+                        GROUP BY prep_template_id),
+                     children AS (
+                        SELECT parent_id, COUNT(artifact_id) AS num_children
+                        FROM qiita.parent_artifact
+                        WHERE parent_id IN (SELECT artifact_id FROM preps)
+                        GROUP BY parent_id),
+                     descendants AS (
+                        SELECT p.prep_template_id, a.artifact_id, a.name,
+                               artifact_type,
+                               ROW_NUMBER() OVER (
+                                    PARTITION BY p.prep_template_id
+                                    ORDER BY a.generated_timestamp DESC)
+                                    AS age_rank
+                        FROM preps p,
+                            LATERAL qiita.artifact_descendants(p.artifact_id) d
+                            JOIN qiita.artifact a
+                                ON (a.artifact_id = d.artifact_id)
+                            JOIN qiita.artifact_type at
+                                ON (at.artifact_type_id = a.artifact_type_id)
+                        WHERE a.visibility_id NOT IN %s)
+                     SELECT p.prep_template_id, p.name, p.data_type,
+                            p.artifact_id, p.creation_timestamp,
+                            p.modification_timestamp, p.visibility,
+                            COALESCE(s.total_samples, 0) AS total_samples,
+                            COALESCE(s.ebi_experiment, 0) AS ebi_experiment,
+                            p.artifact_name, p.artifact_type,
+                            COALESCE(c.num_children, 0)
+                                AS num_artifact_children,
+                            COALESCE(d.artifact_id, p.artifact_id)
+                                AS youngest_artifact_id,
+                            COALESCE(d.name, p.artifact_name)
+                                AS youngest_artifact_name,
+                            COALESCE(d.artifact_type, p.artifact_type)
+                                AS youngest_artifact_type
+                     FROM preps p
+                        LEFT JOIN samples s USING (prep_template_id)
+                        LEFT JOIN children c ON (c.parent_id = p.artifact_id)
+                        LEFT JOIN descendants d ON (
+                            d.prep_template_id = p.prep_template_id
+                            AND d.age_rank = 1)
+                     ORDER BY p.creation_timestamp"""
+            qdb.sql_connection.TRN.add(
+                sql, [self._id, qdb.util.artifact_visibilities_to_skip()]
+            )
+            return [dict(r) for r in qdb.sql_connection.TRN.execute_fetchindex()]
 
     def analyses(self):
         """Get all analyses where samples from this study have been used
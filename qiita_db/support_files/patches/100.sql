@@ -0,0 +1,43 @@
+-- Oct 19, 2026
+-- Keying the archived features by a fixed-width hash (the md5 of the feature
+-- as a UUID) instead of by the feature itself, which can be a full sequence;
+-- this makes the primary key index a fraction of its previous size and
+-- allows merging new features with a single INSERT ... ON CONFLICT.
+ALTER TABLE qiita.archive_feature_value ADD COLUMN archive_feature_hash UUID;
+UPDATE qiita.archive_feature_value
+    SET archive_feature_hash = md5(archive_feature)::uuid;
+ALTER TABLE qiita.archive_feature_value
+    ALTER COLUMN archive_feature_hash SET NOT NULL;
+
+CREATE OR REPLACE FUNCTION qiita.set_archive_feature_hash() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    NEW.archive_feature_hash := md5(NEW.archive_feature)::uuid;
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER archive_feature_value_hash
+    BEFORE INSERT OR UPDATE OF archive_feature ON qiita.archive_feature_value
+    FOR EACH ROW
+    EXECUTE PROCEDURE qiita.set_archive_feature_hash();
+
+ALTER TABLE qiita.archive_feature_value
+    DROP CONSTRAINT idx_archive_feature_value;
+ALTER TABLE qiita.archive_feature_value
+    ADD CONSTRAINT idx_archive_feature_value
+    PRIMARY KEY (archive_merging_scheme_id, archive_feature_hash);
+
+-- archive_upsert is kept for external callers but now relies on the new key
+CREATE OR REPLACE FUNCTION public.archive_upsert(amsi integer, af character varying, afv character varying) RETURNS void
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    INSERT INTO qiita.archive_feature_value (
+        archive_merging_scheme_id, archive_feature, archive_feature_value)
+    VALUES (amsi, af, afv)
+    ON CONFLICT (archive_merging_scheme_id, archive_feature_hash)
+    DO UPDATE SET archive_feature_value = EXCLUDED.archive_feature_value;
+END
+$$;
@@ -0,0 +1,81 @@
+-- Oct 19, 2026
+-- Persisting the status of each study, as returned by Study.status, so it's
+-- not inferred from the visibility of all its artifacts every time that it's
+-- requested and the studies can be listed by status using an index. As in
+-- qiita_db.util.infer_status, the priority is public, private,
+-- awaiting_approval and sandbox, ignoring archived artifacts; studies without
+-- artifacts are sandbox.
+CREATE TABLE qiita.study_visibility (
+    study_id BIGINT NOT NULL PRIMARY KEY,
+    visibility_id BIGINT NOT NULL,
+    CONSTRAINT fk_study_visibility_study FOREIGN KEY (study_id) REFERENCES qiita.study (study_id) ON DELETE CASCADE,
+    CONSTRAINT fk_study_visibility_visibility FOREIGN KEY (visibility_id) REFERENCES qiita.visibility (visibility_id)
+);
+CREATE INDEX idx_study_visibility_visibility ON qiita.study_visibility (visibility_id);
+
+CREATE OR REPLACE FUNCTION qiita.update_study_visibility(sid bigint) RETURNS void
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    INSERT INTO qiita.study_visibility (study_id, visibility_id)
+        SELECT sid, COALESCE(
+            (SELECT v.visibility_id
+             FROM qiita.study_artifact sa
+                JOIN qiita.artifact a USING (artifact_id)
+                JOIN qiita.visibility v ON (v.visibility_id = a.visibility_id)
+             WHERE sa.study_id = sid AND v.visibility IN (
+                'public', 'private', 'awaiting_approval')
+             ORDER BY array_position(
+                ARRAY['public', 'private', 'awaiting_approval']::varchar[],
+                v.visibility::varchar)
+             LIMIT 1),
+            (SELECT visibility_id FROM qiita.visibility
+             WHERE visibility = 'sandbox'))
+        -- the study_artifact rows are deleted before the study
+        WHERE EXISTS (SELECT 1 FROM qiita.study WHERE study_id = sid)
+    ON CONFLICT (study_id) DO UPDATE
+        SET visibility_id = EXCLUDED.visibility_id;
+END
+$$;
+
+-- The status changes when a study is created, when artifacts are added to or
+-- removed from it, or when the visibility of one of its artifacts changes
+-- (see Artifact._set_visibility)
+CREATE OR REPLACE FUNCTION qiita.study_visibility_update() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'artifact' THEN
+        PERFORM qiita.update_study_visibility(study_id)
+            FROM qiita.study_artifact
+            WHERE artifact_id = NEW.artifact_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM qiita.update_study_visibility(OLD.study_id);
+    ELSE
+        PERFORM qiita.update_study_visibility(NEW.study_id);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER study_visibility_insert
+    AFTER INSERT ON qiita.study
+    FOR EACH ROW
+    EXECUTE PROCEDURE qiita.study_visibility_update();
+
+CREATE TRIGGER study_artifact_visibility_insert
+    AFTER INSERT ON qiita.study_artifact
+    FOR EACH ROW
+    EXECUTE PROCEDURE qiita.study_visibility_update();
+CREATE TRIGGER study_artifact_visibility_delete
+    AFTER DELETE ON qiita.study_artifact
+    FOR EACH ROW
+    EXECUTE PROCEDURE qiita.study_visibility_update();
+
+CREATE TRIGGER artifact_visibility_update
+    AFTER UPDATE OF visibility_id ON qiita.artifact
+    FOR EACH ROW
+    WHEN (OLD.visibility_id IS DISTINCT FROM NEW.visibility_id)
+    EXECUTE PROCEDURE qiita.study_visibility_update();
+
+SELECT qiita.update_study_visibility(study_id) FROM qiita.study;
@@ -0,0 +1,99 @@
+-- Oct 19, 2026
+-- Persisting the human readable merging scheme of the artifacts, as returned
+-- by Artifact.merging_scheme, so it's not rebuilt from the processing
+-- parameters, commands and parents every time that it's requested. The value
+-- is stored as [merging_scheme, parent_software] and NULL means that it
+-- still needs to be computed. Archived artifacts keep using archive_data.
+-- The existing artifacts are filled by python_patches/96.py.
+ALTER TABLE qiita.artifact ADD COLUMN IF NOT EXISTS merging_scheme JSONB;
+
+-- The merging scheme of an artifact depends on the merging scheme of its
+-- command and the command of its parents, so if any of those change we need
+-- to reset the stored values so they are computed again
+CREATE OR REPLACE FUNCTION qiita.reset_artifact_merging_scheme() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    cid bigint;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        cid := OLD.command_id;
+    ELSE
+        cid := NEW.command_id;
+    END IF;
+
+    UPDATE qiita.artifact
+        SET merging_scheme = NULL
+        WHERE merging_scheme IS NOT NULL AND (
+            command_id = cid OR artifact_id IN (
+                SELECT pa.artifact_id
+                FROM qiita.parent_artifact pa
+                    JOIN qiita.artifact p ON (p.artifact_id = pa.parent_id)
+                WHERE p.command_id = cid));
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER software_command_merging_scheme_update
+    AFTER UPDATE OF ignore_parent_command ON qiita.software_command
+    FOR EACH ROW
+    WHEN (OLD.ignore_parent_command IS DISTINCT FROM NEW.ignore_parent_command)
+    EXECUTE PROCEDURE qiita.reset_artifact_merging_scheme();
+
+CREATE TRIGGER command_parameter_merging_scheme_update
+    AFTER UPDATE OF check_biom_merge, parameter_name ON qiita.command_parameter
+    FOR EACH ROW
+    WHEN (OLD.check_biom_merge OR NEW.check_biom_merge)
+    EXECUTE PROCEDURE qiita.reset_artifact_merging_scheme();
+CREATE TRIGGER command_parameter_merging_scheme_insert
+    AFTER INSERT ON qiita.command_parameter
+    FOR EACH ROW
+    WHEN (NEW.check_biom_merge)
+    EXECUTE PROCEDURE qiita.reset_artifact_merging_scheme();
+CREATE TRIGGER command_parameter_merging_scheme_delete
+    AFTER DELETE ON qiita.command_parameter
+    FOR EACH ROW
+    WHEN (OLD.check_biom_merge)
+    EXECUTE PROCEDURE qiita.reset_artifact_merging_scheme();
+
+CREATE TRIGGER command_output_merging_scheme_update
+    AFTER UPDATE OF check_biom_merge, name ON qiita.command_output
+    FOR EACH ROW
+    WHEN (OLD.check_biom_merge OR NEW.check_biom_merge)
+    EXECUTE PROCEDURE qiita.reset_artifact_merging_scheme();
+CREATE TRIGGER command_output_merging_scheme_insert
+    AFTER INSERT ON qiita.command_output
+    FOR EACH ROW
+    WHEN (NEW.check_biom_merge)
+    EXECUTE PROCEDURE qiita.reset_artifact_merging_scheme();
+CREATE TRIGGER command_output_merging_scheme_delete
+    AFTER DELETE ON qiita.command_output
+    FOR EACH ROW
+    WHEN (OLD.check_biom_merge)
+    EXECUTE PROCEDURE qiita.reset_artifact_merging_scheme();
+
+-- The parent software information includes the name and version of the
+-- software of the parents' command
+CREATE OR REPLACE FUNCTION qiita.reset_software_merging_scheme() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    UPDATE qiita.artifact
+        SET merging_scheme = NULL
+        WHERE merging_scheme IS NOT NULL AND artifact_id IN (
+            SELECT pa.artifact_id
+            FROM qiita.parent_artifact pa
+                JOIN qiita.artifact p ON (p.artifact_id = pa.parent_id)
+                JOIN qiita.software_command sc ON (
+                    sc.command_id = p.command_id)
+            WHERE sc.software_id = NEW.software_id);
+    RETURN NULL;
+END
+$$;
+
+CREATE TRIGGER software_merging_scheme_update
+    AFTER UPDATE OF name, version ON qiita.software
+    FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name OR
+          OLD.version IS DISTINCT FROM NEW.version)
+    EXECUTE PROCEDURE qiita.reset_software_merging_scheme();
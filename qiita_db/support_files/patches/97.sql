@@ -0,0 +1,58 @@
+-- Oct 19, 2026
+-- Adding a per-preparation summary with the values that are shown when
+-- listing artifacts (see qiita_db.util.get_artifacts_information) so we don't
+-- need to query each of the qiita.prep_N dynamic tables for each artifact.
+-- The summary is updated every time that the preparation is modified via
+-- qiita.update_prep_template_summary.
+CREATE TABLE qiita.prep_template_summary (
+    prep_template_id BIGINT NOT NULL PRIMARY KEY,
+    num_samples BIGINT DEFAULT 0 NOT NULL,
+    target_subfragment VARCHAR[] DEFAULT '{}' NOT NULL,
+    platform VARCHAR DEFAULT 'not provided' NOT NULL,
+    target_gene VARCHAR DEFAULT 'not provided' NOT NULL,
+    CONSTRAINT fk_prep_template_summary FOREIGN KEY (prep_template_id) REFERENCES qiita.prep_template (prep_template_id)
+);
+
+-- platform and target_gene are 'not provided' if the column is not part of
+-- the preparation, otherwise the distinct values (missing values as 'None')
+-- separated by commas. target_subfragment has all the distinct values, NULL
+-- included.
+CREATE OR REPLACE FUNCTION qiita.update_prep_template_summary(pt_id bigint) RETURNS void
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    cols jsonb;
+BEGIN
+    EXECUTE format(
+        'SELECT sample_values->''columns''
+         FROM qiita.prep_%s
+         WHERE sample_id = ''qiita_sample_column_names''', pt_id)
+        INTO cols;
+
+    EXECUTE format(
+        'INSERT INTO qiita.prep_template_summary (
+            prep_template_id, num_samples, target_subfragment, platform,
+            target_gene)
+         SELECT %1$s, COUNT(sample_id),
+                COALESCE(array_agg(
+                    DISTINCT sample_values->>''target_subfragment''), ''{}''),
+                CASE WHEN $1 THEN COALESCE(string_agg(
+                    DISTINCT COALESCE(sample_values->>''platform'', ''None''),
+                    '', ''), '''') ELSE ''not provided'' END,
+                CASE WHEN $2 THEN COALESCE(string_agg(
+                    DISTINCT COALESCE(sample_values->>''target_gene'', ''None''),
+                    '', ''), '''') ELSE ''not provided'' END
+         FROM qiita.prep_%1$s
+         WHERE sample_id != ''qiita_sample_column_names''
+         ON CONFLICT (prep_template_id) DO UPDATE SET
+            num_samples = EXCLUDED.num_samples,
+            target_subfragment = EXCLUDED.target_subfragment,
+            platform = EXCLUDED.platform,
+            target_gene = EXCLUDED.target_gene', pt_id)
+        USING COALESCE(cols ? 'platform', false),
+              COALESCE(cols ? 'target_gene', false);
+END
+$$;
+
+SELECT qiita.update_prep_template_summary(prep_template_id)
+    FROM qiita.prep_template;
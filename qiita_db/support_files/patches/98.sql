@@ -0,0 +1,65 @@
+-- Oct 19, 2026
+-- ProcessingJob.create checks for duplicated jobs by comparing each of the
+-- parameter values with ILIKE against all the jobs of the same command, which
+-- takes between 18 and 52 seconds (see 93.sql). Now we store a fingerprint of
+-- the canonical version of the parameters so the check is a single equality
+-- lookup. The canonical version sorts the object keys and the array values,
+-- lower cases booleans (true, "True" and "false" are all the same) and
+-- treats numbers and strings with the same text as equal (1 and "1"), which
+-- keeps the semantics of the previous ILIKE check.
+CREATE OR REPLACE FUNCTION qiita.canonical_parameter_value(v jsonb) RETURNS text
+    LANGUAGE plpgsql IMMUTABLE
+    AS $$
+DECLARE
+    t text;
+BEGIN
+    CASE jsonb_typeof(v)
+        WHEN 'object' THEN
+            SELECT '{' || COALESCE(string_agg(
+                    key || ':' || qiita.canonical_parameter_value(value), ','
+                    ORDER BY key), '') || '}'
+                INTO t
+                FROM jsonb_each(v);
+        WHEN 'array' THEN
+            SELECT '[' || COALESCE(string_agg(x, ',' ORDER BY x), '') || ']'
+                INTO t
+                FROM (SELECT qiita.canonical_parameter_value(e) AS x
+                      FROM jsonb_array_elements(v) e) vals;
+        ELSE
+            t := COALESCE(v #>> '{}', 'null');
+            IF lower(t) IN ('true', 'false') THEN
+                t := lower(t);
+            END IF;
+    END CASE;
+    RETURN t;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION qiita.parameters_fingerprint(params jsonb) RETURNS varchar
+    LANGUAGE sql IMMUTABLE
+    AS $$
+    SELECT md5(qiita.canonical_parameter_value(params))
+$$;
+
+ALTER TABLE qiita.processing_job
+    ADD COLUMN IF NOT EXISTS parameters_fingerprint VARCHAR;
+
+CREATE INDEX IF NOT EXISTS idx_processing_job_parameters_fingerprint
+    ON qiita.processing_job (command_id, parameters_fingerprint);
+
+CREATE OR REPLACE FUNCTION qiita.set_parameters_fingerprint() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    NEW.parameters_fingerprint := qiita.parameters_fingerprint(
+        NEW.command_parameters);
+    RETURN NEW;
+END
+$$;
+
+CREATE TRIGGER processing_job_parameters_fingerprint
+    BEFORE INSERT OR UPDATE OF command_parameters ON qiita.processing_job
+    FOR EACH ROW
+    EXECUTE PROCEDURE qiita.set_parameters_fingerprint();
+
+-- The existing jobs are updated in batches by python_patches/98.py
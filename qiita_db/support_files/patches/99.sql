@@ -0,0 +1,7 @@
+-- Oct 19, 2026
+-- Index for the keyset pagination of the jobs of a user, see
+-- ProcessingJob.jobs_page. The jobs are sorted by id so the primary key is
+-- used when listing all of them. The logging table is paginated by its
+-- primary key so it doesn't need a new index.
+CREATE INDEX IF NOT EXISTS idx_processing_job_email_page
+    ON qiita.processing_job (email, processing_job_id);
@@ -0,0 +1,4 @@
+# Storing the merging scheme of the existing artifacts, see 96.sql
+from qiita_db.artifact import Artifact
+
+Artifact.update_merging_schemes()
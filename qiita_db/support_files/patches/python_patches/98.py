@@ -0,0 +1,4 @@
+# Setting the parameters fingerprint of the existing jobs, see 98.sql
+from qiita_db.processing_job import ProcessingJob
+
+ProcessingJob.backfill_parameters_fingerprint()
@@ -86,6 +86,45 @@ class ArchiveTest(TestCase):
             },
         )
 
+    def test_insert_features_update_and_iter_feature_values(self):
+        ms = "Single Rarefaction | N/A"
+        qdb.archive.Archive.insert_features(
+            ms, {"featureA": dumps({"v": 1}), "featureB": dumps({"v": 2})}
+        )
+        # inserting an existing feature updates its value
+        qdb.archive.Archive.insert_features(
+            ms, {"featureA": dumps({"v": 3}), "featureC": dumps({"v": 4})}
+        )
+        exp = {
+            "featureA": dumps({"v": 3}),
+            "featureB": dumps({"v": 2}),
+            "featureC": dumps({"v": 4}),
+        }
+        self.assertEqual(qdb.archive.Archive.retrieve_feature_values(ms), exp)
+
+        obs = list(
+            qdb.archive.Archive.iter_feature_values(
+                ms, ["featureA", "featureB", "featureC", "featureD"], chunk_size=3
+            )
+        )
+        self.assertEqual(len(obs), 2)
+        self.assertEqual(
+            obs[0],
+            {
+                "featureA": dumps({"v": 3}),
+                "featureB": dumps({"v": 2}),
+                "featureC": dumps({"v": 4}),
+            },
+        )
+        self.assertEqual(obs[1], {})
+
+    def test_insert_features_empty_value(self):
+        ms = "Single Rarefaction | N/A"
+        qdb.archive.Archive.insert_features(ms, {"featureA": ""})
+        self.assertEqual(
+            qdb.archive.Archive.retrieve_feature_values(ms), {"featureA": ""}
+        )
+
     def test_get_merging_scheme_from_job(self):
         exp = "Split libraries FASTQ | N/A"
         obs = qdb.archive.Archive.get_merging_scheme_from_job(
@@ -555,6 +555,29 @@ class ArtifactTestsReadOnly(TestCase):
             ("Pick closed-reference OTUs | Split libraries FASTQ", "QIIMEq2 v1.9.1"),
         )
 
+    def test_merging_schemes(self):
+        A = qdb.artifact.Artifact
+        self.assertEqual(A.merging_schemes([]), {})
+        exp = {
+            1: ("", ""),
+            2: ("Split libraries FASTQ | N/A", "N/A"),
+            4: (
+                "Pick closed-reference OTUs | Split libraries FASTQ",
+                "QIIMEq2 v1.9.1",
+            ),
+        }
+        # non existing artifacts are ignored
+        self.assertEqual(A.merging_schemes([1, 2, 4, 1000]), exp)
+
+        # the merging schemes are stored in the DB
+        sql = """SELECT artifact_id, merging_scheme
+                 FROM qiita.artifact
+                 WHERE artifact_id IN (1, 2, 4)"""
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql)
+            obs = {k: tuple(v) for k, v in qdb.sql_connection.TRN.execute_fetchindex()}
+        self.assertEqual(obs, exp)
+
     def test_jobs(self):
         # Returning all jobs
         obs = qdb.artifact.Artifact(1).jobs(show_hidden=True)
@@ -1357,6 +1380,53 @@ class ArtifactTests(TestCase):
         with self.assertRaises(qdb.exceptions.QiitaDBUnknownIDError):
             qdb.artifact.Artifact(artifact.id)
 
+    def test_update_merging_schemes(self):
+        A = qdb.artifact.Artifact
+        sql = """SELECT artifact_id, merging_scheme
+                 FROM qiita.artifact
+                 WHERE artifact_id IN (2, 4)"""
+        # reset when the merging scheme of the command changes
+        cmd_id = A(4).processing_parameters.command.id
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(
+                """UPDATE qiita.software_command
+                   SET ignore_parent_command = true
+                   WHERE command_id = %s""",
+                [cmd_id],
+            )
+            qdb.sql_connection.TRN.add(sql)
+            obs = dict(qdb.sql_connection.TRN.execute_fetchindex())
+        self.assertIsNone(obs[4])
+        self.assertIsNotNone(obs[2])
+        exp = ("Pick closed-reference OTUs", "QIIMEq2 v1.9.1")
+        # generated but not stored when requested
+        self.assertEqual(A(4).merging_scheme, exp)
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql)
+            obs = dict(qdb.sql_connection.TRN.execute_fetchindex())
+        self.assertIsNone(obs[4])
+
+        self.assertEqual(A.update_merging_schemes(), 1)
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql)
+            obs = dict(qdb.sql_connection.TRN.execute_fetchindex())
+        self.assertEqual(tuple(obs[4]), exp)
+        self.assertEqual(A.update_merging_schemes(), 0)
+
+        # and when the software of the parent command is renamed
+        software = A(2).processing_parameters.command.software
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(
+                "UPDATE qiita.software SET version = %s WHERE software_id = %s",
+                ["2.0.0", software.id],
+            )
+            qdb.sql_connection.TRN.add(sql)
+            obs = dict(qdb.sql_connection.TRN.execute_fetchindex())
+        self.assertIsNone(obs[4])
+        self.assertEqual(
+            A(4).merging_scheme, ("Pick closed-reference OTUs", "QIIMEq2 v2.0.0")
+        )
+
     def test_unique_ids(self):
         art = qdb.artifact.Artifact(1)
         obs = art.unique_ids()
@@ -36,6 +36,19 @@ class QiitaBaseTest(TestCase):
         with self.assertRaises(qdb.exceptions.QiitaDBUnknownIDError):
             qdb.artifact.Artifact(10)
 
+    def test_from_trusted_ids(self):
+        """Instantiates the objects without querying the database"""
+        obs = qdb.artifact.Artifact.from_trusted_ids([1, 2])
+        self.assertEqual(obs, [self.tester, qdb.artifact.Artifact(2)])
+        self.assertEqual(qdb.artifact.Artifact.from_trusted_id(1), self.tester)
+
+        # no validation is performed
+        obs = qdb.artifact.Artifact.from_trusted_id(10)
+        self.assertEqual(obs.id, 10)
+
+        with self.assertRaises(IncompetentQiitaDeveloperError):
+            qdb.base.QiitaObject.from_trusted_ids([1])
+
     def test_check_subclass(self):
         """Nothing happens if check_subclass called from a subclass"""
         self.tester._check_subclass()
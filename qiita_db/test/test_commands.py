@@ -15,9 +15,11 @@ from tempfile import mkdtemp, mkstemp
 from unittest import TestCase, main
 
 import pandas as pd
+from biom import load_table
 from six import StringIO
 
 import qiita_db as qdb
+from qiita_core.qiita_settings import qiita_config
 from qiita_core.util import qiita_test_checker
 
 
@@ -231,6 +233,77 @@ class TestLoadParametersFromCmd(TestCase):
                 remove(fp)
 
 
+@qiita_test_checker()
+class TestPopulateSyntheticData(TestCase):
+    def setUp(self):
+        self._clean_up_files = []
+
+    def tearDown(self):
+        for f in self._clean_up_files:
+            if exists(f):
+                remove(f)
+
+    def _clean_up_studies(self, studies):
+        for study in studies:
+            self._clean_up_files.extend(
+                fp for _, fp in study.sample_template.get_filepaths()
+            )
+            for prep in study.prep_templates():
+                self._clean_up_files.extend(fp for _, fp in prep.get_filepaths())
+            for artifact in study.artifacts():
+                self._clean_up_files.extend(x["fp"] for x in artifact.filepaths)
+
+    def test_populate_synthetic_data(self):
+        populate = partial(
+            qdb.environment_manager.populate_synthetic_data,
+            n_studies=2,
+            n_samples=5,
+            n_columns=3,
+            n_preps=1,
+            n_jobs=2,
+            n_features=10,
+            seed=42,
+        )
+        studies = populate()
+        self._clean_up_studies(studies)
+        self.assertEqual(len(studies), 2)
+
+        study = studies[0]
+        st = study.sample_template
+        self.assertEqual(len(st), 5)
+        self.assertIn("synthetic_column_2", st.categories)
+        (prep,) = study.prep_templates()
+        self.assertEqual(len(prep), 5)
+        self.assertEqual(
+            [a.artifact_type for a in study.artifacts()],
+            ["FASTQ", "Demultiplexed", "BIOM"],
+        )
+        biom = study.artifacts(artifact_type="BIOM")[0]
+        self.assertEqual(len(biom.parents[0].jobs()), 2)
+        (fp,) = [x["fp"] for x in biom.filepaths if x["fp_type"] == "biom"]
+        table = load_table(fp)
+        self.assertEqual(table.shape, (10, 5))
+        ms = qdb.util.get_artifacts_information([biom.id])[0]["algorithm"]
+        archived = qdb.archive.Archive.retrieve_feature_values(ms)
+        self.assertTrue(set(table.ids(axis="observation")) <= set(archived))
+
+        # the same seed generates the same data and can be used again
+        obs = populate(n_studies=1)[0]
+        self._clean_up_studies([obs])
+        self.assertNotEqual(obs.title, study.title)
+        self.assertCountEqual(obs.sample_template.categories, st.categories)
+        self.assertEqual(
+            sorted(obs.sample_template.get_category("synthetic_column_1").values()),
+            sorted(st.get_category("synthetic_column_1").values()),
+        )
+
+    def test_populate_synthetic_data_production(self):
+        self.addCleanup(setattr, qiita_config, "test_environment", True)
+        qiita_config.test_environment = False
+        with self.assertRaises(RuntimeError):
+            qdb.environment_manager.populate_synthetic_data(n_studies=1)
+
+
 @qiita_test_checker()
 class TestPatch(TestCase):
     def setUp(self):
@@ -326,6 +399,31 @@ class TestPatch(TestCase):
         # Since we "tricked" the system, patchtest2 should not exist
         self._check_patchtest2(exists=False)
 
+    def test_patch_merging_schemes(self):
+        A = qdb.artifact.Artifact
+        cmd_id = A(4).processing_parameters.command.id
+        with open(join(self.patches_dir, "11.sql"), "w") as f:
+            f.write(
+                "UPDATE qiita.software_command SET ignore_parent_command = true "
+                "WHERE command_id = %d;\n" % cmd_id
+            )
+        qdb.sql_connection.perform_as_transaction(
+            "UPDATE settings SET current_patch = '10.sql'"
+        )
+
+        qdb.environment_manager.patch(self.patches_dir)
+
+        # the merging schemes reset by the patch are stored again
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(
+                """SELECT merging_scheme FROM qiita.artifact
+                   WHERE artifact_id IN (4, 5)
+                   ORDER BY artifact_id"""
+            )
+            obs = qdb.sql_connection.TRN.execute_fetchflatten()
+        exp = ["Pick closed-reference OTUs", "QIIMEq2 v1.9.1"]
+        self.assertEqual(obs, [exp, exp])
+
     def test_nonexistent_patch(self):
         """Test case where current patch does not exist"""
         qdb.sql_connection.perform_as_transaction(
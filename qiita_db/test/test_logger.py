@@ -23,6 +23,31 @@ class LoggerTests(TestCase):
             # This severity level does not exist in the test schema
             qdb.logger.LogEntry.create("Chicken", "warning message", info={9: 0})
 
+    def test_records_page(self):
+        LE = qdb.logger.LogEntry
+        first = LE.create("Runtime", "runtime message")
+        second = LE.create("Warning", "warning message", info={9: 0})
+
+        obs, cursor = LE.records_page(limit=1)
+        self.assertEqual(len(obs), 1)
+        self.assertEqual(obs[0]["id"], second.id)
+        self.assertEqual(obs[0]["severity"], "Warning")
+        self.assertEqual(obs[0]["msg"], "warning message")
+        self.assertEqual(obs[0]["info"], second.info)
+        self.assertEqual(obs[0]["time"], second.time)
+        self.assertEqual(cursor, second.id)
+
+        obs, _ = LE.records_page(cursor=cursor, limit=1)
+        self.assertEqual([r["id"] for r in obs], [first.id])
+
+        # the pages match newest_records
+        obs, cursor = LE.records_page(limit=1000)
+        self.assertIsNone(cursor)
+        self.assertEqual(
+            [r["id"] for r in obs],
+            [le.id for le in LE.newest_records(numrecords=1000)],
+        )
+
     def test_severity_property(self):
         """"""
         log_entry = qdb.logger.LogEntry.create("Warning", "warning test", info=None)
@@ -6,9 +6,11 @@
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
 
-from os import remove
+from os import close, remove
 from os.path import exists, join
+from shutil import rmtree
 from tarfile import open as topen
+from tempfile import mkdtemp, mkstemp
 from unittest import TestCase, main
 
 import numpy.testing as npt
@@ -256,6 +258,86 @@ class MetaUtilTests(TestCase):
         qdb.metadata_template.sample_template.SampleTemplate.delete(st.id)
         qdb.study.Study.delete(study.id)
 
+    def test_verify_filepaths_integrity(self):
+        fd, fp = mkstemp()
+        close(fd)
+        with open(fp, "w") as f:
+            f.write("\n")
+        fpid = qdb.util.insert_filepaths([(fp, 1)], 2, "raw_data")[0]
+        fp = qdb.util.get_filepath_information(fpid)["fullpath"]
+        self.files_to_remove.append(fp)
+        self.addCleanup(
+            r_client.delete,
+            qdb.meta_util.INTEGRITY_PROGRESS_KEY,
+            qdb.meta_util.INTEGRITY_FULL_PASS_KEY,
+            qdb.meta_util.INTEGRITY_PROBLEMS_KEY,
+        )
+
+        # start right before the new filepath
+        r_client.set(qdb.meta_util.INTEGRITY_PROGRESS_KEY, fpid - 1)
+        obs = qdb.meta_util.verify_filepaths_integrity(max_files=1)
+        self.assertEqual(obs, {"ok": [(fpid, fp)], "missing": [], "corrupted": []})
+        self.assertEqual(int(r_client.get(qdb.meta_util.INTEGRITY_PROGRESS_KEY)), fpid)
+
+        # a modified file is corrupted and a removed one is missing
+        with open(fp, "w") as f:
+            f.write("\t")
+        r_client.set(qdb.meta_util.INTEGRITY_PROGRESS_KEY, fpid - 1)
+        obs = qdb.meta_util.verify_filepaths_integrity(max_files=1)
+        self.assertEqual(obs["corrupted"], [(fpid, fp)])
+        remove(fp)
+        r_client.set(qdb.meta_util.INTEGRITY_PROGRESS_KEY, fpid - 1)
+        obs = qdb.meta_util.verify_filepaths_integrity(max_files=1)
+        self.assertEqual(obs["missing"], [(fpid, fp)])
+        obs = qdb.meta_util.get_filepaths_integrity_problems()
+        self.assertEqual(obs[fpid]["status"], "missing")
+        self.assertEqual(obs[fpid]["filepath"], fp)
+
+        # once the end of the table is reached the next run starts again
+        obs = qdb.meta_util.verify_filepaths_integrity(max_files=1)
+        self.assertEqual(obs, {"ok": [], "missing": [], "corrupted": []})
+        self.assertEqual(int(r_client.get(qdb.meta_util.INTEGRITY_PROGRESS_KEY)), 0)
+        self.assertIsNotNone(r_client.get(qdb.meta_util.INTEGRITY_FULL_PASS_KEY))
+
+        # the problems of the filepaths removed from the DB are removed
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(
+                "DELETE FROM qiita.filepath WHERE filepath_id = %s", [fpid]
+            )
+            qdb.sql_connection.TRN.execute()
+        qdb.meta_util.verify_filepaths_integrity(max_files=1)
+        self.assertNotIn(fpid, qdb.meta_util.get_filepaths_integrity_problems())
+
+    def test_verify_filepaths_integrity_folder_budget(self):
+        folder = mkdtemp()
+        for i in range(3):
+            with open(join(folder, "file_%d" % i), "w") as f:
+                f.write("a" * 100)
+        fpid = qdb.util.insert_filepaths([(folder, "directory")], 2, "raw_data")[0]
+        fp = qdb.util.get_filepath_information(fpid)["fullpath"]
+        self.addCleanup(rmtree, fp, ignore_errors=True)
+        fd, other = mkstemp()
+        close(fd)
+        with open(other, "w") as f:
+            f.write("\n")
+        other_id = qdb.util.insert_filepaths([(other, 1)], 2, "raw_data")[0]
+        other = qdb.util.get_filepath_information(other_id)["fullpath"]
+        self.files_to_remove.append(other)
+        self.addCleanup(
+            r_client.delete,
+            qdb.meta_util.INTEGRITY_PROGRESS_KEY,
+            qdb.meta_util.INTEGRITY_FULL_PASS_KEY,
+            qdb.meta_util.INTEGRITY_PROBLEMS_KEY,
+        )
+
+        # the folder is budgeted with the size of all its files, so the next
+        # file doesn't fit in the budget
+        self.assertEqual(qdb.meta_util._read_size(fp), 300)
+        r_client.set(qdb.meta_util.INTEGRITY_PROGRESS_KEY, fpid - 1)
+        obs = qdb.meta_util.verify_filepaths_integrity(max_files=2, max_bytes=300)
+        self.assertEqual(obs["ok"], [(fpid, fp)])
+        self.assertEqual(int(r_client.get(qdb.meta_util.INTEGRITY_PROGRESS_KEY)), fpid)
+
     def test_update_redis_stats(self):
         # helper function to get the values in the stats_daily table
         def _get_daily_stats():
@@ -411,6 +493,7 @@ class MetaUtilTests(TestCase):
 
             qdb.sql_connection.TRN.add("UPDATE settings SET base_data_dir = '%s'" % bdr)
             bdr = qdb.sql_connection.TRN.execute()
+            qdb.util.invalidate_lookup_cache()
 
         qdb.meta_util.generate_biom_and_metadata_release(level)
         # we are storing the [0] filepath, [1] md5sum and [2] time but we are
@@ -484,6 +567,7 @@ class MetaUtilTests(TestCase):
         qdb.sql_connection.perform_as_transaction(
             "UPDATE settings SET base_data_dir = '%s'" % obdr
         )
+        qdb.util.invalidate_lookup_cache()
 
         # testing public/default release
         qdb.meta_util.generate_biom_and_metadata_release()
@@ -9,15 +9,18 @@
 from datetime import datetime
 from json import dumps, loads
 from os import close
-from tempfile import mkstemp
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp, mkstemp
 from time import sleep
 from unittest import TestCase, main
 
 import networkx as nx
 import pandas as pd
+from mock import Mock, PropertyMock, patch
 
 import qiita_db as qdb
-from qiita_core.qiita_settings import qiita_config
+from qiita_core.qiita_settings import qiita_config, r_client
 from qiita_core.util import qiita_test_checker
 
 
@@ -218,6 +221,88 @@ class ProcessingJobTest(TestCase):
         self.assertIsNone(self.tester3.log)
         self.assertEqual(self.tester4.log, qdb.logger.LogEntry(1))
 
+    def test_list_jobs(self):
+        PJ = qdb.processing_job.ProcessingJob
+        user = qdb.user.User("test@foo.bar")
+        total, total_filtered, obs = PJ.list_jobs(user=user, show_hidden=True)
+        self.assertEqual(total, total_filtered)
+        self.assertEqual(total, len(obs))
+        for job in obs:
+            exp = PJ(job["id"])
+            self.assertEqual(job["status"], exp.status)
+            self.assertEqual(job["command"], exp.command.name)
+            self.assertEqual(job["heartbeat"], exp.heartbeat)
+            self.assertEqual(job["step"], exp.step)
+            self.assertEqual(job["external_id"], exp.external_id)
+            self.assertEqual(job["user"], "test@foo.bar")
+            self.assertEqual(job["parameters"], exp.parameters.values)
+            self.assertCountEqual(
+                job["validator_jobs"], [v.id for v in exp.validator_jobs]
+            )
+            if job["status"] == "success":
+                self.assertCountEqual(
+                    job["outputs"], [[k, v.id] for k, v in exp.outputs.items()]
+                )
+            if job["status"] == "error":
+                self.assertEqual(job["message"], exp.log.msg)
+
+        # pagination and filtering
+        _, _, page = PJ.list_jobs(user=user, show_hidden=True, offset=1, limit=2)
+        self.assertEqual(page, obs[1:3])
+        _, total_filtered, obs = PJ.list_jobs(
+            show_hidden=True, search=self.tester4.id[:8].upper()
+        )
+        self.assertEqual(total_filtered, 1)
+        self.assertEqual([j["id"] for j in obs], [self.tester4.id])
+        # the wildcards are matched literally
+        self.assertEqual(PJ.list_jobs(show_hidden=True, search="%")[1:], (0, []))
+        # the counts don't depend on the page
+        exp_total = PJ.list_jobs(user=user, show_hidden=True)[0]
+        self.assertEqual(
+            PJ.list_jobs(user=user, show_hidden=True, offset=exp_total),
+            (exp_total, exp_total, []),
+        )
+        self.assertEqual(
+            PJ.list_jobs(
+                user=user,
+                ignore_status=[
+                    "success",
+                    "error",
+                    "running",
+                    "queued",
+                    "in_construction",
+                    "waiting",
+                ],
+            ),
+            (0, 0, []),
+        )
+
+    def test_jobs_page(self):
+        PJ = qdb.processing_job.ProcessingJob
+        user = qdb.user.User("test@foo.bar")
+        obs, cursor = PJ.jobs_page(user=user, show_hidden=True, limit=1000)
+        self.assertIsNone(cursor)
+        self.assertCountEqual(
+            [j["id"] for j in obs],
+            [j["id"] for j in PJ.list_jobs(user=user, show_hidden=True)[2]],
+        )
+        ids = [j["id"] for j in obs]
+        self.assertEqual(ids, sorted(ids))
+
+        # walking through all the pages returns all the jobs once
+        pages = []
+        cursor = None
+        while True:
+            page, cursor = PJ.jobs_page(
+                user=user, show_hidden=True, cursor=cursor, limit=2
+            )
+            pages.extend(page)
+            if cursor is None:
+                break
+            # a heartbeat while paginating doesn't change the pages
+            self.tester2.update_heartbeat_state()
+        self.assertEqual([j["id"] for j in pages], ids)
+
     def test_heartbeat(self):
         self.assertIsNone(self.tester1.heartbeat)
         self.assertEqual(self.tester2.heartbeat, datetime(2015, 11, 22, 21, 00, 00))
@@ -298,6 +383,133 @@ class ProcessingJobTest(TestCase):
         with self.assertRaises(qdb.exceptions.QiitaDBOperationNotPermittedError):
             job.submit()
 
+    def test_submit_many_error(self):
+        job1 = _create_job()
+        job2 = _create_job()
+        job2._set_status("queued")
+        with self.assertRaises(qdb.exceptions.QiitaDBOperationNotPermittedError):
+            qdb.processing_job.ProcessingJob.submit_many([job1, job2])
+        # nothing was submitted
+        self.assertEqual(job1.status, "in_construction")
+        # no jobs is a no-op
+        qdb.processing_job.ProcessingJob.submit_many([])
+
+    def _submit_many_array(self, system_call_return, resources, max_array_size=1000):
+        jobs = [_create_job() for _ in resources]
+        work_dir = qdb.util.get_work_base_dir()
+        for job in jobs:
+            self.addCleanup(rmtree, join(work_dir, job.id), True)
+        system_call = Mock(return_value=system_call_return)
+        launcher = qiita_config.plugin_launcher
+        array_size = qiita_config.job_scheduler_max_array_size
+        qiita_config.plugin_launcher = "qiita-plugin-launcher-slurm"
+        qiita_config.job_scheduler_max_array_size = max_array_size
+        try:
+            with (
+                patch("qiita_db.processing_job._system_call", system_call),
+                patch.object(
+                    qdb.processing_job.ProcessingJob,
+                    "resource_allocation_info",
+                    new_callable=PropertyMock,
+                    side_effect=resources,
+                ),
+            ):
+                qdb.processing_job.ProcessingJob.submit_many(jobs, max_running=2)
+        finally:
+            qiita_config.plugin_launcher = launcher
+            qiita_config.job_scheduler_max_array_size = array_size
+        return jobs, system_call
+
+    def test_submit_many_array(self):
+        jobs, system_call = self._submit_many_array(
+            ("Submitted batch job 1234\n", "", 0), ["-p a", "-p b", "-p a"]
+        )
+        work_dir = qdb.util.get_work_base_dir()
+
+        # the jobs are grouped by their resources, one array per group
+        self.assertEqual(system_call.call_count, 2)
+        fp_a = join(work_dir, jobs[0].id, "%s_array.txt" % jobs[0].id)
+        fp_b = join(work_dir, jobs[1].id, "%s_array.txt" % jobs[1].id)
+        self.assertEqual(
+            [c[0][0] for c in system_call.call_args_list],
+            [
+                "sbatch --array 0-1%%2 -p a %s" % fp_a,
+                "sbatch --array 0-0%%2 -p b %s" % fp_b,
+            ],
+        )
+        with open(fp_a) as f:
+            script = f.read()
+        self.assertIn("JOB_IDS=(%s %s)" % (jobs[0].id, jobs[2].id), script)
+        self.assertIn(
+            "JOB_DIRS=(%s %s)"
+            % (join(work_dir, jobs[0].id), join(work_dir, jobs[2].id)),
+            script,
+        )
+        self.assertIn('"$JOB_ID" "$JOB_DIR"', script)
+
+        # each job keeps its task within the array as the external id
+        for job, exp in zip(jobs, ["1234_0", "1234_0", "1234_1"]):
+            self.assertEqual(job.status, "queued")
+            self.assertEqual(job.external_id, exp)
+
+    def test_submit_many_array_max_size(self):
+        jobs, system_call = self._submit_many_array(
+            ("Submitted batch job 1234\n", "", 0), ["-p a"] * 3, max_array_size=2
+        )
+        work_dir = qdb.util.get_work_base_dir()
+
+        # the group is split in arrays of at most max_array_size jobs
+        fp1 = join(work_dir, jobs[0].id, "%s_array.txt" % jobs[0].id)
+        fp2 = join(work_dir, jobs[2].id, "%s_array.txt" % jobs[2].id)
+        self.assertEqual(
+            [c[0][0] for c in system_call.call_args_list],
+            [
+                "sbatch --array 0-1%%2 -p a %s" % fp1,
+                "sbatch --array 0-0%%2 -p a %s" % fp2,
+            ],
+        )
+        for job, exp in zip(jobs, ["1234_0", "1234_1", "1234_0"]):
+            self.assertEqual(job.status, "queued")
+            self.assertEqual(job.external_id, exp)
+
+    def test_launch_job_scheduler_array_quoting(self):
+        job_dir = mkdtemp(suffix=" with spaces")
+        self.addCleanup(rmtree, job_dir, True)
+        system_call = Mock(return_value=("Submitted batch job 1234\n", "", 0))
+        with patch("qiita_db.processing_job._system_call", system_call):
+            obs = qdb.processing_job.launch_job_scheduler_array(
+                "source env", "start", "https://localhost", ["job"], [job_dir], "-p a"
+            )
+        self.assertEqual(obs, ["1234_0"])
+        fp = join(job_dir, "job_array.txt")
+        system_call.assert_called_once_with("sbatch --array 0-0 -p a '%s'" % fp)
+        with open(fp) as f:
+            script = f.read()
+        self.assertIn("JOB_DIRS=('%s')" % job_dir, script)
+
+    def test_submit_many_array_error(self):
+        jobs, system_call = self._submit_many_array(
+            ("", "sbatch: error", 1), ["-p a", "-p a"]
+        )
+        self.assertEqual(system_call.call_count, 1)
+        # the jobs don't stay queued if the array can't be submitted
+        for job in jobs:
+            self.assertEqual(job.status, "error")
+            self.assertIn("sbatch: error", job.log.msg)
+            self.assertEqual(job.external_id, "Not Available")
+
+    def test_create_many(self):
+        job = _create_job()
+        params = [job.parameters, job.parameters]
+        obs = qdb.processing_job.ProcessingJob.create_many(
+            qdb.user.User("test@foo.bar"), params, True
+        )
+        self.assertEqual(len(obs), 2)
+        self.assertNotEqual(obs[0].id, obs[1].id)
+        for o in obs:
+            self.assertEqual(o.parameters.values, job.parameters.values)
+            self.assertEqual(o.status, "in_construction")
+
     def test_submit_environment(self):
         job = _create_job()
         software = job.command.software
@@ -656,6 +868,41 @@ class ProcessingJobTest(TestCase):
             "error message: Validation failure" % obs.id,
         )
 
+    def test_release_validators_fail_fast(self):
+        job = _create_job()
+        job._set_status("running")
+
+        validators = []
+        for _ in range(2):
+            params = qdb.software.Parameters.load(
+                qdb.software.Command(4),
+                values_dict={
+                    "template": 1,
+                    "files": "ignored",
+                    "artifact_type": "BIOM",
+                    "provenance": dumps({"job": job.id, "cmd_out_id": 3}),
+                },
+            )
+            validators.append(
+                qdb.processing_job.ProcessingJob.create(
+                    qdb.user.User("test@foo.bar"), params, True
+                )
+            )
+        job._set_validator_jobs(validators)
+        failed, running = validators
+        failed.complete(False, error="Validation failure")
+        running._set_status("running")
+
+        # the release doesn't wait for the running validator
+        job.release_validators()
+        self.assertEqual(job.status, "error")
+        self.assertEqual(running.status, "error")
+        self.assertEqual(
+            running.log.msg,
+            "1 sister validator jobs failed: Validator %s "
+            "error message: Validation failure" % failed.id,
+        )
+
     def test_complete_error(self):
         with self.assertRaises(qdb.exceptions.QiitaDBOperationNotPermittedError):
             self.tester1.complete(True, artifacts_data={})
@@ -708,6 +955,32 @@ class ProcessingJobTest(TestCase):
         with self.assertRaises(qdb.exceptions.QiitaDBOperationNotPermittedError):
             self.tester4.step = "demultiplexing"
 
+    def test_flush_heartbeats(self):
+        PJ = qdb.processing_job.ProcessingJob
+        # making sure that the buffer is empty and that it's not flushed
+        # automatically while testing
+        PJ.flush_heartbeats()
+        r_client.set(qdb.processing_job.HEARTBEAT_FLUSH_KEY, 1, ex=60)
+
+        job = _create_job()
+        job._set_status("running")
+        job.update_heartbeat_state()
+        job.step = "demultiplexing"
+        heartbeat = job.heartbeat
+
+        sql = """SELECT heartbeat, step
+                 FROM qiita.processing_job
+                 WHERE processing_job_id = %s"""
+        self.assertEqual(PJ.flush_heartbeats(), 2)
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql, [job.id])
+            obs = qdb.sql_connection.TRN.execute_fetchindex()
+        self.assertEqual(obs, [[heartbeat, "demultiplexing"]])
+        # the values are read from the database once flushed
+        self.assertEqual(job.heartbeat, heartbeat)
+        self.assertEqual(job.step, "demultiplexing")
+        self.assertEqual(PJ.flush_heartbeats(), 0)
+
     def test_update_children(self):
         # Create a workflow so we can test this functionality
         exp_command = qdb.software.Command(1)
@@ -1442,6 +1715,54 @@ class ProcessingJobDuplicated(TestCase):
                 qdb.processing_job.ProcessingJob(jid)._set_status("error")
         _create_job(False)
 
+    def test_create_duplicated_subset(self):
+        # the previous check considered a job a duplicate if it had all the
+        # parameter values of the new job, even if it had extra parameters,
+        # like those removed from the command; now all the parameters need
+        # to be the same
+        job = _create_job()
+        with qdb.sql_connection.TRN:
+            sql = """UPDATE qiita.processing_job
+                     SET command_parameters = command_parameters || %s
+                     WHERE processing_job_id = %s"""
+            qdb.sql_connection.TRN.add(sql, [dumps({"removed": 1}), job.id])
+            qdb.sql_connection.TRN.execute()
+        new_job = _create_job(False)
+        self.assertNotEqual(new_job.id, job.id)
+
+    def test_backfill_parameters_fingerprint(self):
+        sql = """SELECT processing_job_id, parameters_fingerprint
+                 FROM qiita.processing_job
+                 ORDER BY processing_job_id"""
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql)
+            exp = qdb.sql_connection.TRN.execute_fetchindex()
+            qdb.sql_connection.TRN.add(
+                "UPDATE qiita.processing_job SET parameters_fingerprint = NULL"
+            )
+            qdb.sql_connection.TRN.execute()
+
+        PJ = qdb.processing_job.ProcessingJob
+        self.assertEqual(PJ.backfill_parameters_fingerprint(batch_size=2), len(exp))
+        self.assertEqual(PJ.backfill_parameters_fingerprint(), 0)
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(sql)
+            self.assertEqual(qdb.sql_connection.TRN.execute_fetchindex(), exp)
+
+    def test_parameters_fingerprint(self):
+        sql = "SELECT qiita.parameters_fingerprint(%s)"
+        with qdb.sql_connection.TRN:
+            obs = []
+            for params in (
+                '{"a": false, "b": [1, 2], "c": 1}',
+                '{"c": "1", "b": [2, 1], "a": "False"}',
+                '{"a": true, "b": [1, 2], "c": 1}',
+            ):
+                qdb.sql_connection.TRN.add(sql, [params])
+                obs.append(qdb.sql_connection.TRN.execute_fetchlast())
+        self.assertEqual(obs[0], obs[1])
+        self.assertNotEqual(obs[0], obs[2])
+
 
 if __name__ == "__main__":
     main()
@@ -6,6 +6,7 @@
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
 
+from io import StringIO
 from os import close, remove
 from os.path import exists
 from tempfile import mkstemp
@@ -16,7 +17,7 @@ from psycopg2._psycopg import connection
 from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 
 import qiita_db as qdb
-from qiita_core.qiita_settings import qiita_config
+from qiita_core.qiita_settings import qiita_config, r_client
 from qiita_core.util import qiita_test_checker
 
 DB_CREATE_TEST_TABLE = """CREATE TABLE qiita.test_table (
@@ -342,6 +343,27 @@ class TestTransaction(TestBase):
             obs = qdb.sql_connection.TRN.execute_fetchflatten(idx=3)
             self.assertEqual(obs, ["insert1", 1, "insert2", 2, "insert3", 3])
 
+    def test_copy_expert(self):
+        with qdb.sql_connection.TRN:
+            sql = """INSERT INTO qiita.test_table (str_column, int_column)
+                     VALUES (%s, %s)"""
+            qdb.sql_connection.TRN.add(sql, ["insert1", 1])
+            qdb.sql_connection.TRN.copy_expert(
+                "COPY qiita.test_table (str_column, int_column) FROM STDIN "
+                "WITH (FORMAT csv)",
+                StringIO("insert2,2\ninsert3,3\n"),
+            )
+            sql = "SELECT str_column, int_column FROM qiita.test_table"
+            qdb.sql_connection.TRN.add(sql)
+            obs = qdb.sql_connection.TRN.execute_fetchindex()
+            self.assertEqual(obs, [["insert1", 1], ["insert2", 2], ["insert3", 3]])
+
+            with self.assertRaises(ValueError):
+                qdb.sql_connection.TRN.copy_expert(
+                    "COPY qiita.test_table (int_column) FROM STDIN",
+                    StringIO("not_an_int\n"),
+                )
+
     def test_context_manager_rollback(self):
         try:
             with qdb.sql_connection.TRN:
@@ -528,6 +550,15 @@ class TestTransaction(TestBase):
         with self.assertRaises(RuntimeError):
             qdb.sql_connection.TRN.execute()
 
+    def test_in_context(self):
+        self.assertFalse(qdb.sql_connection.TRN.in_context)
+        with qdb.sql_connection.TRN:
+            self.assertTrue(qdb.sql_connection.TRN.in_context)
+            with qdb.sql_connection.TRN:
+                self.assertTrue(qdb.sql_connection.TRN.in_context)
+            self.assertTrue(qdb.sql_connection.TRN.in_context)
+        self.assertFalse(qdb.sql_connection.TRN.in_context)
+
     def test_index(self):
         with qdb.sql_connection.TRN:
             self.assertEqual(qdb.sql_connection.TRN.index, 0)
@@ -548,6 +579,68 @@ class TestTransaction(TestBase):
 
         self.assertEqual(qdb.sql_connection.TRN.index, 0)
 
+    def test_fingerprint(self):
+        obs = qdb.sql_connection.fingerprint(
+            """SELECT * FROM qiita.sample_1
+               WHERE sample_id = '1.SKB8.640193' AND x > 2.5"""
+        )
+        self.assertEqual(
+            obs, "SELECT * FROM qiita.sample_N WHERE sample_id = ? AND x > ?"
+        )
+
+    def test_profile_statements(self):
+        r_client.delete(qdb.sql_connection.SQL_PROFILES_KEY)
+        self.addCleanup(r_client.delete, qdb.sql_connection.SQL_PROFILES_KEY)
+        self.addCleanup(setattr, qiita_config, "sql_profiling", False)
+
+        # profiling is disabled by default
+        with qdb.sql_connection.profile_statements("disabled") as profile:
+            self.assertIsNone(profile)
+        self.assertEqual(qdb.sql_connection.get_profiles(), [])
+
+        qiita_config.sql_profiling = True
+        job_id = "063e553b-327c-4818-ab4a-adfe58e49860"
+        with qdb.sql_connection.profile_statements("test", job_id) as profile:
+            with qdb.sql_connection.TRN:
+                sql = "SELECT int_column FROM qiita.test_table WHERE int_column = %s"
+                for i in range(3):
+                    qdb.sql_connection.TRN.add(sql, [i])
+                qdb.sql_connection.TRN.execute()
+        # statements run after the profile is stopped are not recorded
+        qdb.sql_connection.perform_as_transaction("SELECT 42")
+
+        self.assertEqual(list(profile.statements), [sql])
+        stmt = profile.statements[sql]
+        self.assertEqual(stmt["calls"], 3)
+        self.assertEqual(stmt["rows"], 0)
+        # all the statements were executed from this test
+        (site,) = stmt["call_sites"]
+        self.assertTrue(site.startswith("test/test_sql_connection.py:"))
+        self.assertTrue(site.endswith(" test_profile_statements"))
+
+        obs = qdb.sql_connection.get_profiles()
+        self.assertEqual(len(obs), 1)
+        self.assertEqual(obs[0]["name"], "test")
+        self.assertEqual(obs[0]["job_id"], job_id)
+        self.assertEqual(obs[0]["queries"], 3)
+
+        obs = qdb.sql_connection.sql_profiles_report(slow_seconds=0, n_plus_one_calls=3)
+        self.assertEqual(obs["profiles"][0]["queries"], 3)
+        self.assertEqual([s["fingerprint"] for s in obs["slow_queries"]], [sql])
+        self.assertEqual([s["calls"] for s in obs["n_plus_one"]], [3])
+        self.assertEqual(obs["jobs"][0]["job_id"], job_id)
+        self.assertEqual(obs["jobs"][0]["queries"], 3)
+
+        obs = qdb.sql_connection.sql_profiles_report()
+        self.assertEqual(obs["slow_queries"], [])
+        self.assertEqual(obs["n_plus_one"], [])
+
+        # profiles can be recorded without storing them
+        with qdb.sql_connection.profile_statements("test", store=False) as profile:
+            qdb.sql_connection.perform_as_transaction("SELECT 42")
+        self.assertEqual(profile.to_dict()["queries"], 1)
+        self.assertEqual(len(qdb.sql_connection.get_profiles()), 1)
+
 
 if __name__ == "__main__":
     main()
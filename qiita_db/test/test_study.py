@@ -435,7 +435,16 @@ class TestStudy(TestCase):
         obs = qdb.study.Study.get_by_status("awaiting_approval")
         self.assertEqual(obs, set())
 
+        # the status follows the visibility of the artifacts
+        self.assertEqual(qdb.study.Study.get_ids_by_status("sandbox"), {s.id})
+        self.assertEqual(s.status, "sandbox")
+        self._change_processed_data_status("public")
+        self.assertEqual(qdb.study.Study.get_ids_by_status("public"), {1})
+        self.assertEqual(qdb.study.Study.get_ids_by_status("private"), set())
+        self.assertEqual(qdb.study.Study(1).status, "public")
+
         qdb.study.Study.delete(s.id)
+        self.assertEqual(qdb.study.Study.get_ids_by_status("sandbox"), set())
 
     def test_exists(self):
         self.assertTrue(
@@ -894,6 +903,33 @@ class TestStudy(TestCase):
         self.assertEqual(new.prep_templates(), [])
         qdb.study.Study.delete(new.id)
 
+    def test_prep_overview(self):
+        obs = self.study.prep_overview()
+        self.assertEqual([o["prep_template_id"] for o in obs], [1, 2])
+        for o in obs:
+            pt = qdb.metadata_template.prep_template.PrepTemplate(o["prep_template_id"])
+            youngest = pt.artifact.youngest_artifact
+            self.assertEqual(o["name"], pt.name)
+            self.assertEqual(o["data_type"], "18S")
+            self.assertEqual(o["artifact_id"], pt.artifact.id)
+            self.assertEqual(o["artifact_type"], pt.artifact.artifact_type)
+            self.assertEqual(o["artifact_name"], pt.artifact.name)
+            self.assertEqual(o["visibility"], "private")
+            self.assertEqual(o["total_samples"], 27)
+            self.assertEqual(o["ebi_experiment"], 27)
+            self.assertEqual(o["num_artifact_children"], len(pt.artifact.children))
+            self.assertEqual(o["youngest_artifact_id"], youngest.id)
+            self.assertEqual(o["youngest_artifact_name"], youngest.name)
+            self.assertEqual(o["youngest_artifact_type"], youngest.artifact_type)
+
+        new = qdb.study.Study.create(
+            qdb.user.User("test@foo.bar"),
+            "NOT Identification of the Microbiomes for Cannabis Soils 13",
+            self.info,
+        )
+        self.assertEqual(new.prep_overview(), [])
+        qdb.study.Study.delete(new.id)
+
     def test_analyses(self):
         new = qdb.study.Study.create(
             qdb.user.User("test@foo.bar"),
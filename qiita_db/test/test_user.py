@@ -567,6 +567,14 @@ class UserTest(TestCase):
             [PJ("b72369f9-a886-4193-8d3d-f7b504168e75")],
         )
 
+        # the information of the jobs
+        jobs = qdb.user.User("shared@foo.bar").jobs(
+            ignore_status=ignore_status, information=True
+        )
+        self.assertEqual(
+            [j["id"] for j in jobs], ["b72369f9-a886-4193-8d3d-f7b504168e75"]
+        )
+
         # generates expected jobs
         jobs = qdb.user.User("shared@foo.bar").jobs()
         self.assertEqual(jobs, [])
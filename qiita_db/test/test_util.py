@@ -6,9 +6,10 @@
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import partial
-from os import close, mkdir, remove
+from os import close, mkdir, remove, stat
 from os.path import basename, exists, join
 from shutil import rmtree
 from string import punctuation
@@ -144,6 +145,44 @@ class DBUtilTests(DBUtilTestsBase):
         with self.assertRaises(qdb.exceptions.QiitaDBLookupError):
             qdb.util.convert_to_id("FAKE", "filepath_type")
 
+    def test_lookup_cache(self):
+        qdb.util.invalidate_lookup_cache()
+        exp = qdb.util.get_lookup_cache_stats().get(
+            "convert_to_id", {"hits": 0, "misses": 0}
+        )
+        self.assertEqual(qdb.util.convert_to_id("directory", "filepath_type"), 8)
+        self.assertEqual(qdb.util.convert_to_id("directory", "filepath_type"), 8)
+        obs = qdb.util.get_lookup_cache_stats()["convert_to_id"]
+        self.assertEqual(obs["hits"], exp["hits"] + 1)
+        self.assertEqual(obs["misses"], exp["misses"] + 1)
+        self.assertTrue(0 < obs["hit_rate"] <= 1)
+
+        # modifying the returned values doesn't modify the cache
+        obs = qdb.util.get_data_types()
+        obs["NewDataType"] = 100
+        self.assertNotIn("NewDataType", qdb.util.get_data_types())
+
+        # empty results are not cached
+        self.assertEqual(qdb.util.get_mountpoint("new_mountpoint"), [])
+        sql = """INSERT INTO qiita.data_directory (data_type, mountpoint,
+                                                   subdirectory, active)
+                 VALUES ('new_mountpoint', 'new_mountpoint', false, true)"""
+        qdb.sql_connection.perform_as_transaction(sql)
+        obs = qdb.util.get_mountpoint("new_mountpoint")
+        exp = [join(qdb.util.get_db_files_base_dir(), "new_mountpoint")]
+        self.assertEqual([fp for _, fp in obs], exp)
+
+        # and the changes are seen once invalidated
+        qdb.sql_connection.perform_as_transaction(
+            "UPDATE qiita.data_directory SET mountpoint = 'other_mountpoint' "
+            "WHERE data_type = 'new_mountpoint'"
+        )
+        self.assertEqual(qdb.util.get_mountpoint("new_mountpoint"), obs)
+        qdb.util.invalidate_lookup_cache()
+        exp = [join(qdb.util.get_db_files_base_dir(), "other_mountpoint")]
+        obs = qdb.util.get_mountpoint("new_mountpoint")
+        self.assertEqual([fp for _, fp in obs], exp)
+
     def test_get_artifact_types(self):
         obs = qdb.util.get_artifact_types()
         exp = {
@@ -306,6 +345,10 @@ class DBUtilTests(DBUtilTestsBase):
         self.assertTrue(exists(exp_fp))
         self.assertTrue(exists(fp))
         self.files_to_remove.append(exp_fp)
+        # the checksum of the copy is cached
+        self.assertEqual(
+            qdb.util._CHECKSUM_CACHE[qdb.util._checksum_cache_key(exp_fp)], 852952723
+        )
 
         # Check that the filepaths have been added to the DB
         with qdb.sql_connection.TRN:
@@ -368,6 +411,30 @@ class DBUtilTests(DBUtilTestsBase):
 
         qdb.util.purge_filepaths()
 
+    def test_insert_filepaths_checksums(self):
+        fd, fp = mkstemp()
+        close(fd)
+        with open(fp, "w") as f:
+            f.write("\n")
+        self.files_to_remove.append(fp)
+
+        # the precomputed checksums and sizes are stored as given
+        (fpid,) = qdb.util.insert_filepaths(
+            [(fp, 1)], 2, "raw_data", checksums=[(852952723, 7)]
+        )
+        self.files_to_remove.append(
+            join(qdb.util.get_db_files_base_dir(), "raw_data", "2_%s" % basename(fp))
+        )
+        with qdb.sql_connection.TRN:
+            qdb.sql_connection.TRN.add(
+                "SELECT checksum, fp_size FROM qiita.filepath WHERE filepath_id = %s",
+                [fpid],
+            )
+            obs = qdb.sql_connection.TRN.execute_fetchindex()
+        self.assertEqual(obs, [["852952723", 7]])
+
+        qdb.util.purge_filepaths()
+
     def test_retrieve_filepaths(self):
         obs = qdb.util.retrieve_filepaths("artifact_filepath", "artifact_id", 1)
         path_builder = partial(join, qdb.util.get_db_files_base_dir(), "raw_data")
@@ -599,6 +666,7 @@ class DBUtilTests(DBUtilTestsBase):
                  VALUES ('analysis', 'analysis_tmp', true, true),
                         ('raw_data', 'raw_data_tmp', true, false)"""
         qdb.sql_connection.perform_as_transaction(sql)
+        qdb.util.invalidate_lookup_cache()
 
         # this should have been updated
         exp = [(count + 1, join(qdb.util.get_db_files_base_dir(), "analysis_tmp"))]
@@ -656,6 +724,7 @@ class DBUtilTests(DBUtilTestsBase):
                  VALUES ('analysis', 'analysis_tmp', true, true),
                         ('raw_data', 'raw_data_tmp', true, false)"""
         qdb.sql_connection.perform_as_transaction(sql)
+        qdb.util.invalidate_lookup_cache()
 
         # this should have been updated
         exp = join(qdb.util.get_db_files_base_dir(), "analysis_tmp")
@@ -912,6 +981,41 @@ class DBUtilTests(DBUtilTestsBase):
 
         self.assertEqual(qdb.util.generate_analysis_list([1, 2, 3, 5], True), [])
 
+    def test_network_cache(self):
+        network = {
+            "edges": [(1, 2)],
+            "nodes": [("artifact", "FASTQ", 1, "Raw data 1\n(FASTQ)", "artifact")],
+            "workflow": None,
+            "artifacts_being_deleted": [],
+        }
+        self.assertIsNone(qdb.util.get_cached_network("prep", 1, True))
+        qdb.util.set_cached_network("prep", 1, True, network)
+        qdb.util.set_cached_network("analysis", 1, False, network)
+        self.assertEqual(qdb.util.get_cached_network("prep", 1, True), network)
+        self.assertIsNone(qdb.util.get_cached_network("prep", 1, False))
+        self.assertEqual(qdb.util.get_cached_network("analysis", 1, False), network)
+
+        # artifact 1 is only part of prep 1
+        with qdb.sql_connection.TRN:
+            qdb.util.invalidate_network_cache(artifact_ids=[1])
+        self.assertIsNone(qdb.util.get_cached_network("prep", 1, True))
+        self.assertEqual(qdb.util.get_cached_network("analysis", 1, False), network)
+
+        # artifact 8 is the input of this job and part of analysis 1
+        qdb.util.set_cached_network("prep", 1, True, network)
+        with qdb.sql_connection.TRN:
+            qdb.util.invalidate_network_cache(
+                job_ids=["8a7a8461-e8a1-4b4e-a428-1bc2f4d3ebd0"]
+            )
+        self.assertEqual(qdb.util.get_cached_network("prep", 1, True), network)
+        self.assertIsNone(qdb.util.get_cached_network("analysis", 1, False))
+
+        # nothing happens if the transaction is rolled back
+        with self.assertRaises(ValueError), qdb.sql_connection.TRN:
+            qdb.util.invalidate_network_cache(artifact_ids=[1])
+            raise ValueError()
+        self.assertEqual(qdb.util.get_cached_network("prep", 1, True), network)
+
 
 @qiita_test_checker()
 class UtilTests(TestCase):
@@ -929,6 +1033,56 @@ class UtilTests(TestCase):
         exp = 1719580229
         self.assertEqual(obs, exp)
 
+    def test_compute_checksum_cached(self):
+        exp = qdb.util.compute_checksum(self.filepath)
+        st = stat(self.filepath)
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        self.assertEqual(qdb.util._CHECKSUM_CACHE[key], exp)
+        # a modified file gets a new checksum
+        with open(self.filepath, "a") as f:
+            f.write("more text")
+        self.assertNotEqual(qdb.util.compute_checksum(self.filepath), exp)
+
+    def test_checksum_buffer(self):
+        # the buffer is reused within a thread but not shared between threads
+        buffr = qdb.util._checksum_buffer()
+        self.assertIs(qdb.util._checksum_buffer(), buffr)
+        with ThreadPoolExecutor(1) as executor:
+            obs = executor.submit(qdb.util._checksum_buffer).result()
+        self.assertIsNot(obs, buffr)
+
+    def test_compute_checksums(self):
+        fh, fp = mkstemp()
+        close(fh)
+        with open(fp, "w") as f:
+            f.write("Some other text")
+        obs = qdb.util.compute_checksums([self.filepath, fp, self.filepath])
+        exp = [
+            (1719580229, 47),
+            (qdb.util.compute_checksum(fp), 15),
+            (1719580229, 47),
+        ]
+        self.assertEqual(obs, exp)
+        self.assertEqual(qdb.util.compute_checksums([]), [])
+        remove(fp)
+
+    def test_scan_mount_folder_size(self):
+        mount = mkdtemp()
+        self.addCleanup(rmtree, mount)
+        mkdir(join(mount, "10"))
+        mkdir(join(mount, "10", "sub"))
+        mkdir(join(mount, "not_numeric"))
+        with open(join(mount, "11"), "w") as f:
+            f.write("not a folder")
+        with open(join(mount, "10", "a.txt"), "w") as f:
+            f.write("12345")
+        with open(join(mount, "10", "sub", "b.txt"), "w") as f:
+            f.write("123")
+
+        obs = qdb.util._scan_mount(mount)
+        self.assertEqual([(n, p) for n, p, _ in obs], [("10", join(mount, "10"))])
+        self.assertEqual(qdb.util._folder_size(join(mount, "10")), 8)
+
     def test_scrub_data_nothing(self):
         """Returns the same string without changes"""
         self.assertEqual(qdb.util.scrub_data("nothing_changes"), "nothing_changes")
@@ -1485,6 +1639,26 @@ class PurgeFilepathsTests(DBUtilTestsBase):
                 [mp_id, biom_id, "10000_my_analysis_biom.biom"],
             ]
         )
+        # a dry run only reports the files
+        obs = qdb.util.purge_filepaths(False)
+        self.assertEqual(
+            [fp for _, fp, _ in obs["analysis_files"]["files"]],
+            [
+                join(mp, "10000_my_analysis_map.txt"),
+                join(mp, "10000_my_analysis_biom.biom"),
+            ],
+        )
+        self.assertEqual(obs["analysis_files"]["bytes"], 0)
+        self.assertEqual(obs["info_files"], {"files": [], "bytes": 0})
+        self.assertEqual(obs["total_bytes"], 0)
+        self.assertCountEqual(
+            fps_expected
+            + [
+                join(mp, "10000_my_analysis_map.txt"),
+                join(mp, "10000_my_analysis_biom.biom"),
+            ],
+            self._get_current_filepaths(),
+        )
         qdb.util.purge_filepaths()
         fps_viewed = self._get_current_filepaths()
         self.assertCountEqual(fps_expected, fps_viewed)
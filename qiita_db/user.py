@@ -767,7 +767,9 @@ class User(qdb.base.QiitaObject):
             qdb.sql_connection.TRN.add(sql)
             qdb.sql_connection.TRN.execute()
 
-    def jobs(self, limit=30, ignore_status=["success"], show_hidden=False):
+    def jobs(
+        self, limit=30, ignore_status=["success"], show_hidden=False, information=False
+    ):
         """Return jobs created by the user
 
         Parameters
@@ -778,44 +780,24 @@ class User(qdb.base.QiitaObject):
             don't retieve jobs that have one of these status
         show_hidden: bool, optional
             If true, return all jobs, including the hidden ones
+        information: bool, optional
+            If true, return the information of the jobs, as returned by
+            ProcessingJob.list_jobs, instead of the jobs
 
         Returns
         -------
-        list of ProcessingJob
+        list of ProcessingJob or list of dict
 
+        See Also
+        --------
+        qiita_db.processing_job.ProcessingJob.list_jobs
         """
-        with qdb.sql_connection.TRN:
-            sql = """SELECT processing_job_id
-                     FROM qiita.processing_job
-                     LEFT JOIN qiita.processing_job_status
-                        USING (processing_job_status_id)
-                     WHERE email = %s
-                  """
-
-            if ignore_status:
-                sql_info = [self._id, tuple(ignore_status), limit]
-                sql += "    AND processing_job_status NOT IN %s"
-            else:
-                sql_info = [self._id, limit]
-
-            if not show_hidden:
-                sql += " AND hidden = false"
-
-            sql += """
-                     ORDER BY CASE processing_job_status
-                            WHEN 'in_construction' THEN 1
-                            WHEN 'running' THEN 2
-                            WHEN 'queued' THEN 3
-                            WHEN 'waiting' THEN 4
-                            WHEN 'error' THEN 5
-                            WHEN 'success' THEN 6
-                        END, heartbeat DESC LIMIT %s"""
-
-            qdb.sql_connection.TRN.add(sql, sql_info)
-            return [
-                qdb.processing_job.ProcessingJob(p[0])
-                for p in qdb.sql_connection.TRN.execute_fetchindex()
-            ]
+        _, _, jobs = qdb.processing_job.ProcessingJob.list_jobs(
+            user=self, ignore_status=ignore_status, show_hidden=show_hidden, limit=limit
+        )
+        if information:
+            return jobs
+        return [qdb.processing_job.ProcessingJob(j["id"]) for j in jobs]
 
     def update_email(self, email):
         if not validate_email(email):
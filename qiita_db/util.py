@@ -17,6 +17,7 @@ Methods
     exists_table
     get_db_files_base_dir
     compute_checksum
+    compute_checksums
     get_files_from_uploads_folders
     filepath_id_to_rel_path
     filepath_id_to_object_id
@@ -35,6 +36,11 @@ Methods
     get_pubmed_ids_from_dois
     generate_analysis_list
     human_merging_scheme
+    get_cached_network
+    set_cached_network
+    invalidate_network_cache
+    invalidate_lookup_cache
+    get_lookup_cache_stats
 """
 
 # -----------------------------------------------------------------------------
@@ -45,19 +51,21 @@ Methods
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
 import hashlib
-from binascii import crc32
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from copy import copy
 from csv import writer as csv_writer
 from datetime import datetime, timedelta
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from errno import EEXIST
-from functools import partial
+from functools import partial, wraps
 from glob import glob
 from io import StringIO
 from itertools import chain
-from json import loads
-from os import listdir, makedirs, remove, stat, walk
+from json import dumps, loads
+from os import listdir, makedirs, remove, scandir, stat, walk
 from os.path import basename, exists, getsize, isdir, join
 from random import SystemRandom
 from shutil import copy as shutil_copy
@@ -66,7 +74,9 @@ from smtplib import SMTP, SMTP_SSL, SMTPException
 from string import ascii_letters, digits, punctuation
 from subprocess import check_output
 from tempfile import mkstemp
+from threading import Lock, local
 from time import time as now
+from zlib import crc32
 
 import h5py
 import matplotlib.pyplot as plt
@@ -80,7 +90,7 @@ from scipy.optimize import minimize
 
 import qiita_db as qdb
 from qiita_core.exceptions import IncompetentQiitaDeveloperError
-from qiita_core.qiita_settings import qiita_config
+from qiita_core.qiita_settings import qiita_config, r_client
 
 
 def scrub_data(s):
@@ -145,6 +155,146 @@ def convert_type(obj):
     return item
 
 
+# process-wide cache of the lookups on tables that only change when patching
+# the database or registering plugins (artifact types, mountpoints, etc); the
+# writers call invalidate_lookup_cache, which bumps a version in redis so the
+# other processes (e.g. all the tornado workers) also drop their copies
+LOOKUP_CACHE_VERSION_KEY = "qiita_lookup_cache_version"
+# maximum number of seconds between checks of the version in redis, which is
+# how long another process can keep serving values that were invalidated
+LOOKUP_CACHE_VERSION_CHECK = 1
+# the tables that convert_to_id/convert_from_id can cache
+LOOKUP_CACHE_TABLES = frozenset(
+    [
+        "artifact_type",
+        "data_type",
+        "filepath_type",
+        "ontology",
+        "portal_type",
+        "processing_job_status",
+        "severity",
+        "software_type",
+        "timeseries_type",
+        "user_level",
+        "visibility",
+    ]
+)
+
+_LOOKUP_CACHE = {}
+_LOOKUP_CACHE_LOCK = Lock()
+_LOOKUP_CACHE_STATE = {"version": None, "checked": 0}
+_LOOKUP_CACHE_STATS = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+
+def _clear_lookup_cache():
+    with _LOOKUP_CACHE_LOCK:
+        _LOOKUP_CACHE.clear()
+
+
+def _check_lookup_cache_version():
+    """Drops the local cache if another process invalidated it"""
+    current = now()
+    if current - _LOOKUP_CACHE_STATE["checked"] < LOOKUP_CACHE_VERSION_CHECK:
+        return
+    version = r_client.get(LOOKUP_CACHE_VERSION_KEY)
+    with _LOOKUP_CACHE_LOCK:
+        _LOOKUP_CACHE_STATE["checked"] = current
+        if version != _LOOKUP_CACHE_STATE["version"]:
+            _LOOKUP_CACHE.clear()
+            _LOOKUP_CACHE_STATE["version"] = version
+
+
+def _bump_lookup_cache_version():
+    r_client.incr(LOOKUP_CACHE_VERSION_KEY)
+    with _LOOKUP_CACHE_LOCK:
+        _LOOKUP_CACHE.clear()
+        # forcing to read the new version in the next lookup
+        _LOOKUP_CACHE_STATE["checked"] = 0
+
+
+def invalidate_lookup_cache():
+    """Invalidates the cached lookups in this and all the other processes
+
+    Notes
+    -----
+    If called within the transaction modifying the cached tables, the local
+    cache is dropped right away, and again after the transaction is committed
+    (when the version is bumped for the other processes) or rolled back, so
+    values read while the transaction was open are not kept.
+    """
+    if not qdb.sql_connection.TRN.in_context:
+        _bump_lookup_cache_version()
+        return
+
+    _clear_lookup_cache()
+    qdb.sql_connection.TRN.add_post_commit_func(_bump_lookup_cache_version)
+    qdb.sql_connection.TRN.add_post_rollback_func(_clear_lookup_cache)
+
+
+def get_lookup_cache_stats():
+    """Returns the hits and misses of the cached lookups in this process
+
+    Returns
+    -------
+    dict of {str: dict}
+        The number of hits, misses and the hit rate, keyed by function name
+    """
+    with _LOOKUP_CACHE_LOCK:
+        stats = {}
+        for name, counts in _LOOKUP_CACHE_STATS.items():
+            total = counts["hits"] + counts["misses"]
+            stats[name] = {
+                "hits": counts["hits"],
+                "misses": counts["misses"],
+                "hit_rate": counts["hits"] / total if total else 0,
+            }
+        return stats
+
+
+def _cached_lookup(cache_if=None):
+    """Decorator caching the results of a lookup function
+
+    Parameters
+    ----------
+    cache_if : callable, optional
+        Receives the arguments of the decorated function and returns whether
+        the result can be cached. Default: always cache
+
+    Notes
+    -----
+    Empty results are not cached as they can be from tables or rows that are
+    not there yet. A copy of the cached value is returned so callers can
+    modify it.
+    """
+
+    def decorator(func):
+        name = func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if cache_if is not None and not cache_if(*args, **kwargs):
+                return func(*args, **kwargs)
+
+            _check_lookup_cache_version()
+            key = (name, args, tuple(sorted(kwargs.items())))
+            with _LOOKUP_CACHE_LOCK:
+                if key in _LOOKUP_CACHE:
+                    _LOOKUP_CACHE_STATS[name]["hits"] += 1
+                    return copy(_LOOKUP_CACHE[key])
+                _LOOKUP_CACHE_STATS[name]["misses"] += 1
+
+            value = func(*args, **kwargs)
+            if value:
+                with _LOOKUP_CACHE_LOCK:
+                    _LOOKUP_CACHE[key] = copy(value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+@_cached_lookup()
 def get_artifact_types(key_by_id=False):
     """Gets the list of possible artifact types
 
@@ -172,6 +322,7 @@ def get_artifact_types(key_by_id=False):
         return dict(qdb.sql_connection.TRN.execute_fetchindex())
 
 
+@_cached_lookup()
 def get_filepath_types(key="filepath_type"):
     """Gets the list of possible filepath types from the filetype table
 
@@ -203,6 +354,7 @@ def get_filepath_types(key="filepath_type"):
         return dict(qdb.sql_connection.TRN.execute_fetchindex())
 
 
+@_cached_lookup()
 def get_data_types(key="data_type"):
     """Gets the list of possible data types from the data_type table
 
@@ -349,6 +501,7 @@ def check_table_cols(keys, table):
             )
 
 
+@_cached_lookup()
 def get_table_cols(table):
     """Returns the column headers of table
 
@@ -446,38 +599,115 @@ def max_artifacts_in_workflow():
         return qdb.sql_connection.TRN.execute_fetchlast()
 
 
-def compute_checksum(path):
+# Size of the reads done while computing checksums, the number of files that
+# are checksummed in parallel and the max number of cached file checksums
+CHECKSUM_BUFFER_SIZE = 4 * 1024 * 1024
+CHECKSUM_WORKERS = 8
+CHECKSUM_CACHE_SIZE = 10000
+# {(device, inode, size, mtime): checksum}
+_CHECKSUM_CACHE = {}
+_CHECKSUM_CACHE_LOCK = Lock()
+# each thread reuses its own read buffer, see _checksum_buffer
+_CHECKSUM_THREAD_DATA = local()
+
+
+def _checksum_buffer():
+    """Returns the read buffer of the current thread"""
+    buffr = getattr(_CHECKSUM_THREAD_DATA, "buffer", None)
+    if buffr is None or len(buffr) != CHECKSUM_BUFFER_SIZE:
+        buffr = bytearray(CHECKSUM_BUFFER_SIZE)
+        _CHECKSUM_THREAD_DATA.buffer = buffr
+    return buffr
+
+
+def _checksum_cache_key(path):
+    """Returns the key of a regular file in the checksum cache"""
+    st = stat(path)
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _cache_checksum(key, checksum):
+    """Stores a checksum in the cache, removing the oldest one if full"""
+    with _CHECKSUM_CACHE_LOCK:
+        if len(_CHECKSUM_CACHE) >= CHECKSUM_CACHE_SIZE:
+            # dicts keep the insertion order so this removes the oldest
+            del _CHECKSUM_CACHE[next(iter(_CHECKSUM_CACHE))]
+        _CHECKSUM_CACHE[key] = checksum
+
+
+def _update_checksum(fp, crcvalue, buffr):
+    """Updates crcvalue with the contents of the file fp"""
+    view = memoryview(buffr)
+    with open(fp, "rb", buffering=0) as f:
+        read = f.readinto(buffr)
+        while read:
+            crcvalue = crc32(view[:read], crcvalue)
+            read = f.readinto(buffr)
+    return crcvalue
+
+
+def compute_checksum(path, cache=True):
     r"""Returns the checksum of the file pointed by path
 
     Parameters
     ----------
     path : str
         The path to compute the checksum
+    cache : bool, optional
+        Whether to use the cached checksum of the file, if any. Default True
 
     Returns
     -------
     int
         The file checksum
+
+    Notes
+    -----
+    The checksums of regular files are cached by (device, inode, size,
+    modification time) so a file is not read again unless it has changed.
+    A copy of a file is a new inode so it is read again, unless the copy was
+    made by insert_filepaths, which caches the checksum of the copies.
     """
-    filepaths = []
+    buffr = _checksum_buffer()
     if isdir(path):
+        crcvalue = 0
         for name, dirs, files in walk(path):
-            join_f = partial(join, name)
-            filepaths.extend(list(map(join_f, files)))
-    else:
-        filepaths.append(path)
+            for f in files:
+                crcvalue = _update_checksum(join(name, f), crcvalue, buffr)
+        # We need the & 0xFFFFFFFF in order to get the same numeric value
+        # across all python versions and platforms
+        return crcvalue & 0xFFFFFFFF
+
+    key = _checksum_cache_key(path)
+    checksum = _CHECKSUM_CACHE.get(key) if cache else None
+    if checksum is None:
+        checksum = _update_checksum(path, 0, buffr) & 0xFFFFFFFF
+        _cache_checksum(key, checksum)
+    return checksum
 
-    buffersize = 65536
-    crcvalue = 0
-    for fp in filepaths:
-        with open(fp, "rb") as f:
-            buffr = f.read(buffersize)
-            while len(buffr) > 0:
-                crcvalue = crc32(buffr, crcvalue)
-                buffr = f.read(buffersize)
-    # We need the & 0xFFFFFFFF in order to get the same numeric value across
-    # all python versions and platforms
-    return crcvalue & 0xFFFFFFFF
+
+def compute_checksums(paths):
+    r"""Returns the checksum and size of the given paths, in parallel
+
+    Parameters
+    ----------
+    paths : list of str
+        The paths to compute the checksum
+
+    Returns
+    -------
+    list of (int, int)
+        The checksum and size of each of the paths, in the same order
+    """
+
+    def _checksum_size(path):
+        return compute_checksum(path), getsize(path)
+
+    if len(paths) < 2:
+        return [_checksum_size(p) for p in paths]
+
+    with ThreadPoolExecutor(min(CHECKSUM_WORKERS, len(paths))) as executor:
+        return list(executor.map(_checksum_size, paths))
 
 
 def get_files_from_uploads_folders(study_id):
@@ -552,6 +782,7 @@ def move_upload_files_to_trash(study_id, files_to_move):
             move(fullpath, new_fullpath)
 
 
+@_cached_lookup()
 def get_mountpoint(mount_type, retrieve_all=False, retrieve_subdir=False):
     r"""Returns the most recent values from data directory for the given type
 
@@ -610,7 +841,9 @@ def get_mountpoint_path_by_id(mount_id):
         return join(get_db_files_base_dir(), mountpoint)
 
 
-def insert_filepaths(filepaths, obj_id, table, move_files=True, copy=False):
+def insert_filepaths(
+    filepaths, obj_id, table, move_files=True, copy=False, checksums=None
+):
     r"""Inserts `filepaths` in the database.
 
     Since the files live outside the database, the directory in which the files
@@ -632,12 +865,27 @@ def insert_filepaths(filepaths, obj_id, table, move_files=True, copy=False):
     copy : bool, optional
         If `move_files` is true, whether to actually move the files or just
         copy them
+    checksums : list of (int, int), optional
+        The checksum and size of each of the filepaths, as returned by
+        compute_checksums. If not provided, they are computed here
 
     Returns
     -------
     list of int
         List of the filepath_id in the database for each added filepath
+
+    Notes
+    -----
+    Computing the checksums can take a while for large files so, if the
+    caller has an open transaction, it should compute them before opening
+    it and pass them via `checksums` (see Artifact.create).
     """
+    if checksums is None:
+        # The checksums are computed before moving the files, and without
+        # sending any query to the DB, as this can take a while for large
+        # files
+        checksums = compute_checksums([path for path, _ in filepaths])
+
     with qdb.sql_connection.TRN:
         new_filepaths = filepaths
 
@@ -663,8 +911,14 @@ def insert_filepaths(filepaths, obj_id, table, move_files=True, copy=False):
                 ]
             # Move the original files to the controlled DB directory
             transfer_function = shutil_copy if copy else move
-            for old_fp, new_fp in zip(filepaths, new_filepaths):
+            for old_fp, new_fp, (checksum, _) in zip(
+                filepaths, new_filepaths, checksums
+            ):
                 transfer_function(old_fp[0], new_fp[0])
+                # copies (or moves across devices) are new inodes so their
+                # checksum is cached to avoid reading them again
+                if not isdir(new_fp[0]):
+                    _cache_checksum(_checksum_cache_key(new_fp[0]), checksum)
                 # In case the transaction executes a rollback, we need to
                 # make sure the files have not been moved
                 qdb.sql_connection.TRN.add_post_rollback_func(
@@ -676,15 +930,8 @@ def insert_filepaths(filepaths, obj_id, table, move_files=True, copy=False):
 
         # 1 is the checksum algorithm, which we only have one implemented
         values = [
-            [
-                basename(path),
-                str_to_id(id_),
-                compute_checksum(path),
-                getsize(path),
-                1,
-                dd_id,
-            ]
-            for path, id_ in new_filepaths
+            [basename(path), str_to_id(id_), checksum, size, 1, dd_id]
+            for (path, id_), (checksum, size) in zip(new_filepaths, checksums)
         ]
         # Insert all the filepaths at once and get the filepath_id back
         sql = """INSERT INTO qiita.filepath
@@ -807,6 +1054,39 @@ def _rm_files(TRN, fp):
         TRN.add_post_commit_func(func, fp)
 
 
+# Number of filepath ids removed per DELETE and number of files and folders
+# removed in parallel by purge_filepaths
+PURGE_BATCH_SIZE = 10000
+PURGE_WORKERS = 8
+
+
+def _path_size(fp):
+    """Returns the size of the file or the folder fp, 0 if it doesn't exist"""
+    if isdir(fp):
+        return sum(
+            getsize(join(name, f))
+            for name, _, files in walk(fp)
+            for f in files
+            if exists(join(name, f))
+        )
+    return getsize(fp) if exists(fp) else 0
+
+
+def _remove_paths(fps, workers=PURGE_WORKERS):
+    """Removes the given files and folders using a pool of workers"""
+
+    def _remove(fp):
+        if isdir(fp):
+            rmtree(fp)
+        elif exists(fp):
+            remove(fp)
+
+    if fps:
+        with ThreadPoolExecutor(min(workers, len(fps))) as executor:
+            # list so any error is raised
+            list(executor.map(_remove, fps))
+
+
 def purge_filepaths(delete_files=True):
     r"""Goes over the filepath table and removes all the filepaths that are not
     used in any place
@@ -814,10 +1094,23 @@ def purge_filepaths(delete_files=True):
     Parameters
     ----------
     delete_files : bool
-        if True it will actually delete the files, if False print
-    """
+        if True it will actually delete the files, if False only report them
+
+    Returns
+    -------
+    dict
+        The report of what was (or would be) removed, with a
+        {'files': [[filepath_id, fullpath, size], ...], 'bytes': int} entry
+        for each of 'info_files', 'artifact_folders', 'artifact_filepaths' and
+        'analysis_files', plus the 'total_bytes'. filepath_id is None for
+        folders that are not in the DB and fullpath is None for DB entries
+        without a file
+    """
+    # the DB is only queried within the transactions; listing the mounts and
+    # walking the folders happens once they are closed
     with qdb.sql_connection.TRN:
-        files_to_remove = []
+        db_dir = get_db_files_base_dir()
+        report = {}
         # qiita can basically download 5 things: references, info files,
         # artifacts, analyses & working_dir.
         # 1. references are not longer used so we can skip
@@ -827,131 +1120,201 @@ def purge_filepaths(delete_files=True):
         #    studies that no longer exist. We want to keep the old templates
         #    so we can recover them (this has happened before) but let's remove
         #    those from deleted studies. Note that we need to check for sample,
-        #    prep and qiime info files
-        st_id = qdb.util.convert_to_id("sample_template", "filepath_type")
-        pt_id = qdb.util.convert_to_id("prep_template", "filepath_type")
-        qt_id = qdb.util.convert_to_id("qiime_map", "filepath_type")
-        sql = """SELECT filepath_id, filepath FROM qiita.filepath
-                 WHERE filepath_type_id IN %s AND filepath ~ '^[0-9]' AND
-                    data_directory_id = %s AND filepath_id NOT IN (
-                        SELECT filepath_id FROM qiita.prep_template_filepath
-                        UNION
-                        SELECT filepath_id FROM qiita.sample_template_filepath)
-              """
-        for mp_id, mp in get_mountpoint("templates"):
-            qdb.sql_connection.TRN.add(sql, [tuple([st_id, pt_id, qt_id]), mp_id])
-            studies_exits = []
-            studies_erased = []
-            for fid, fp in qdb.sql_connection.TRN.execute_fetchindex():
-                # making sure the studies do _not_ exist, remember info files
-                # are prepended by the study id
-                study_id = int(fp.split("_")[0])
-                if study_id in studies_exits:
-                    continue
-                elif study_id in studies_erased:
-                    fpath = qdb.util.get_filepath_information(fid)["fullpath"]
-                    files_to_remove.append([fid, fpath])
-                else:
-                    try:
-                        qdb.study.Study(study_id)
-                    except qdb.exceptions.QiitaDBUnknownIDError:
-                        fpath = qdb.util.get_filepath_information(fid)["fullpath"]
-                        files_to_remove.append([fid, fpath])
-                        studies_erased.append(study_id)
-                    else:
-                        studies_exits.append(study_id)
+        #    prep and qiime info files; remember info files are prepended by
+        #    the study id
+        sql = """SELECT f.filepath_id, f.filepath, dd.mountpoint,
+                        COALESCE(f.fp_size, 0)
+                 FROM qiita.filepath f
+                    JOIN qiita.data_directory dd USING (data_directory_id)
+                    JOIN qiita.filepath_type ft USING (filepath_type_id)
+                 WHERE ft.filepath_type IN (
+                        'sample_template', 'prep_template', 'qiime_map')
+                    AND dd.data_type = 'templates' AND dd.active
+                    AND f.filepath ~ '^[0-9]+_'
+                    AND NOT EXISTS (
+                        SELECT 1 FROM qiita.prep_template_filepath ptf
+                        WHERE ptf.filepath_id = f.filepath_id)
+                    AND NOT EXISTS (
+                        SELECT 1 FROM qiita.sample_template_filepath stf
+                        WHERE stf.filepath_id = f.filepath_id)
+                    AND NOT EXISTS (
+                        SELECT 1 FROM qiita.study s
+                        WHERE s.study_id = substring(
+                            f.filepath FROM '^[0-9]+')::bigint)
+                 ORDER BY f.filepath_id"""
+        qdb.sql_connection.TRN.add(sql)
+        report["info_files"] = [
+            [fid, join(db_dir, mp, fp), size]
+            for fid, fp, mp, size in qdb.sql_connection.TRN.execute_fetchindex()
+        ]
 
         # 3. artifacts: [A] the difficulty of deleting artifacts is that (1)
         #    they live in different mounts, (2) as inidividual folders [the
         #    artifact id], (3) and the artifact id within the database has
         #    been lost. Thus, the easiest is to loop over the different data
         #    directories (mounts), get the folder names (artifact ids), and
-        #    check if they exist; if they don't let's delete them. [B] As an
-        #    additional and final step, we need to purge these filepaths from
-        #    the DB.
-        #    [A]
-        main_sql = """SELECT data_directory_id FROM qiita.artifact_type at
-                        LEFT JOIN qiita.data_directory dd ON (
-                            dd.data_type = at.artifact_type)
-                        WHERE subdirectory = true"""
-        qdb.sql_connection.TRN.add(main_sql)
-        for mp_id in qdb.sql_connection.TRN.execute_fetchflatten():
-            mount = get_mountpoint_path_by_id(mp_id)
-            for fpath in listdir(mount):
-                full_fpath = join(mount, fpath)
-                if isdir(full_fpath):
-                    try:
-                        qdb.artifact.Artifact(int(fpath))
-                    except qdb.exceptions.QiitaDBUnknownIDError:
-                        files_to_remove.append([None, full_fpath])
-                    else:
-                        continue
-        #    [B]
-        sql = """SELECT filepath_id FROM qiita.filepath
-                 WHERE filepath_id not in (
-                    SELECT filepath_id FROM qiita.artifact_filepath) AND
-                data_directory_id in (
-                    SELECT data_directory_id FROM qiita.artifact_type at
-                        LEFT JOIN qiita.data_directory dd ON (
-                            dd.data_type = at.artifact_type)
-                    WHERE subdirectory = true)
-              """
+        #    check in a single query which exist; if they don't let's delete
+        #    them. [B] As an additional and final step, we need to purge
+        #    these filepaths from the DB.
+        #    [A] the mounts are listed after closing this transaction
+        sql = """SELECT DISTINCT dd.mountpoint
+                 FROM qiita.artifact_type at
+                    JOIN qiita.data_directory dd ON (
+                        dd.data_type = at.artifact_type)
+                 WHERE dd.subdirectory = true"""
         qdb.sql_connection.TRN.add(sql)
-        for fid in qdb.sql_connection.TRN.execute_fetchflatten():
-            fpath = qdb.util.get_filepath_information(fid)["fullpath"]
-            aid = fpath.split("/")[-2]
-            # making sure the artifact doesn't exist any more
-            if aid == "None":
-                files_to_remove.append([fid, None])
-
-        # 4. analysis: we need to select all the filepaths that are not in
-        #    the analysis_filepath, this will return both all filepaths not
-        #    from analyses and those that are not being used, thus, we need
-        #    to also not select those files that are not part of the artifacts
-        #    by ignoring those files paths not stored in a data_directory from
-        #    an artifact:
-        sql = """SELECT filepath_id FROM qiita.filepath
-                 WHERE filepath_id not in (
-                    SELECT filepath_id FROM qiita.analysis_filepath) AND
-                data_directory_id in (
-                    SELECT data_directory_id FROM qiita.data_directory
-                    WHERE data_type = 'analysis')
-              """
+        mounts = [
+            join(db_dir, mp) for mp in qdb.sql_connection.TRN.execute_fetchflatten()
+        ]
+        #    [B] these filepaths are not linked to any artifact so they don't
+        #    have a folder
+        sql = """SELECT f.filepath_id, COALESCE(f.fp_size, 0)
+                 FROM qiita.filepath f
+                 WHERE NOT EXISTS (
+                        SELECT 1 FROM qiita.artifact_filepath af
+                        WHERE af.filepath_id = f.filepath_id)
+                    AND f.data_directory_id IN (
+                        SELECT dd.data_directory_id
+                        FROM qiita.artifact_type at
+                            JOIN qiita.data_directory dd ON (
+                                dd.data_type = at.artifact_type)
+                        WHERE dd.subdirectory = true)
+                 ORDER BY f.filepath_id"""
         qdb.sql_connection.TRN.add(sql)
-        for fid in qdb.sql_connection.TRN.execute_fetchflatten():
-            fdata = qdb.util.get_filepath_information(fid)
-            analysis_id = int(fdata["filepath"].split("_")[0])
-            # making sure the Analysis doesn't exist
-            if not qdb.analysis.Analysis.exists(analysis_id):
-                fpath = fdata["fullpath"]
-                files_to_remove.append([fid, fpath])
+        report["artifact_filepaths"] = [
+            [fid, None, size]
+            for fid, size in qdb.sql_connection.TRN.execute_fetchindex()
+        ]
+
+        # 4. analysis: we need to select all the filepaths stored in an
+        #    analysis data_directory that are not in analysis_filepath and
+        #    whose analysis (the filepath prefix) doesn't exist
+        sql = """SELECT f.filepath_id, f.filepath, dd.mountpoint,
+                        COALESCE(f.fp_size, 0)
+                 FROM qiita.filepath f
+                    JOIN qiita.data_directory dd USING (data_directory_id)
+                 WHERE dd.data_type = 'analysis'
+                    AND f.filepath ~ '^[0-9]+_'
+                    AND NOT EXISTS (
+                        SELECT 1 FROM qiita.analysis_filepath af
+                        WHERE af.filepath_id = f.filepath_id)
+                    AND NOT EXISTS (
+                        SELECT 1
+                        FROM qiita.analysis_portal ap
+                            JOIN qiita.portal_type USING (portal_type_id)
+                        WHERE ap.analysis_id = substring(
+                                f.filepath FROM '^[0-9]+')::bigint
+                            AND portal = %s)
+                 ORDER BY f.filepath_id"""
+        qdb.sql_connection.TRN.add(sql, [qiita_config.portal])
+        report["analysis_files"] = [
+            [fid, join(db_dir, mp, fp), size]
+            for fid, fp, mp, size in qdb.sql_connection.TRN.execute_fetchindex()
+        ]
 
         # 5. working directory: this is done internally in the Qiita system via
         #    a cron job
 
-        # Deleting the files!
-        sql = "DELETE FROM qiita.filepath WHERE filepath_id = %s"
-        for fid, fpath in files_to_remove:
-            if delete_files:
-                if fid is not None:
-                    qdb.sql_connection.TRN.add(sql, [fid])
-                if fpath is not None:
-                    _rm_files(qdb.sql_connection.TRN, fpath)
-            else:
-                print("%s: %s" % (fid, fpath))
+    #    [A] listing the artifact folders
+    folders = defaultdict(list)
+    for mount in mounts:
+        for fpath in listdir(mount):
+            full_fpath = join(mount, fpath)
+            if fpath.isdigit() and isdir(full_fpath):
+                folders[int(fpath)].append(full_fpath)
+    report["artifact_folders"] = []
+    if folders:
+        with qdb.sql_connection.TRN:
+            sql = """SELECT artifact_id FROM qiita.artifact
+                     WHERE artifact_id IN %s"""
+            qdb.sql_connection.TRN.add(sql, [tuple(folders)])
+            existing = set(qdb.sql_connection.TRN.execute_fetchflatten())
+        missing = [fp for aid in sorted(set(folders) - existing) for fp in folders[aid]]
+        with ThreadPoolExecutor(PURGE_WORKERS) as executor:
+            sizes = list(executor.map(_path_size, missing))
+        report["artifact_folders"] = [
+            [None, fp, size] for fp, size in zip(missing, sizes)
+        ]
 
-        if delete_files:
-            # there is a chance that we will never enter the above
-            # "if fid is not None" statement so we will add an extra SQL
-            # command just to make sure that something gets executed
+    total_bytes = 0
+    fids = []
+    fpaths = []
+    for key in (
+        "info_files",
+        "artifact_folders",
+        "artifact_filepaths",
+        "analysis_files",
+    ):
+        files = report[key]
+        nbytes = sum(size for _, _, size in files)
+        report[key] = {"files": files, "bytes": nbytes}
+        total_bytes += nbytes
+        fids.extend(fid for fid, _, _ in files if fid is not None)
+        fpaths.extend(fp for _, fp, _ in files if fp is not None)
+    report["total_bytes"] = total_bytes
+
+    # Deleting the files!
+    if delete_files:
+        with qdb.sql_connection.TRN:
+            sql = "DELETE FROM qiita.filepath WHERE filepath_id = ANY(%s)"
+            for i in range(0, len(fids), PURGE_BATCH_SIZE):
+                qdb.sql_connection.TRN.add(sql, [fids[i : i + PURGE_BATCH_SIZE]])
+            # the files are only removed once the DB changes are committed
+            qdb.sql_connection.TRN.add_post_commit_func(_remove_paths, fpaths)
+            # there is a chance that there is nothing to delete so we will add
+            # an extra SQL command just to make sure that something gets
+            # executed
             qdb.sql_connection.TRN.add("SELECT 42")
 
             qdb.sql_connection.TRN.execute()
 
+    return report
+
 
-def quick_mounts_purge():
+def _scan_mount(mount):
+    """Returns the numeric folders in mount as a list of (name, path, mtime)"""
+    with scandir(mount) as it:
+        return [
+            (e.name, e.path, e.stat().st_mtime)
+            for e in it
+            if e.name.isnumeric() and e.is_dir()
+        ]
+
+
+def _folder_size(path):
+    """Returns the size of all the files within path"""
+    size = 0
+    stack = [path]
+    while stack:
+        with scandir(stack.pop()) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                else:
+                    size += e.stat().st_size
+    return size
+
+
+def quick_mounts_purge(workers=PURGE_WORKERS, verbose=False):
     r"""This is a quick mount purge as it only slightly relies on the database
 
+    Parameters
+    ----------
+    workers : int, optional
+        The number of mounts/folders that are scanned and removed in parallel
+    verbose : bool, optional
+        Whether to print the progress of the purge. Default False
+
+    Returns
+    -------
+    str
+        The report of the removed folders, by mount, and the scan metrics
+
+    Raises
+    ------
+    ValueError
+        If the artifact of a folder has a different type than its mount
+
     Notes
     -----
         Currently we delete anything older than 30 days that is not linked
@@ -959,58 +1322,90 @@ def quick_mounts_purge():
         At the time of this writing this number seem high but keeping it
         this way to be safe. In the future, if needed, it can be changed.
     """
+    start = now()
+
+    def progress(msg):
+        if verbose:
+            print(f"[{now() - start:.1f}s] {msg}")
+
     with qdb.sql_connection.TRN:
-        main_sql = """SELECT data_directory_id FROM qiita.artifact_type at
+        main_sql = """SELECT DISTINCT mountpoint FROM qiita.artifact_type at
                   LEFT JOIN qiita.data_directory dd ON (
                       dd.data_type = at.artifact_type)
                   WHERE subdirectory = true"""
         qdb.sql_connection.TRN.add(main_sql)
-        mp_ids = qdb.sql_connection.TRN.execute_fetchflatten()
-        mounts = [qdb.util.get_mountpoint_path_by_id(x) for x in mp_ids]
-        folders = [join(x, f) for x in mounts for f in listdir(x) if f.isnumeric()]
-
-    # getting all unlinked folders
-    to_delete = []
-    for i, f in enumerate(folders):
-        vals = f.split("/")
-        aid = int(vals[-1])
-        artifact_type = vals[-2]
-        if artifact_type == "FeatureData[Taxonomy]":
-            continue
+        base_dir = get_db_files_base_dir()
+        mounts = [
+            join(base_dir, x) for x in qdb.sql_connection.TRN.execute_fetchflatten()
+        ]
 
-        try:
-            a = qdb.artifact.Artifact(aid)
-        except qdb.exceptions.QiitaDBUnknownIDError:
-            to_delete.append(f)
-            continue
-        if not a.artifact_type.startswith(artifact_type):
-            raise ValueError(
-                f"Review artifact type: {a.id} {artifact_type} {a.artifact_type}"
+    # scanning all the mounts in parallel; the mount name is the artifact type
+    folders = []
+    with ThreadPoolExecutor(max(min(workers, len(mounts)), 1)) as executor:
+        for mount, found in zip(mounts, executor.map(_scan_mount, mounts)):
+            artifact_type = basename(mount)
+            if artifact_type == "FeatureData[Taxonomy]":
+                continue
+            folders.extend(
+                (int(name), artifact_type, path, mtime) for name, path, mtime in found
             )
+            progress(f"{mount}: {len(found)} folders")
+
+    # getting all unlinked folders with a single query
+    existing = {}
+    if folders:
+        with qdb.sql_connection.TRN:
+            sql = """SELECT artifact_id, artifact_type
+                     FROM qiita.artifact
+                        JOIN qiita.artifact_type USING (artifact_type_id)
+                     WHERE artifact_id IN %s"""
+            qdb.sql_connection.TRN.add(sql, [tuple({f[0] for f in folders})])
+            existing = dict(qdb.sql_connection.TRN.execute_fetchindex())
 
     # now, let's just keep those older than 30 days (in seconds)
     ignore = now() - (30 * 86400)
-    to_keep = [x for x in to_delete if stat(x).st_mtime >= ignore]
-    to_delete = set(to_delete) - set(to_keep)
+    to_delete = []
+    recent = 0
+    for aid, artifact_type, path, mtime in folders:
+        if aid in existing:
+            if not existing[aid].startswith(artifact_type):
+                raise ValueError(
+                    f"Review artifact type: {aid} {artifact_type} {existing[aid]}"
+                )
+        elif mtime >= ignore:
+            recent += 1
+        else:
+            to_delete.append((artifact_type, path))
+    progress(f"{len(to_delete)} folders to delete, {recent} recent kept")
+
+    # get stats to report, accumulated as each folder is sized and removed
+    def purge(path):
+        size = _folder_size(path)
+        if exists(path):
+            rmtree(path)
+        return size
 
-    # get stats to report
     stats = dict()
-    for td in to_delete:
-        f = td.split("/")[-2]
-        if f not in stats:
-            stats[f] = 0
-        stats[f] += sum([getsize(join(p, fp)) for p, ds, fs in walk(td) for fp in fs])
+    with ThreadPoolExecutor(max(workers, 1)) as executor:
+        sizes = executor.map(purge, [path for _, path in to_delete])
+        for i, ((artifact_type, _), size) in enumerate(zip(to_delete, sizes), 1):
+            stats[artifact_type] = stats.get(artifact_type, 0) + size
+            if i % 1000 == 0:
+                progress(
+                    f"{i}/{len(to_delete)} folders deleted, "
+                    f"{naturalsize(sum(stats.values()))}"
+                )
 
     report = ["----------------------"]
     for f, s in stats.items():
         report.append(f"{f}\t{naturalsize(s)}")
     report.append(f"Total files {len(to_delete)} {naturalsize(sum(stats.values()))}")
+    report.append(
+        f"Scanned {len(mounts)} mounts, {len(folders)} folders, {recent} recent "
+        f"unlinked folders kept, in {now() - start:.1f}s"
+    )
     report.append("----------------------")
 
-    for td in list(to_delete):
-        if exists(td):
-            rmtree(td)
-
     return "\n".join(report)
 
 
@@ -1229,6 +1624,7 @@ def filepath_ids_to_rel_paths(filepath_ids):
         return res
 
 
+@_cached_lookup(lambda value, table, text_col=None: table in LOOKUP_CACHE_TABLES)
 def convert_to_id(value, table, text_col=None):
     """Converts a string value to its corresponding table identifier
 
@@ -1265,6 +1661,7 @@ def convert_to_id(value, table, text_col=None):
         return _id[0][0]
 
 
+@_cached_lookup(lambda value, table: table in LOOKUP_CACHE_TABLES)
 def convert_from_id(value, table):
     """Converts an id value to its corresponding string value
 
@@ -1582,12 +1979,25 @@ def generate_study_list(user, visibility):
     sids = set(s.id for s in user.user_studies.union(user.shared_studies))
     if visibility == "user":
         if user.level == "admin":
-            sids = (
-                sids
-                | qdb.study.Study.get_ids_by_status("sandbox")
-                | qdb.study.Study.get_ids_by_status("private")
-                | qdb.study.Study.get_ids_by_status("awaiting_approval")
-            )
+            # admins see every study with any non public artifact, even if
+            # the study itself is public, and the studies without artifacts
+            with qdb.sql_connection.TRN:
+                sql = """SELECT DISTINCT study_id
+                         FROM qiita.study_artifact
+                            JOIN qiita.artifact USING (artifact_id)
+                            JOIN qiita.visibility USING (visibility_id)
+                            JOIN qiita.study_portal USING (study_id)
+                            JOIN qiita.portal_type USING (portal_type_id)
+                         WHERE visibility IN %s AND portal = %s"""
+                qdb.sql_connection.TRN.add(
+                    sql,
+                    [("sandbox", "private", "awaiting_approval"), qiita_config.portal],
+                )
+                sids = (
+                    sids
+                    | set(qdb.sql_connection.TRN.execute_fetchflatten())
+                    | qdb.study.Study.get_ids_by_status("sandbox")
+                )
     elif visibility == "public":
         sids = qdb.study.Study.get_ids_by_status("public") - sids
         visibility_sql = "visibility = 'public' AND"
@@ -1828,65 +2238,91 @@ def get_artifacts_information(artifact_ids, only_biom=True):
     -------
     dict
         The info of the artifacts
+
+    Notes
+    -----
+    The preparation values (number of samples, target subfragment, platform
+    and target gene) are retrieved from qiita.prep_template_summary
     """
     if not artifact_ids:
         return {}
 
     sql = """
-        WITH main_query AS (
-            SELECT a.artifact_id, a.name, a.command_id as cid, sc.name,
-                   a.generated_timestamp, array_agg(a.command_parameters),
-                   dt.data_type, parent_id,
-                   parent_info.command_id, parent_info.name,
-                   array_agg(parent_info.command_parameters),
-                   array_agg(filepaths.filepath),
-                   qiita.find_artifact_roots(a.artifact_id) AS root_id
-            FROM qiita.artifact a
-            LEFT JOIN qiita.software_command sc USING (command_id)"""
+        SELECT a.artifact_id, a.name, a.command_id as cid, sc.name,
+               a.generated_timestamp, array_agg(a.command_parameters),
+               dt.data_type, parent_id,
+               parent_info.command_id, parent_info.name,
+               array_agg(parent_info.command_parameters),
+               array_agg(filepaths.filepath),
+               pts.prep_template_id, pts.num_samples,
+               pts.target_subfragment, pts.platform, pts.target_gene
+        FROM qiita.artifact a
+        LEFT JOIN qiita.software_command sc USING (command_id)"""
     if only_biom:
         sql += """
-            JOIN qiita.artifact_type at ON (
-                a.artifact_type_id = at .artifact_type_id
-                    AND artifact_type = 'BIOM')"""
+        JOIN qiita.artifact_type at ON (
+            a.artifact_type_id = at .artifact_type_id
+                AND artifact_type = 'BIOM')"""
     sql += """
-            LEFT JOIN qiita.parent_artifact pa ON (
-                a.artifact_id = pa.artifact_id)
-            LEFT JOIN qiita.data_type dt USING (data_type_id)
-            LEFT OUTER JOIN LATERAL (
-                SELECT command_id, sc.name, command_parameters
-                FROM qiita.artifact ap
-                LEFT JOIN qiita.software_command sc USING (command_id)
-                WHERE ap.artifact_id = pa.parent_id) parent_info ON true
-            LEFT OUTER JOIN LATERAL (
-                SELECT filepath
-                FROM qiita.artifact_filepath af
-                JOIN qiita.filepath USING (filepath_id)
-                WHERE af.artifact_id = a.artifact_id) filepaths ON true
-            WHERE a.artifact_id IN %s
-                AND a.visibility_id NOT IN %s
-            GROUP BY a.artifact_id, a.name, a.command_id, sc.name,
-                     a.generated_timestamp, dt.data_type, parent_id,
-                     parent_info.command_id, parent_info.name
-            ORDER BY a.command_id, artifact_id),
-          has_target_subfragment AS (
-            SELECT main_query.*, prep_template_id
-            FROM main_query
-            LEFT JOIN qiita.prep_template pt ON (
-                main_query.root_id = pt.artifact_id)
-        )
-        SELECT * FROM has_target_subfragment
+        LEFT JOIN qiita.parent_artifact pa ON (
+            a.artifact_id = pa.artifact_id)
+        LEFT JOIN qiita.data_type dt USING (data_type_id)
+        LEFT OUTER JOIN LATERAL (
+            SELECT prep_template_id
+            FROM qiita.preparation_artifact pra
+            WHERE pra.artifact_id = a.artifact_id
+            ORDER BY prep_template_id
+            LIMIT 1) prep ON true
+        LEFT JOIN qiita.prep_template_summary pts USING (prep_template_id)
+        LEFT OUTER JOIN LATERAL (
+            SELECT command_id, sc.name, command_parameters
+            FROM qiita.artifact ap
+            LEFT JOIN qiita.software_command sc USING (command_id)
+            WHERE ap.artifact_id = pa.parent_id) parent_info ON true
+        LEFT OUTER JOIN LATERAL (
+            SELECT filepath
+            FROM qiita.artifact_filepath af
+            JOIN qiita.filepath USING (filepath_id)
+            WHERE af.artifact_id = a.artifact_id) filepaths ON true
+        WHERE a.artifact_id IN %s
+            AND a.visibility_id NOT IN %s
+        GROUP BY a.artifact_id, a.name, a.command_id, sc.name,
+                 a.generated_timestamp, dt.data_type, parent_id,
+                 parent_info.command_id, parent_info.name,
+                 pts.prep_template_id
         ORDER BY cid, data_type, artifact_id
         """
 
-    sql_params = """SELECT command_id, array_agg(parameter_name)
-                    FROM qiita.command_parameter
-                    WHERE parameter_type = 'artifact'
-                    GROUP BY command_id"""
-
-    QCN = qdb.metadata_template.base_metadata_template.QIITA_COLUMN_NAME
-    sql_ts = """SELECT DISTINCT sample_values->>'target_subfragment'
-                FROM qiita.prep_%s
-                WHERE sample_id != '{0}'""".format(QCN)
+    # all the information needed from the commands, see
+    # qiita_db.software.Command.active and merging_scheme
+    sql_commands = """
+        SELECT command_id,
+               ARRAY(SELECT parameter_name
+                     FROM qiita.command_parameter cp
+                     WHERE cp.command_id = sc.command_id
+                        AND parameter_type = 'artifact') AS params,
+               ARRAY(SELECT parameter_name
+                     FROM qiita.command_parameter cp
+                     WHERE cp.command_id = sc.command_id
+                        AND check_biom_merge = TRUE
+                     ORDER BY parameter_name) AS ms_parameters,
+               ARRAY(SELECT name
+                     FROM qiita.command_output co
+                     WHERE co.command_id = sc.command_id
+                        AND check_biom_merge = TRUE
+                     ORDER BY name) AS ms_outputs,
+               ignore_parent_command,
+               CASE WHEN is_analysis OR software_type = 'artifact definition'
+                    THEN sc.active
+                    ELSE EXISTS (SELECT 1
+                                 FROM qiita.software_command sca
+                                 WHERE sca.name = sc.name
+                                    AND sca.active = true)
+               END AS active,
+               s.deprecated
+        FROM qiita.software_command sc
+            JOIN qiita.software s USING (software_id)
+            JOIN qiita.software_type USING (software_type_id)"""
 
     with qdb.sql_connection.TRN:
         results = []
@@ -1894,25 +2330,21 @@ def get_artifacts_information(artifact_ids, only_biom=True):
         # getting all commands and their artifact parameters so we can
         # delete from the results below
         commands = {}
-        qdb.sql_connection.TRN.add(sql_params)
-        for cid, params in qdb.sql_connection.TRN.execute_fetchindex():
-            cmd = qdb.software.Command(cid)
+        qdb.sql_connection.TRN.add(sql_commands)
+        for row in qdb.sql_connection.TRN.execute_fetchindex():
+            cid, params, ms_params, ms_outputs, ipc, active, deprecated = row
             commands[cid] = {
                 "params": params,
-                "merging_scheme": cmd.merging_scheme,
-                "active": cmd.active,
-                "deprecated": cmd.software.deprecated,
+                "merging_scheme": {
+                    "parameters": ms_params,
+                    "outputs": ms_outputs,
+                    "ignore_parent_command": ipc,
+                },
+                "active": active,
+                "deprecated": deprecated,
             }
 
-        # Now let's get the actual artifacts. Note that ts is a cache
-        # (prep id : target subfragment) so we don't have to query
-        # multiple times the target subfragment for a prep info file.
-        # However, some artifacts (like analysis) do not have a prep info
-        # file; thus we can have a None prep id (key)
-        ts = {None: []}
-        ps = {}
         algorithm_az = {"": ""}
-        PT = qdb.metadata_template.prep_template.PrepTemplate
         qdb.sql_connection.TRN.add(
             sql, [tuple(artifact_ids), qdb.util.artifact_visibilities_to_skip()]
         )
@@ -1930,8 +2362,11 @@ def get_artifacts_information(artifact_ids, only_biom=True):
                 pname,
                 pparams,
                 filepaths,
-                _,
                 prep_template_id,
+                prep_samples,
+                target,
+                platform,
+                target_gene,
             ) = row
 
             # cleaning up aparams & pparams
@@ -1981,28 +2416,12 @@ def get_artifacts_information(artifact_ids, only_biom=True):
                 deprecated = False
                 active = True
 
-            if prep_template_id not in ts:
-                qdb.sql_connection.TRN.add(sql_ts, [prep_template_id])
-                ts[prep_template_id] = qdb.sql_connection.TRN.execute_fetchflatten()
-            target = ts[prep_template_id]
-
-            prep_samples = 0
-            platform = "not provided"
-            target_gene = "not provided"
-            if prep_template_id is not None:
-                if prep_template_id not in ps:
-                    pt = PT(prep_template_id)
-                    categories = pt.categories
-                    if "platform" in categories:
-                        platform = ", ".join(set(pt.get_category("platform").values()))
-                    if "target_gene" in categories:
-                        target_gene = ", ".join(
-                            set(pt.get_category("target_gene").values())
-                        )
-
-                    ps[prep_template_id] = [len(list(pt.keys())), platform, target_gene]
-
-                prep_samples, platform, target_gene = ps[prep_template_id]
+            # some artifacts (like analysis) do not have a prep info file
+            if prep_template_id is None:
+                target = []
+                prep_samples = 0
+                platform = "not provided"
+                target_gene = "not provided"
 
             results.append(
                 {
@@ -2115,6 +2534,7 @@ def open_file(filepath_or, *args, **kwargs):
             fh.close()
 
 
+@_cached_lookup()
 def artifact_visibilities_to_skip():
     return tuple([qdb.util.convert_to_id("archived", "visibility")])
 
@@ -2250,6 +2670,139 @@ def generate_analyses_list_per_study(study_id):
     return results
 
 
+# redis keys of the cached processing networks shown in the prep and analysis
+# pages, see get_cached_network
+NETWORK_CACHE_KEY_FORMAT = {
+    "prep": "prep_template_network_%s",
+    "analysis": "analysis_network_%s",
+}
+# the cache is invalidated explicitly, the expiration is just a safety net for
+# changes that are not tracked, like deprecating a command
+NETWORK_CACHE_EXPIRATION = 86400
+
+
+def _network_cache_field(full_access):
+    return "full_access" if full_access else "public"
+
+
+def get_cached_network(owner_type, owner_id, full_access):
+    """Retrieves the cached processing network of a prep or analysis
+
+    Parameters
+    ----------
+    owner_type : str, {'prep', 'analysis'}
+        The type of object owning the network
+    owner_id : int
+        The prep template or analysis id
+    full_access : bool
+        Whether the network was generated for a user with full access
+
+    Returns
+    -------
+    dict or None
+        The cached network, None if it's not cached
+    """
+    value = r_client.hget(
+        NETWORK_CACHE_KEY_FORMAT[owner_type] % owner_id,
+        _network_cache_field(full_access),
+    )
+    if value is None:
+        return None
+    value = loads(value)
+    # JSON doesn't have tuples so we need to restore them
+    value["nodes"] = [tuple(n) for n in value["nodes"]]
+    value["edges"] = [tuple(e) for e in value["edges"]]
+    return value
+
+
+def set_cached_network(owner_type, owner_id, full_access, value):
+    """Caches the processing network of a prep or analysis
+
+    Parameters
+    ----------
+    owner_type : str, {'prep', 'analysis'}
+        The type of object owning the network
+    owner_id : int
+        The prep template or analysis id
+    full_access : bool
+        Whether the network was generated for a user with full access
+    value : dict
+        The network, as generated by qiita_pet.util.get_network_nodes_edges,
+        to cache; it needs to be JSON serializable
+    """
+    key = NETWORK_CACHE_KEY_FORMAT[owner_type] % owner_id
+    r_client.hset(key, _network_cache_field(full_access), dumps(value))
+    r_client.expire(key, NETWORK_CACHE_EXPIRATION)
+
+
+def _delete_cached_networks(keys):
+    """Removes the given network keys from redis"""
+    if keys:
+        r_client.delete(*keys)
+
+
+def invalidate_network_cache(artifact_ids=None, job_ids=None):
+    """Invalidates the processing networks containing artifacts or jobs
+
+    Parameters
+    ----------
+    artifact_ids : list of int, optional
+        The artifacts that changed
+    job_ids : list of str, optional
+        The jobs that changed
+
+    Notes
+    -----
+    A job is linked to a prep/analysis via its input artifacts; as jobs in
+    construction can have their inputs pending we also look at the input
+    artifacts of their ancestors in the workflow.
+    The keys are removed after the current transaction is committed so a
+    concurrent request can't repopulate the cache with data that is about to
+    change.
+    """
+    artifact_ids = tuple(artifact_ids) if artifact_ids else None
+    job_ids = tuple(str(j) for j in job_ids) if job_ids else None
+    if artifact_ids is None and job_ids is None:
+        return
+
+    with qdb.sql_connection.TRN:
+        if job_ids is not None:
+            sql = """WITH RECURSIVE jobs AS (
+                        SELECT processing_job_id
+                        FROM qiita.processing_job
+                        WHERE processing_job_id IN %s
+                      UNION
+                        SELECT p.parent_id
+                        FROM qiita.parent_processing_job p
+                            JOIN jobs j ON (j.processing_job_id = p.child_id))
+                     SELECT DISTINCT artifact_id
+                     FROM qiita.artifact_processing_job
+                     WHERE processing_job_id IN (
+                        SELECT processing_job_id FROM jobs)"""
+            qdb.sql_connection.TRN.add(sql, [job_ids])
+            artifact_ids = tuple(
+                set(artifact_ids or ())
+                | set(qdb.sql_connection.TRN.execute_fetchflatten())
+            )
+            if not artifact_ids:
+                return
+
+        sql = """SELECT 'prep', prep_template_id
+                 FROM qiita.preparation_artifact
+                 WHERE artifact_id IN %s
+                 UNION
+                 SELECT 'analysis', analysis_id
+                 FROM qiita.analysis_artifact
+                 WHERE artifact_id IN %s"""
+        qdb.sql_connection.TRN.add(sql, [artifact_ids, artifact_ids])
+        keys = [
+            NETWORK_CACHE_KEY_FORMAT[otype] % oid
+            for otype, oid in qdb.sql_connection.TRN.execute_fetchindex()
+        ]
+        if keys:
+            qdb.sql_connection.TRN.add_post_commit_func(_delete_cached_networks, keys)
+
+
 def create_nested_path(path):
     """Wraps makedirs() to make it safe across multiple concurrent calls.
     Returns successfully if the path was created, or if it already exists.
@@ -16,7 +16,6 @@ from qiita_core.util import execute_as_transaction
 from qiita_db.exceptions import QiitaDBUnknownIDError
 from qiita_db.processing_job import ProcessingJob as PJ
 from qiita_db.software import Software
-from qiita_db.sql_connection import TRN
 from qiita_db.study import Study
 
 from .base_handlers import BaseHandler
@@ -64,60 +63,50 @@ class AJAXAdminProcessingJobListing(AdminProcessingJobBaseClass):
         self._check_access()
         echo = self.get_argument("sEcho")
         command_id = int(self.get_argument("commandId"))
-
-        with TRN:
-            # different versions of the same plugin will have different
-            # command_id, this will make sure to get them all (commands)
-            sql = """SELECT processing_job_id FROM qiita.processing_job
-                     WHERE hidden = false and command_id in (
-                        SELECT command_id FROM qiita.software_command
-                        WHERE
-                            name in (
-                                SELECT name FROM qiita.software_command
-                                WHERE command_id = %s)) AND
-                            (heartbeat > current_date - interval '14' day OR
-                             heartbeat is NULL)"""
-            TRN.add(sql, [command_id])
-            jids = TRN.execute_fetchflatten()
+        # optional server side pagination and filtering, by default all the
+        # jobs are returned
+        start = int(self.get_argument("iDisplayStart", 0))
+        length = self.get_argument("iDisplayLength", None)
+        length = None if length is None or int(length) < 0 else int(length)
+        search = self.get_argument("sSearch", None)
+
+        total, total_filtered, job_list = PJ.list_jobs(
+            command_id=command_id,
+            max_heartbeat_age=14,
+            search=search,
+            offset=start,
+            limit=length,
+        )
 
         jobs = []
-        for jid in jids:
-            job = PJ(jid)
-            msg = ""
-            if job.status == "error":
-                msg = job.log.msg
-            elif job.status == "running":
-                msg = job.step
+        for job in job_list:
+            msg = job["message"]
             if msg is not None:
                 msg = msg.replace("\n", "</br>")
-            outputs = []
-            if job.status == "success":
-                outputs = [[k, v.id] for k, v in job.outputs.items()]
-            validator_jobs = [v.id for v in job.validator_jobs]
 
-            if job.heartbeat is not None:
-                heartbeat = job.heartbeat.strftime("%Y-%m-%d %H:%M:%S")
+            if job["heartbeat"] is not None:
+                heartbeat = job["heartbeat"].strftime("%Y-%m-%d %H:%M:%S")
             else:
                 heartbeat = "N/A"
 
             jobs.append(
                 [
-                    job.id,
-                    job.command.name,
-                    job.status,
+                    job["id"],
+                    job["command"],
+                    job["status"],
                     msg,
-                    outputs,
-                    validator_jobs,
+                    job["outputs"],
+                    job["validator_jobs"],
                     heartbeat,
-                    job.parameters.values,
-                    job.external_id,
-                    job.user.email,
+                    job["parameters"],
+                    job["external_id"],
+                    job["user"],
                 ]
             )
         results = {
             "sEcho": echo,
-            "recordsTotal": len(jobs),
-            "recordsFiltered": len(jobs),
+            "recordsTotal": total,
+            "recordsFiltered": total_filtered,
             "data": jobs,
         }
 
@@ -14,6 +14,7 @@ from qiita_core.qiita_settings import qiita_config, r_client
 from qiita_core.util import execute_as_transaction
 from qiita_db.analysis import Analysis
 from qiita_db.artifact import Artifact
+from qiita_db.util import get_cached_network, set_cached_network
 from qiita_pet.handlers.analysis_handlers import check_analysis_access
 from qiita_pet.handlers.base_handlers import BaseHandler
 from qiita_pet.handlers.util import to_int
@@ -78,14 +79,16 @@ def analysis_description_handler_get_request(analysis_id, user):
                     alert_type = redis_info["return"]["status"]
                     alert_msg = redis_info["return"]["message"].replace("\n", "</br>")
     artifacts = {}
-    for aid, samples in analysis.samples.items():
+    analysis_samples = analysis.samples
+    merging_schemes = Artifact.merging_schemes(analysis_samples)
+    for aid, samples in analysis_samples.items():
         artifact = Artifact(aid)
         prep_ids = set([str(x.id) for x in artifact.prep_templates])
         study = artifact.study
         artifacts[aid] = (
             study.id,
             study.title,
-            artifact.merging_scheme,
+            merging_schemes[aid],
             samples,
             prep_ids,
         )
@@ -183,6 +186,10 @@ def analyisis_graph_handler_get_request(analysis_id, user):
         user.private_analyses | user.shared_analyses
     ) or user.level in {"superuser", "admin"}
 
+    network = get_cached_network("analysis", analysis.id, full_access)
+    if network is not None:
+        return network
+
     nodes = []
     edges = []
     artifacts_being_deleted = []
@@ -209,12 +216,15 @@ def analyisis_graph_handler_get_request(analysis_id, user):
                 raise ValueError("More than one workflow in a single analysis")
 
     # the list(set()) is to remove any duplicated nodes
-    return {
+    network = {
         "edges": list(set(edges)),
         "nodes": list(set(nodes)),
         "workflow": wf_id,
         "artifacts_being_deleted": artifacts_being_deleted,
     }
+    set_cached_network("analysis", analysis.id, full_access, network)
+
+    return network
 
 
 class AnalysisGraphHandler(BaseHandler):
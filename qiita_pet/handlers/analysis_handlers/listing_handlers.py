@@ -109,12 +109,14 @@ class SelectedSamplesHandler(BaseHandler):
         sel_data = defaultdict(dict)
         proc_data_info = {}
         analysis = self.current_user.default_analysis
-        for aid, samples in analysis.samples.items():
+        analysis_samples = analysis.samples
+        merging_schemes = Artifact.merging_schemes(analysis_samples)
+        for aid, samples in analysis_samples.items():
             artifact = Artifact(aid)
             sel_data[artifact.study][aid] = samples
             proc_data_info[aid] = {
                 "processed_date": str(artifact.timestamp),
-                "merging_scheme": artifact.merging_scheme,
+                "merging_scheme": merging_schemes[aid],
                 "data_type": artifact.data_type,
             }
 
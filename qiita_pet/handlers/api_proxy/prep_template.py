@@ -23,7 +23,12 @@ from qiita_db.processing_job import ProcessingJob
 from qiita_db.software import Parameters, Software
 from qiita_db.study import Study
 from qiita_db.user import User
-from qiita_db.util import convert_to_id, get_files_from_uploads_folders
+from qiita_db.util import (
+    convert_to_id,
+    get_cached_network,
+    get_files_from_uploads_folders,
+    set_cached_network,
+)
 from qiita_pet.handlers.api_proxy.util import check_access, check_fp
 from qiita_pet.util import get_network_nodes_edges
 
@@ -677,26 +682,33 @@ def prep_template_graph_get_req(prep_id, user_id):
     if artifact is None:
         return {"edges": [], "nodes": [], "status": "success", "message": ""}
 
-    G = artifact.descendants_with_jobs
+    network = get_cached_network("prep", prep.id, full_access)
+    if network is None:
+        G = artifact.descendants_with_jobs
+
+        nodes, edges, wf_id = get_network_nodes_edges(G, full_access)
+        # nodes returns [node_type, node_name, element_id]; here we are
+        # looking for the node_type == artifact, and check by the
+        # element/artifact_id if it's being deleted
+        artifacts_being_deleted = [
+            a[2]
+            for a in nodes
+            if a[0] == "artifact" and Artifact(a[2]).being_deleted_by is not None
+        ]
+        network = {
+            "edges": edges,
+            "nodes": nodes,
+            "workflow": wf_id,
+            "artifacts_being_deleted": artifacts_being_deleted,
+        }
+        set_cached_network("prep", prep.id, full_access, network)
 
-    nodes, edges, wf_id = get_network_nodes_edges(G, full_access)
-    # nodes returns [node_type, node_name, element_id]; here we are looking
-    # for the node_type == artifact, and check by the element/artifact_id if
-    # it's being deleted
-    artifacts_being_deleted = [
-        a[2]
-        for a in nodes
-        if a[0] == "artifact" and Artifact(a[2]).being_deleted_by is not None
-    ]
+    # copy so the cached network is never modified
+    network = dict(network)
+    network["status"] = "success"
+    network["message"] = ""
 
-    return {
-        "edges": edges,
-        "nodes": nodes,
-        "workflow": wf_id,
-        "status": "success",
-        "artifacts_being_deleted": artifacts_being_deleted,
-        "message": "",
-    }
+    return network
 
 
 def prep_template_jobs_get_req(prep_id, user_id):
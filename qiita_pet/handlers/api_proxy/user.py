@@ -27,22 +27,22 @@ def user_jobs_get_req(user, limit=30):
      'jobs': {{column: value, ...}, ...}
     """
 
+    # the information of the jobs is retrieved in a single query
+    jobs = user.jobs(limit=None if limit < 0 else limit, information=True)
     response = []
-    for i, j in enumerate(user.jobs(limit=limit)):
-        name = j.command.name
-        hb = j.heartbeat
+    for j in jobs:
+        hb = j["heartbeat"]
         hb = "" if hb is None else hb.strftime("%Y-%m-%d %H:%M:%S")
-        pjw = j.processing_job_workflow
-        wid = "" if pjw is None else pjw.id
+        wid = j["processing_job_workflow_id"]
         response.append(
             {
-                "id": j.id,
-                "name": name,
-                "params": j.parameters.values,
-                "status": j.status,
+                "id": j["id"],
+                "name": j["command"],
+                "params": j["parameters"],
+                "status": j["status"],
                 "heartbeat": hb,
-                "step": j.step,
-                "processing_job_workflow_id": wid,
+                "step": j["step"],
+                "processing_job_workflow_id": "" if wid is None else wid,
             }
         )
 
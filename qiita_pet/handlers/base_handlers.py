@@ -9,11 +9,22 @@
 from tornado.web import RequestHandler
 
 from qiita_db.logger import LogEntry
+from qiita_db.sql_connection import start_profile, stop_profile
 from qiita_db.user import User
 from qiita_pet.util import convert_text_html
 
 
 class BaseHandler(RequestHandler):
+    def prepare(self):
+        """Starts profiling the SQL statements executed by the request"""
+        self._sql_profile = start_profile(
+            "%s %s" % (self.request.method, self.request.path)
+        )
+
+    def on_finish(self):
+        """Stores the SQL profile of the request, if any"""
+        stop_profile(getattr(self, "_sql_profile", None))
+
     def get_current_user(self):
         """Overrides default method of returning user curently connected"""
         username = self.get_secure_cookie("user")
@@ -5,10 +5,14 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
+from tornado.gen import coroutine
 from tornado.web import HTTPError, authenticated
 
-from qiita_core.util import execute_as_transaction
+from qiita_db.handlers.oauth2 import get_auth_stats
+from qiita_db.handlers.util import get_page_arguments, stream_json_pages
 from qiita_db.logger import LogEntry
+from qiita_db.sql_connection import sql_profiles_report
+from qiita_db.util import get_lookup_cache_stats
 
 from .base_handlers import BaseHandler
 
@@ -22,19 +26,53 @@ class LogEntryViewerHandler(BaseHandler):
                 "privileges to view error page" % self.current_user.email,
             )
 
+    # the entries are loaded by the page from LogEntryListHandler
     @authenticated
-    @execute_as_transaction
     def get(self):
         self.check_access()
-        logentries = LogEntry.newest_records()
-        self.render("error_log.html", logentries=logentries)
+        self.render("error_log.html", numrecords=100)
 
     @authenticated
-    @execute_as_transaction
     def post(self):
         self.check_access()
         numentries = int(self.get_argument("numrecords"))
         if numentries <= 0:
             numentries = 100
-        logentries = LogEntry.newest_records(numentries)
-        self.render("error_log.html", logentries=logentries)
+        self.render("error_log.html", numrecords=numentries)
+
+
+class LogEntryListHandler(LogEntryViewerHandler):
+    @authenticated
+    @coroutine
+    def get(self):
+        """Streams the log entries, newest first, as JSON
+
+        The optional `cursor` argument is the next_cursor of a previous
+        request and `limit` the max number of entries to return
+        """
+        self.check_access()
+        cursor, limit = get_page_arguments(self)
+
+        yield stream_json_pages(
+            self,
+            lambda c, n: LogEntry.records_page(cursor=c, limit=n),
+            cursor=cursor,
+            limit=limit,
+        )
+
+
+class SQLProfilesHandler(LogEntryViewerHandler):
+    @authenticated
+    def get(self):
+        """Shows the slow and N+1 statements of the stored SQL profiles
+
+        It also shows the token validation and the lookup cache counters of
+        this process
+        """
+        self.check_access()
+        self.render(
+            "sql_profiles.html",
+            report=sql_profiles_report(),
+            auth_stats=get_auth_stats(),
+            lookup_stats=get_lookup_cache_stats(),
+        )
@@ -6,7 +6,6 @@
 # The full license is in the file LICENSE, distributed with this software.
 # -----------------------------------------------------------------------------
 import io
-from collections import defaultdict
 
 import pandas as pd
 from tornado.escape import json_decode, json_encode
@@ -34,56 +33,27 @@ def _sample_details(study, samples):
         base.update(kwargs)
         return base
 
-    # cache sample detail for lookup
-    study_samples = set(study.sample_template)
-    sample_accessions = study.sample_template.ebi_sample_accessions
-
-    # cache preparation information that we'll need
-
-    # map of {sample_id: [indices, of, light, prep, info, ...]}
-    sample_prep_mapping = defaultdict(list)
-    pt_light = []
-    offset = 0
-    incoming_samples = set(samples)
-    for pt in study.prep_templates():
-        prep_samples = set(pt)
-        overlap = incoming_samples & prep_samples
-
-        if overlap:
-            # cache if any of or query samples are present on the prep
-
-            # reduce accessions to only samples of interest
-            accessions = pt.ebi_experiment_accessions
-            overlap_accessions = {i: accessions[i] for i in overlap}
-
-            # store the detail we need
-            pt_light.append((pt.id, overlap_accessions, pt.status, pt.data_type()))
-
-            # only care about mapping the incoming samples
-            for ptsample in overlap:
-                sample_prep_mapping[ptsample].append(offset)
-
-            offset += 1
+    # one query for the sample and preparation detail of the requested
+    # samples, keyed by sample id; missing samples are not present
+    found = study.sample_template.samples_details(set(samples))
 
     details = []
     for sample in samples:
-        if sample in study_samples:
+        if sample in found:
             # if the sample exists
-            sample_acc = sample_accessions.get(sample)
+            sample_acc, preps = found[sample]
 
-            if sample in sample_prep_mapping:
+            if preps:
                 # if the sample is present in any prep, pull out the detail
                 # specific to those preparations
-                for pt_idx in sample_prep_mapping[sample]:
-                    ptid, ptacc, ptstatus, ptdtype = pt_light[pt_idx]
-
+                for ptid, ptacc, ptstatus, ptdtype in preps:
                     details.append(
                         detail_maker(
                             sample_id=sample,
                             sample_found=True,
                             ebi_sample_accession=sample_acc,
                             preparation_id=ptid,
-                            ebi_experiment_accession=ptacc.get(sample),
+                            ebi_experiment_accession=ptacc,
                             preparation_visibility=ptstatus,
                             preparation_type=ptdtype,
                         )
@@ -160,8 +130,6 @@ class StudySamplesHandler(RESTHandler):
         if study.sample_template is None:
             self.fail("No sample information found", 404)
             return
-        else:
-            sample_info = study.sample_template.to_dataframe()
 
         # convert from json into a format that qiita can validate
         rawdata = pd.DataFrame.from_dict(json_decode(self.request.body), orient="index")
@@ -185,7 +153,7 @@ class StudySamplesHandler(RESTHandler):
             self.fail("Not all sample information categories provided", 400)
             return
 
-        existing_samples = set(sample_info.index)
+        existing_samples = study.sample_template.existing_samples(data.index)
         overlapping_ids = set(data.index).intersection(existing_samples)
         new_ids = list(set(data.index) - existing_samples)
         status = 500
@@ -47,8 +47,8 @@ class StatsHandler(BaseHandler):
         stats = yield Task(self._get_stats)
 
         # Pull a random public study from the database
-        public_studies = Study.get_by_status("public")
-        study = choice(list(public_studies)) if public_studies else None
+        public_studies = Study.get_ids_by_status("public")
+        study = Study(choice(list(public_studies))) if public_studies else None
 
         if study is None:
             random_study_info = None
@@ -10,6 +10,7 @@ import re
 import warnings
 from json import dumps
 
+from tornado.gen import coroutine
 from tornado.web import HTTPError, authenticated
 from wtforms import BooleanField, Form, StringField, validators
 from wtforms.validators import ValidationError
@@ -19,7 +20,9 @@ from qiita_core.exceptions import IncorrectPasswordError
 from qiita_core.qiita_settings import qiita_config
 from qiita_core.util import execute_as_transaction
 from qiita_db.exceptions import QiitaDBError, QiitaDBUnknownIDError
+from qiita_db.handlers.util import get_page_arguments, job_cursor, stream_json_pages
 from qiita_db.logger import LogEntry
+from qiita_db.processing_job import ProcessingJob
 from qiita_db.user import User
 from qiita_db.util import send_email
 from qiita_pet.handlers.api_proxy import user_jobs_get_req
@@ -418,6 +421,27 @@ class UserJobs(BaseHandler):
         self.write(response)
 
 
+class UserJobsListHandler(BaseHandler):
+    @authenticated
+    @coroutine
+    def get(self):
+        """Streams the jobs of the user as JSON
+
+        The optional `cursor` argument is the next_cursor of a previous
+        request and `limit` the max number of jobs to return
+        """
+        cursor, limit = get_page_arguments(self, job_cursor)
+
+        yield stream_json_pages(
+            self,
+            lambda c, n: ProcessingJob.jobs_page(
+                user=self.current_user, cursor=c, limit=n
+            ),
+            cursor=cursor,
+            limit=limit,
+        )
+
+
 class PurgeUsersAJAXHandler(PortalEditBase):
     # define columns besides email that will be displayed on website
     FIELDS = ["name", "affiliation", "address", "phone", "creation_timestamp"]
@@ -0,0 +1,501 @@
+r"""
+Load testing (:mod: `qiita_pet.load_test`)
+==========================================
+
+..currentmodule:: qiita_pet.load_test
+
+This module drives concurrent user journeys through the web application and
+plugin callbacks through the REST API, reporting the latency percentiles and
+the throughput of each request.
+
+Classes
+-------
+
+..autosummary::
+    :toctree: generated/
+
+    LoadTestClient
+
+Methods
+-------
+
+..autosummary::
+    :toctree: generated/
+
+    start_servers
+    stop_servers
+    run_load_test
+    summarize
+    format_report
+"""
+
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014--, The Qiita Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+import socket
+from collections import defaultdict
+from json import dumps
+from multiprocessing import get_context
+from random import Random
+from time import perf_counter, sleep, time
+from urllib.parse import urlencode
+from uuid import uuid4
+
+import numpy as np
+from tornado.gen import multi
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest
+from tornado.ioloop import IOLoop
+from tornado.web import create_signed_value
+
+import qiita_db as qdb
+from qiita_core.qiita_settings import qiita_config, r_client
+from qiita_core.util import is_test_environment
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+def _serve(port):
+    """Starts the web application in `port`, runs in its own process"""
+    from tornado.httpserver import HTTPServer
+
+    from qiita_pet.webserver import Application
+
+    ssl_options = {
+        "certfile": qiita_config.certificate_file,
+        "keyfile": qiita_config.key_file,
+    }
+    HTTPServer(Application(), ssl_options=ssl_options).listen(port)
+    IOLoop.current().start()
+
+
+def start_servers(port, n_processes=1, timeout=60):
+    """Starts the web application in new processes
+
+    Parameters
+    ----------
+    port : int
+        The port of the first process, the rest use the following ports
+    n_processes : int, optional
+        The number of processes, in production several processes run behind
+        nginx. Default: 1
+    timeout : int, optional
+        The seconds to wait for the processes to accept connections
+
+    Returns
+    -------
+    list of multiprocessing.Process
+        The processes running the web application
+
+    Raises
+    ------
+    RuntimeError
+        If the web application does not accept connections after `timeout`
+    """
+    # spawn so the processes don't share the database connection
+    ctx = get_context("spawn")
+    processes = []
+    for p in range(port, port + n_processes):
+        process = ctx.Process(target=_serve, args=(p,), daemon=True)
+        process.start()
+        processes.append(process)
+
+    for p in range(port, port + n_processes):
+        start = time()
+        while True:
+            try:
+                socket.create_connection(("localhost", p), timeout=1).close()
+                break
+            except OSError:
+                if time() - start > timeout:
+                    stop_servers(processes)
+                    raise RuntimeError("The web application didn't start in %d" % p)
+                sleep(0.5)
+
+    return processes
+
+
+def stop_servers(processes):
+    """Stops the processes returned by start_servers"""
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+
+
+class LoadTestClient(object):
+    """Sends the requests of the load test and records their latencies
+
+    Parameters
+    ----------
+    urls : list of str
+        The base urls of the web application processes, the requests are
+        distributed round-robin
+    email : str
+        The user whose session is used for the web application requests
+    token : str
+        The access token used for the plugin requests
+    concurrency : int
+        The max number of simultaneous requests
+
+    Attributes
+    ----------
+    latencies : dict of {str: list of float}
+        The latencies, in seconds, of the successful requests by name
+    errors : dict of {str: int}
+        The number of failed requests by name
+    """
+
+    def __init__(self, urls, email, token, concurrency):
+        self.urls = urls
+        self._next_url = 0
+        self.email = email
+        self.cookie = "user=%s" % create_signed_value(
+            qiita_config.cookie_secret, "user", email
+        ).decode("ascii")
+        self.token = token
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._http = AsyncHTTPClient(max_clients=concurrency)
+
+    async def fetch(self, name, path, method="GET", body=None, plugin=False):
+        """Sends a request and records its latency as `name`
+
+        Parameters
+        ----------
+        name : str
+            The name used to aggregate the request in the report
+        path : str
+            The path of the request, including the query string
+        method : str, optional
+            The HTTP method
+        body : str, optional
+            The request body
+        plugin : bool, optional
+            Whether it is a plugin request, authenticated with the token, or
+            a web application request, authenticated with the user session
+
+        Returns
+        -------
+        tornado.httpclient.HTTPResponse or None
+            The response, None if the request failed
+        """
+        url = self.urls[self._next_url % len(self.urls)] + path
+        self._next_url += 1
+        if plugin:
+            headers = {"Authorization": "Bearer %s" % self.token}
+        else:
+            headers = {"Cookie": self.cookie}
+        if method == "POST" and body is None:
+            body = ""
+        request = HTTPRequest(
+            url,
+            method=method,
+            body=body,
+            headers=headers,
+            validate_cert=False,
+            follow_redirects=False,
+            request_timeout=600,
+        )
+
+        start = perf_counter()
+        try:
+            response = await self._http.fetch(request, raise_error=False)
+        except Exception:
+            response = None
+        elapsed = perf_counter() - start
+
+        # a redirect means that the session was rejected
+        if response is None or response.code >= 300:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(elapsed)
+        return response
+
+
+async def user_journey(client, studies, rng):
+    """A user browsing the studies, one of their preparations and downloads
+
+    Parameters
+    ----------
+    client : LoadTestClient
+        The client sending the requests
+    studies : dict of {int: list of int}
+        The preparations of the studies available to the user
+    rng : random.Random
+        The random generator used to choose the study and preparation
+    """
+    await client.fetch("study list", "/study/list/")
+    args = urlencode({"user": client.email, "visibility": "user", "sEcho": 1})
+    await client.fetch("study list data", "/study/list_studies/?%s" % args)
+    study_id = rng.choice(sorted(studies))
+    await client.fetch("study page", "/study/description/%d" % study_id)
+    if studies[study_id]:
+        prep_id = rng.choice(studies[study_id])
+        await client.fetch("prep graph", "/prep_template/%d/graph/" % prep_id)
+    await client.fetch("download study bioms", "/download_study_bioms/%d" % study_id)
+
+
+async def plugin_journey(client, job_id, artifact_id, heartbeats):
+    """A plugin running a job: heartbeats, fetches its input and completes it
+
+    Parameters
+    ----------
+    client : LoadTestClient
+        The client sending the requests
+    job_id : str
+        The job being executed, it must be queued
+    artifact_id : int
+        The input artifact of the job
+    heartbeats : int
+        The number of heartbeats sent by the job
+    """
+    for _ in range(heartbeats):
+        await client.fetch(
+            "job heartbeat",
+            "/qiita_db/jobs/%s/heartbeat/" % job_id,
+            "POST",
+            plugin=True,
+        )
+    await client.fetch(
+        "artifact fetch", "/qiita_db/artifacts/%d/" % artifact_id, plugin=True
+    )
+    await client.fetch(
+        "job complete",
+        "/qiita_db/jobs/%s/complete/" % job_id,
+        "POST",
+        dumps({"success": False, "error": "Completed by the load test"}),
+        plugin=True,
+    )
+
+
+def _plugin_token():
+    """Returns a new access token like the ones granted to the plugins"""
+    token = "qiita-load-test-%s" % uuid4()
+    r_client.hset(token, "timestamp", "12/12/12 12:12:00")
+    r_client.hset(token, "grant_type", "client")
+    return token
+
+
+def _load_test_jobs(user, studies, n_jobs):
+    """Creates `n_jobs` queued jobs on the Demultiplexed artifacts of studies
+
+    Returns
+    -------
+    list of (str, int)
+        The job ids and their input artifact ids
+
+    Raises
+    ------
+    RuntimeError
+        If not working in a test environment
+    """
+    if not is_test_environment():
+        raise RuntimeError(
+            "Working in a production environment. Not creating the load test "
+            "jobs to keep the production database safe."
+        )
+    inputs = [
+        a.id
+        for s in studies
+        for a in qdb.study.Study(s).artifacts(artifact_type="Demultiplexed")
+    ]
+    if not inputs:
+        raise ValueError(
+            "The user doesn't have Demultiplexed artifacts to run the jobs, "
+            "add some with qiita-env synthetic-data"
+        )
+    software = qdb.software.Software.from_name_and_version(
+        *qdb.environment_manager.SYNTHETIC_SOFTWARE
+    )
+    command = software.get_command(qdb.environment_manager.SYNTHETIC_BIOM_CMD)
+    inputs = [inputs[i % len(inputs)] for i in range(n_jobs)]
+    parameters = [
+        qdb.software.Parameters.from_default_params(
+            next(command.default_parameter_sets), {"input_data": aid}
+        )
+        for aid in inputs
+    ]
+    with qdb.sql_connection.TRN:
+        jobs = qdb.processing_job.ProcessingJob.create_many(
+            user, parameters, force=True
+        )
+        # the plugins can only send heartbeats of queued jobs; set directly
+        # to avoid the notification emails
+        sql = """UPDATE qiita.processing_job
+                 SET processing_job_status_id = %s
+                 WHERE processing_job_id = %s"""
+        queued = qdb.util.convert_to_id("queued", "processing_job_status")
+        qdb.sql_connection.TRN.add(sql, [[queued, j.id] for j in jobs], many=True)
+        qdb.sql_connection.TRN.execute()
+    return [(j.id, aid) for j, aid in zip(jobs, inputs)]
+
+
+def run_load_test(
+    urls,
+    email="test@foo.bar",
+    users=10,
+    iterations=5,
+    jobs=100,
+    heartbeats=1,
+    concurrency=100,
+    seed=0,
+):
+    """Runs the user journeys and the plugin jobs concurrently
+
+    Parameters
+    ----------
+    urls : list of str
+        The base urls of the web application processes
+    email : str, optional
+        The user browsing the site and owning the jobs. Default: test@foo.bar
+    users : int, optional
+        The number of concurrent users. Default: 10
+    iterations : int, optional
+        The number of journeys of each user. Default: 5
+    jobs : int, optional
+        The number of jobs calling back simultaneously. Default: 100
+    heartbeats : int, optional
+        The number of heartbeats sent by each job. Default: 1
+    concurrency : int, optional
+        The max number of simultaneous requests. Default: 100
+    seed : int, optional
+        The seed used to choose the studies and preparations, the user i
+        uses `seed + i`. Default: 0
+
+    Returns
+    -------
+    dict
+        The report of the load test, see summarize
+
+    Raises
+    ------
+    RuntimeError
+        If not working in a test environment
+    ValueError
+        If the user doesn't have studies
+
+    Notes
+    -----
+    The jobs are created in the database, and completing them submits the
+    complete_job private tasks as in production.
+    """
+    if not is_test_environment():
+        raise RuntimeError(
+            "Working in a production environment. Not running the load test "
+            "to keep the production database safe."
+        )
+    user = qdb.user.User(email)
+    studies = {
+        s.id: [pt.id for pt in s.prep_templates()]
+        for s in user.user_studies | user.shared_studies
+    }
+    if not studies:
+        raise ValueError("The user %s doesn't have studies" % email)
+    job_inputs = _load_test_jobs(user, studies, jobs) if jobs else []
+
+    token = _plugin_token()
+    client = LoadTestClient(urls, email, token, concurrency)
+
+    async def virtual_user(rng):
+        for _ in range(iterations):
+            await user_journey(client, studies, rng)
+
+    async def main():
+        # each user has its own generator so the choices of each of them
+        # don't depend on the order in which the requests complete
+        await multi(
+            [virtual_user(Random(seed + i)) for i in range(users)]
+            + [plugin_journey(client, j, a, heartbeats) for j, a in job_inputs]
+        )
+
+    start = perf_counter()
+    try:
+        IOLoop.current().run_sync(main)
+    finally:
+        r_client.delete(token)
+    return summarize(client.latencies, client.errors, perf_counter() - start)
+
+
+def summarize(latencies, errors, duration):
+    """Computes the latency percentiles and throughput of each request
+
+    Parameters
+    ----------
+    latencies : dict of {str: list of float}
+        The latencies, in seconds, of the successful requests by name
+    errors : dict of {str: int}
+        The number of failed requests by name
+    duration : float
+        The duration of the load test in seconds
+
+    Returns
+    -------
+    dict
+        - duration: the duration of the load test in seconds
+        - requests: the statistics of each request name and of all the
+          requests ("total"): count, errors, throughput (requests per
+          second), mean, max and the PERCENTILES of the latency (in ms)
+    """
+    requests = {}
+    names = sorted(set(latencies) | set(errors))
+    groups = [(name, latencies.get(name, [])) for name in names]
+    groups.append(("total", [lt for _, values in groups for lt in values]))
+    for name, values in groups:
+        stats = {
+            "count": len(values),
+            "errors": sum(errors.values()) if name == "total" else errors.get(name, 0),
+            "throughput": len(values) / duration if duration else 0,
+            "mean": None,
+            "max": None,
+        }
+        stats.update({"p%d" % p: None for p in PERCENTILES})
+        if values:
+            values = np.array(values) * 1000
+            stats["mean"] = float(values.mean())
+            stats["max"] = float(values.max())
+            for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+                stats["p%d" % p] = float(value)
+        requests[name] = stats
+    return {"duration": duration, "requests": requests}
+
+
+def format_report(report):
+    """Formats the report returned by run_load_test as a table
+
+    Parameters
+    ----------
+    report : dict
+        The load test report
+
+    Returns
+    -------
+    str
+        The report as a plain text table
+    """
+    columns = (
+        ["count", "errors", "throughput", "mean"]
+        + ["p%d" % p for p in PERCENTILES]
+        + ["max"]
+    )
+    width = max(len(name) for name in report["requests"]) + 2
+    lines = [
+        "Duration: %.2fs" % report["duration"],
+        "Latencies in ms, throughput in requests per second",
+        "".ljust(width) + "".join(c.rjust(12) for c in columns),
+    ]
+    for name, stats in report["requests"].items():
+        values = []
+        for c in columns:
+            value = stats[c]
+            if value is None:
+                values.append("-".rjust(12))
+            elif isinstance(value, int):
+                values.append(("%d" % value).rjust(12))
+            else:
+                values.append(("%.2f" % value).rjust(12))
+        lines.append(name.ljust(width) + "".join(values))
+    return "\n".join(lines)
@@ -0,0 +1,130 @@
+# -----------------------------------------------------------------------------
+# Copyright (c) 2014--, The Qiita Development Team.
+#
+# Distributed under the terms of the BSD 3-clause License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# -----------------------------------------------------------------------------
+
+from functools import partial
+from random import Random
+from unittest import TestCase, main
+
+from tornado.web import decode_signed_value
+
+import qiita_db as qdb
+from qiita_core.qiita_settings import qiita_config, r_client
+from qiita_core.testing import wait_for_processing_job
+from qiita_core.util import qiita_test_checker
+from qiita_pet.load_test import (
+    LoadTestClient,
+    _load_test_jobs,
+    _plugin_token,
+    format_report,
+    plugin_journey,
+    run_load_test,
+    summarize,
+    user_journey,
+)
+from qiita_pet.test.tornado_test_base import TestHandlerBase
+
+
+class TestLoadTest(TestCase):
+    def test_summarize(self):
+        obs = summarize(
+            {"study list": [0.1, 0.2, 0.3, 0.4], "job complete": [0.5]},
+            {"job complete": 2, "prep graph": 1},
+            2,
+        )
+        self.assertEqual(obs["duration"], 2)
+        self.assertCountEqual(
+            obs["requests"], ["study list", "job complete", "prep graph", "total"]
+        )
+
+        stats = obs["requests"]["study list"]
+        self.assertEqual(stats["count"], 4)
+        self.assertEqual(stats["errors"], 0)
+        self.assertEqual(stats["throughput"], 2)
+        self.assertAlmostEqual(stats["mean"], 250)
+        self.assertAlmostEqual(stats["p50"], 250)
+        self.assertAlmostEqual(stats["max"], 400)
+
+        # only errors
+        stats = obs["requests"]["prep graph"]
+        self.assertEqual(stats["count"], 0)
+        self.assertEqual(stats["errors"], 1)
+        self.assertIsNone(stats["p99"])
+
+        stats = obs["requests"]["total"]
+        self.assertEqual(stats["count"], 5)
+        self.assertEqual(stats["errors"], 3)
+        self.assertAlmostEqual(stats["max"], 500)
+
+        obs = format_report(obs).splitlines()
+        self.assertEqual(obs[0], "Duration: 2.00s")
+        self.assertEqual(len(obs), 7)
+        self.assertTrue(obs[-1].startswith("total"))
+
+
+@qiita_test_checker()
+class TestLoadTestJobs(TestCase):
+    def test_load_test_jobs(self):
+        user = qdb.user.User("test@foo.bar")
+        obs = _load_test_jobs(user, [1], 3)
+        self.assertEqual(len(obs), 3)
+        for job_id, artifact_id in obs:
+            job = qdb.processing_job.ProcessingJob(job_id)
+            self.assertEqual(job.status, "queued")
+            self.assertEqual(job.input_artifacts, [qdb.artifact.Artifact(artifact_id)])
+
+        with self.assertRaises(ValueError):
+            _load_test_jobs(user, [], 3)
+
+    def test_load_test_production(self):
+        self.addCleanup(setattr, qiita_config, "test_environment", True)
+        qiita_config.test_environment = False
+        with self.assertRaises(RuntimeError):
+            run_load_test(["http://localhost:21174"], jobs=1)
+        with self.assertRaises(RuntimeError):
+            _load_test_jobs(qdb.user.User("test@foo.bar"), [1], 3)
+
+
+class TestLoadTestJourneys(TestHandlerBase):
+    def test_journeys(self):
+        email = "test@foo.bar"
+        studies = {1: [pt.id for pt in qdb.study.Study(1).prep_templates()]}
+        ((job_id, artifact_id),) = _load_test_jobs(qdb.user.User(email), [1], 1)
+        token = _plugin_token()
+        self.addCleanup(r_client.delete, token)
+        client = LoadTestClient([self.get_url("")], email, token, 10)
+
+        # the session cookie is signed for the user
+        name, value = client.cookie.split("=", 1)
+        self.assertEqual(
+            decode_signed_value(qiita_config.cookie_secret, name, value),
+            email.encode("ascii"),
+        )
+
+        self.io_loop.run_sync(partial(user_journey, client, studies, Random(0)))
+        self.io_loop.run_sync(partial(plugin_journey, client, job_id, artifact_id, 1))
+        wait_for_processing_job(job_id)
+
+        self.assertEqual(dict(client.errors), {})
+        self.assertCountEqual(
+            client.latencies,
+            [
+                "study list",
+                "study list data",
+                "study page",
+                "prep graph",
+                "download study bioms",
+                "job heartbeat",
+                "artifact fetch",
+                "job complete",
+            ],
+        )
+        self.assertEqual(qdb.processing_job.ProcessingJob(job_id).status, "error")
+
+
+if __name__ == "__main__":
+    main()
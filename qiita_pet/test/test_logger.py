@@ -8,6 +8,11 @@
 
 from unittest import main
 
+from mock import Mock
+
+from qiita_db.user import User
+from qiita_db.util import convert_to_id
+from qiita_pet.handlers.base_handlers import BaseHandler
 from qiita_pet.test.tornado_test_base import TestHandlerBase
 
 
@@ -24,5 +29,22 @@ class TestLogEntryViewerHandler(TestHandlerBase):
         self.assertEqual(response.code, 403)
 
 
+class TestSQLProfilesHandler(TestHandlerBase):
+    def test_get(self):
+        response = self.get("/admin/sql_profiles/")
+        self.assertEqual(response.code, 403)
+
+    def test_get_admin(self):
+        BaseHandler.get_current_user = Mock(return_value=User("admin@foo.bar"))
+        convert_to_id("sandbox", "visibility")
+        response = self.get("/admin/sql_profiles/")
+        self.assertEqual(response.code, 200)
+        body = response.body.decode("ascii")
+        self.assertIn("Token validation", body)
+        self.assertIn("Cache hits", body)
+        self.assertIn("Lookup cache", body)
+        self.assertIn("<td>convert_to_id</td>", body)
+
+
 if __name__ == "__main__":
     main()
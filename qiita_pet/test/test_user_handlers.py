@@ -126,6 +126,23 @@ class TestUserJobsHandler(TestHandlerBase):
         self.assertEqual(response.code, 200)
 
 
+class TestUserJobsListHandler(TestHandlerBase):
+    def test_get(self):
+        response = self.get("/user/jobs/list/?limit=1")
+        self.assertEqual(response.code, 200)
+        obs = loads(response.body)
+        self.assertEqual(len(obs["data"]), 1)
+
+        response = self.get("/user/jobs/list/?cursor=%s" % obs["next_cursor"])
+        self.assertEqual(response.code, 200)
+        self.assertNotIn(obs["data"][0], loads(response.body)["data"])
+
+    def test_get_invalid_arguments(self):
+        for args in ("cursor=1|2", "limit=one", "limit=-1"):
+            response = self.get("/user/jobs/list/?%s" % args)
+            self.assertEqual(response.code, 400)
+
+
 class TestPurgeUsersAJAXHandler(TestHandlerBase):
     def setUp(self):
         super().setUp()
@@ -24,6 +24,7 @@ from qiita_db.handlers.artifact import (
     APIArtifactHandler,
     ArtifactAPItestHandler,
     ArtifactHandler,
+    ArtifactJobsHandler,
     ArtifactTypeHandler,
 )
 from qiita_db.handlers.core import ResetAPItestHandler
@@ -95,7 +96,11 @@ from qiita_pet.handlers.download import (
     DownloadStudyBIOMSHandler,
     DownloadUpload,
 )
-from qiita_pet.handlers.logger_handlers import LogEntryViewerHandler
+from qiita_pet.handlers.logger_handlers import (
+    LogEntryListHandler,
+    LogEntryViewerHandler,
+    SQLProfilesHandler,
+)
 from qiita_pet.handlers.ontology import OntologyHandler
 from qiita_pet.handlers.prep_template import (
     PrepTemplateGraphHandler,
@@ -157,6 +162,7 @@ from qiita_pet.handlers.user_handlers import (
     PurgeUsersAJAXHandler,
     PurgeUsersHandler,
     UserJobs,
+    UserJobsListHandler,
     UserMessagesHander,
     UserProfileHandler,
 )
@@ -194,6 +200,7 @@ class Application(tornado.web.Application):
             (r"/profile/", UserProfileHandler),
             (r"/user/messages/", UserMessagesHander),
             (r"/user/jobs/", UserJobs),
+            (r"/user/jobs/list/", UserJobsListHandler),
             (r"/static/(.*)", tornado.web.StaticFileHandler, {"path": STATIC_PATH}),
             # Analysis handlers
             (r"/analysis/list/", ListAnalysesHandler),
@@ -209,6 +216,8 @@ class Application(tornado.web.Application):
             (r"/artifact/info/", ArtifactGetInfo),
             (r"/consumer/", MessageHandler),
             (r"/admin/error/", LogEntryViewerHandler),
+            (r"/admin/error/list/", LogEntryListHandler),
+            (r"/admin/sql_profiles/", SQLProfilesHandler),
             (r"/admin/approval/", StudyApprovalList),
             (r"/admin/artifact/", ArtifactAdminAJAX),
             (r"/admin/processing_jobs/", AdminProcessingJob),
@@ -305,6 +314,7 @@ class Application(tornado.web.Application):
             (r"/qiita_db/jobs/(.*)/complete/", CompleteHandler),
             (r"/qiita_db/jobs/(.*)", JobHandler),
             (r"/qiita_db/artifacts/types/", ArtifactTypeHandler),
+            (r"/qiita_db/artifacts/(.*)/jobs/", ArtifactJobsHandler),
             (r"/qiita_db/artifacts/(.*)/", ArtifactHandler),
             (r"/qiita_db/artifact/", APIArtifactHandler),
             (r"/qiita_db/users/", UsersListDBHandler),
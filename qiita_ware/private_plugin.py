@@ -12,7 +12,6 @@ from json import dumps, loads
 from os import remove
 from os.path import join
 from sys import exc_info
-from time import sleep
 
 import qiita_db as qdb
 from qiita_core.qiita_settings import qiita_config, r_client
@@ -40,33 +39,31 @@ def build_analysis_files(job):
         )
 
         cmd = qdb.software.Command.get_validator("BIOM")
-        val_jobs = []
+        validate_params = []
         for dtype, biom_fp, archive_artifact_fp in biom_files:
             if archive_artifact_fp is not None:
                 files = dumps({"biom": [biom_fp], "plain_text": [archive_artifact_fp]})
             else:
                 files = dumps({"biom": [biom_fp]})
-            validate_params = qdb.software.Parameters.load(
-                cmd,
-                values_dict={
-                    "files": files,
-                    "artifact_type": "BIOM",
-                    "provenance": dumps({"job": job.id, "data_type": dtype}),
-                    "analysis": analysis_id,
-                    "template": None,
-                },
-            )
-            val_jobs.append(
-                qdb.processing_job.ProcessingJob.create(
-                    analysis.owner, validate_params, True
+            validate_params.append(
+                qdb.software.Parameters.load(
+                    cmd,
+                    values_dict={
+                        "files": files,
+                        "artifact_type": "BIOM",
+                        "provenance": dumps({"job": job.id, "data_type": dtype}),
+                        "analysis": analysis_id,
+                        "template": None,
+                    },
                 )
             )
+        val_jobs = qdb.processing_job.ProcessingJob.create_many(
+            analysis.owner, validate_params, True
+        )
 
         job._set_validator_jobs(val_jobs)
 
-        for j in val_jobs:
-            j.submit()
-            sleep(1)
+        qdb.processing_job.ProcessingJob.submit_many(val_jobs)
 
     # The validator jobs no longer finish the job automatically so we need
     # to release the validators here
@@ -501,7 +498,10 @@ def private_task(job_id):
     task_name = job.command.name
 
     try:
-        TASK_DICT[task_name](job)
+        with qdb.sql_connection.profile_statements(
+            "private task %s" % task_name, job_id
+        ):
+            TASK_DICT[task_name](job)
     except Exception as e:
         log_msg = "Error on job %s: %s" % (
             job.id,